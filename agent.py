@@ -4,19 +4,15 @@ import time
 import json
 import traceback
 import os
-import httpx
+from typing import AsyncIterator, Iterable
 from dotenv import load_dotenv
 
-from google.adk.agents.sequential_agent import SequentialAgent
-from google.adk.agents.llm_agent import LlmAgent
-from google.adk.sessions import InMemorySessionService
-from google.adk.sessions import DatabaseSessionService
-from google.adk.models.lite_llm import LiteLlm
-
-
-from google.adk.runners import Runner
-from google.adk.tools import google_search
-# import google.generativeai as genai
+# ADK, model clients and the stage modules are imported inside build_pipeline(), so importing this
+# module (e.g. from the CLI) only pays for them once a pipeline is actually needed.
+from helpers import Part, Content, add_callback, clean_and_parse_json, has_placeholder
+from streaming_json import IncrementalArrayParser
+from instrumentation import RunMetrics, current_run_metrics, format_summary_table
+from checkpoints import HITS_STATE_KEY, RERUN_STATE_KEY, document_hash
 
 # --- CONFIGURE YOUR API KEYS HERE ---
 load_dotenv()
@@ -26,56 +22,87 @@ load_dotenv()
 # MODEL_NAME = "gemini-1.5-flash"
 # MODEL_NAME = "gemini-2.0-flash"
 MODEL_NAME = "gemini-2.5-pro"
-
-# --- Helper Classes and Functions ---
-class Part:
-    def __init__(self, text):
-        self.text = text
-
-class Content:
-    def __init__(self, role, parts):
-        self.role = role
-        self.parts = parts
-
-def clean_and_parse_json(text_output: str) -> dict | None:
-    """Cleans markdown fences and attempts to parse JSON."""
-    if not text_output:
-        return None
-    cleaned_output_text = text_output.strip()
-    if cleaned_output_text.startswith("```json"):
-        cleaned_output_text = cleaned_output_text[len("```json"):].strip()
-    if cleaned_output_text.startswith("```"):
-         cleaned_output_text = cleaned_output_text[len("```"):].strip()
-    if cleaned_output_text.endswith("```"):
-        cleaned_output_text = cleaned_output_text[:-len("```")].strip()
-    try:
-        return json.loads(cleaned_output_text)
-    except json.JSONDecodeError:
-        start_index = cleaned_output_text.find('{')
-        end_index = cleaned_output_text.rfind('}')
-        if start_index != -1 and end_index != -1 and end_index > start_index:
-            potential_json = cleaned_output_text[start_index : end_index + 1]
-            try:
-                return json.loads(potential_json)
-            except json.JSONDecodeError:
-                print(f"\n(Warning: Output could not be parsed as JSON after extensive cleaning. Attempted: '{potential_json}')")
-                return None
-        else:
-             print(f"\n(Warning: Output could not be parsed as JSON, invalid structure. Started with: '{cleaned_output_text[:100]}...')")
-             return None
-    except Exception as parse_err:
-        print(f"\n(Warning: Unexpected error parsing JSON: {parse_err})")
-        return None
-
-# --- Agent Definitions ---
-
-# Agent 1: Extract Claims for Fact-Checking
-extract_claims_fact_check_agent = LlmAgent(
-    name="ExtractClaimsFactCheckAgent",
-    description="Identifies and extracts verifiable factual claims from text for the fact-checking process.",
-    # model=MODEL_NAME,
-    model=LiteLlm(model="openai/magistral:24b"), #gemma3n:e2b
-    instruction="""
+# Per-stage model ids: "gemini-*" ids use the native Gemini API, anything else goes through LiteLlm.
+EXTRACTION_MODEL = os.environ.get("EXTRACTION_MODEL", "openai/magistral:24b")  # gemma3n:e2b
+EVIDENCE_MODEL = os.environ.get("EVIDENCE_MODEL", MODEL_NAME)
+JUDGE_MODEL = os.environ.get("JUDGE_MODEL", "openai/magistral:24b")
+# Bigger models the extraction/judge stages escalate to when the first model's output is rejected (empty disables).
+EXTRACTION_FALLBACK_MODEL = os.environ.get("EXTRACTION_FALLBACK_MODEL", "")
+JUDGE_FALLBACK_MODEL = os.environ.get("JUDGE_FALLBACK_MODEL", "")
+CASCADE_MIN_CONFIDENCE = float(os.environ.get("CASCADE_MIN_CONFIDENCE", "0.6"))
+# Per-provider limits as "provider=requests_per_second/burst/max_concurrency"; providers not listed are unlimited
+# (empty, the default, limits none; e.g. "gemini=2/4/8,openai=4/4/2"). Retryable failures of every model are
+# retried with jittered backoff either way.
+RATE_LIMITS = os.environ.get("RATE_LIMITS", "")
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("RATE_LIMIT_MAX_RETRIES", "4"))
+RATE_LIMIT_BACKOFF_SECONDS = float(os.environ.get("RATE_LIMIT_BACKOFF_SECONDS", "1.0"))
+# "single" extracts claims in one call, "chunked" extracts overlapping sentence windows concurrently.
+CLAIM_EXTRACTION_MODE = os.environ.get("CLAIM_EXTRACTION_MODE", "single").lower()
+CLAIM_CHUNK_MAX_CHARS = int(os.environ.get("CLAIM_CHUNK_MAX_CHARS", "3000"))
+CLAIM_CHUNK_OVERLAP_SENTENCES = int(os.environ.get("CLAIM_CHUNK_OVERLAP_SENTENCES", "1"))
+CLAIM_CHUNK_CONCURRENCY = int(os.environ.get("CLAIM_CHUNK_CONCURRENCY", "4"))
+# When on, a local scorer forwards only check-worthy sentences to claim extraction.
+CLAIM_PREFILTER = os.environ.get("CLAIM_PREFILTER", "off").lower() == "on"
+CLAIM_PREFILTER_THRESHOLD = float(os.environ.get("CLAIM_PREFILTER_THRESHOLD", "2"))
+# When on, model output is streamed so claims and verdicts are handled as soon as each one closes.
+PIPELINE_STREAMING = os.environ.get("PIPELINE_STREAMING", "off").lower() == "on"
+# Redirect cache for evidence source URLs (empty path keeps it in memory only).
+URL_CACHE_PATH = os.environ.get("URL_CACHE_PATH", "./url_cache.db")
+URL_CACHE_TTL_SECONDS = float(os.environ.get("URL_CACHE_TTL_SECONDS", str(7 * 86400)))
+URL_RESOLVE_PER_HOST_LIMIT = int(os.environ.get("URL_RESOLVE_PER_HOST_LIMIT", "4"))
+URL_RESOLVE_HOSTS = tuple(os.environ.get("URL_RESOLVE_HOSTS", "vertexaisearch.cloud.google.com").split(","))
+# "database" keeps every session and event in SQLite, "memory" keeps nothing,
+# "lean" keeps working state in memory and persists only final results in batches.
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "database").lower()
+SESSION_DB_PATH = os.environ.get("SESSION_DB_PATH", "./my_agent_data.db")
+SESSION_RESULTS_DB_PATH = os.environ.get("SESSION_RESULTS_DB_PATH", "./factcheck_sessions.db")
+SESSION_RETENTION_DAYS = float(os.environ.get("SESSION_RETENTION_DAYS", "30"))
+# Per-run stage metrics: JSON lines log and Prometheus text file (empty path disables either).
+METRICS_LOG_PATH = os.environ.get("METRICS_LOG_PATH", "./factcheck_metrics.jsonl")
+METRICS_PROM_PATH = os.environ.get("METRICS_PROM_PATH", "./factcheck_metrics.prom")
+# "off" skips evidence search, "single" runs one search call for all claims,
+# "fanout" runs one concurrent search sub-run per claim.
+EVIDENCE_SEARCH_MODE = os.environ.get("EVIDENCE_SEARCH_MODE", "off").lower()
+EVIDENCE_SEARCH_CONCURRENCY = int(os.environ.get("EVIDENCE_SEARCH_CONCURRENCY", "4"))
+# Evidence source for the search stage: "google" (google_search, Gemini models only) or "local"
+# (offline BM25 index over LOCAL_EVIDENCE_PATH, built with `python cli.py evidence index ...`; any model).
+EVIDENCE_RETRIEVAL = os.environ.get("EVIDENCE_RETRIEVAL", "google").lower()
+LOCAL_EVIDENCE_PATH = os.environ.get("LOCAL_EVIDENCE_PATH", "./local_evidence.db")
+LOCAL_EVIDENCE_TOP_K = int(os.environ.get("LOCAL_EVIDENCE_TOP_K", "5"))
+LOCAL_EVIDENCE_RERANK_MODEL = os.environ.get("LOCAL_EVIDENCE_RERANK_MODEL", "")
+# Judge claims in concurrent micro-batches of about this many estimated tokens (prompt plus response),
+# with evidence fields copied from state instead of regenerated; 0 (the default) judges every claim in one call.
+JUDGE_BATCH_MAX_TOKENS = int(os.environ.get("JUDGE_BATCH_MAX_TOKENS", "0"))
+JUDGE_BATCH_CONCURRENCY = int(os.environ.get("JUDGE_BATCH_CONCURRENCY", "4"))
+# Prompt budgeting: "on" sends the evidence and judge agents only the state fields they need instead of the
+# whole conversation; calls estimated above PROMPT_BUDGET_TOKENS are reported (0 = no budget).
+PROMPT_SCOPING = os.environ.get("PROMPT_SCOPING", "on").lower() == "on"
+PROMPT_BUDGET_TOKENS = int(os.environ.get("PROMPT_BUDGET_TOKENS", "0"))
+# Marks the static instruction for provider-side caching where LiteLLM supports explicit cache control;
+# the TTL is how long a resent instruction counts as a cacheable prefix in the local savings estimate.
+PROMPT_PREFIX_CACHE = os.environ.get("PROMPT_PREFIX_CACHE", "on").lower() == "on"
+PROMPT_PREFIX_TTL_SECONDS = float(os.environ.get("PROMPT_PREFIX_TTL_SECONDS", "300"))
+# Strict schema validation of every stage output, repairing only invalid or missing elements (claims without
+# evidence or a verdict are re-requested in one small call); STRUCTURED_OUTPUT asks the extraction and judge
+# models for JSON-only responses (Gemini response MIME type, LiteLLM JSON mode).
+SCHEMA_REPAIR = os.environ.get("SCHEMA_REPAIR", "on").lower() == "on"
+STRUCTURED_OUTPUT = os.environ.get("STRUCTURED_OUTPUT", "on").lower() == "on"
+# Set CLAIM_CACHE_PATH to an empty string to disable the claim extraction cache.
+CLAIM_CACHE_PATH = os.environ.get("CLAIM_CACHE_PATH", "./claim_cache.db")
+CLAIM_CACHE_MAX_BYTES = int(os.environ.get("CLAIM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Cross-document verdict reuse is opt-in: set CLAIM_DEDUP_PATH (e.g. ./claim_dedup.db) to enable it.
+CLAIM_DEDUP_PATH = os.environ.get("CLAIM_DEDUP_PATH", "")
+CLAIM_DEDUP_THRESHOLD = float(os.environ.get("CLAIM_DEDUP_THRESHOLD", "0.8"))
+CLAIM_DEDUP_FRESHNESS_DAYS = float(os.environ.get("CLAIM_DEDUP_FRESHNESS_DAYS", "7"))
+# Set CHECKPOINT_PATH to an empty string to disable per-document stage checkpoints.
+CHECKPOINT_PATH = os.environ.get("CHECKPOINT_PATH", "./stage_checkpoints.db")
+CHECKPOINT_MAX_AGE_DAYS = float(os.environ.get("CHECKPOINT_MAX_AGE_DAYS", "7"))
+
+RESULTS_STORE_PATH = os.environ.get("RESULTS_STORE_PATH", "./fact_check_results")
+
+
+# --- Agent Instructions ---
+EXTRACTION_INSTRUCTION = """
 You are a Claim Identification and Contextualization Specialist, the first step in a fact-checking pipeline. Your task is to meticulously analyze the input text, distinguish verifiable claims from other language, enrich those claims, and suggest how to verify them.
 
 **Your process for analyzing the text:**
@@ -132,17 +159,9 @@ You are a Claim Identification and Contextualization Specialist, the first step
   ]
 }
 ```
-    """,
-    output_key='claims'
-)
-
-# Agent 2: Search for Fact-Checking Evidence
-evidence_search_fact_check_agent = LlmAgent(
-    name="EvidenceSearchFactCheckAgent",
-    description="Gathers and summarizes evidence for each claim as part of the fact-checking process.",
-    model=MODEL_NAME,
-    tools=[google_search],
-    instruction="""
+    """
+
+EVIDENCE_INSTRUCTION = """
 You are an AI Research Analyst. Your purpose is to gather neutral, verifiable evidence for a fact-checking pipeline. You will receive a JSON object from the previous agent containing a list of claims to investigate.
 
 **Your Goal:**
@@ -199,17 +218,9 @@ For EACH object in the `verifiable_claims` list from the input, you must find an
     }
 }
 ```
-""",
-    output_key='google_search_results'
-)
-
-# Agent 3: Analyze Evidence and Finalize Fact-Check
-claim_analysis_fact_check_agent = LlmAgent(
-    name="ClaimAnalysisFactCheckAgent",
-    # model=MODEL_NAME,
-    model=LiteLlm(model="openai/magistral:24b"), #gemma3n:e2b
+"""
 
-    instruction="""
+JUDGE_INSTRUCTION = """
 You are a Lead Fact-Check Judge, the final, decisive step in the fact-checking pipeline. Your task is to render a final verdict for each claim by synthesizing the initial claim analysis with the evidence gathered by the research analyst.
 
 **Your Inputs:**
@@ -236,6 +247,7 @@ You are a Lead Fact-Check Judge, the final, decisive step in the fact-checking p
     *   `evidence_summary`: The summary provided by the research analyst.
     *   `sources`: The list of source URLs.
     *   `search_query`: The search query used to find the evidence.
+    *   `confidence`: How certain you are of the verdict, from 0.0 (guessing) to 1.0 (certain).
 
 **Example Inputs:**
 *(Implicitly passed the `claims_analysis` from Agent 1 and `google_search_results` from Agent 2)*
@@ -251,7 +263,8 @@ You are a Lead Fact-Check Judge, the final, decisive step in the fact-checking p
       "reasoning": "The evidence states that 195 educational infrastructure projects were completed, not 200 schools.",
       "evidence_summary": "According to the Ministry of Public Education's annual report, 195 new educational infrastructure projects were completed under the Chaves administration. News reports corroborate this number, citing the official ministry data.",
       "sources": ["https://mep.go.cr/anual-report-2023.pdf", "https://news.cr/education-projects-completed"],
-      "search_query": "Ministry of Public Education Costa Rica school construction data Chaves administration"
+      "search_query": "Ministry of Public Education Costa Rica school construction data Chaves administration",
+      "confidence": 0.9
     },
     {
       "original_statement": "lowered the national unemployment rate to 5%",
@@ -260,143 +273,668 @@ You are a Lead Fact-Check Judge, the final, decisive step in the fact-checking p
       "reasoning": "The evidence shows a drop in unemployment but indicates the most recent figure is 7.8%, not the 5% claimed.",
       "evidence_summary": "The latest data from the National Institute of Statistics and Census (INEC) shows the open unemployment rate was 7.8%. Historical data shows the rate was higher previously, but did not reach the specific 5% figure.",
       "sources": ["https://inec.cr/employment/quarterly-report", "https://centralbank.cr/economic-indicators/unemployment"],
-      "search_query": "Costa Rica unemployment rate INEC Chaves administration"
+      "search_query": "Costa Rica unemployment rate INEC Chaves administration",
+      "confidence": 0.8
+    }
+  ]
+}
+reply in spanish
+```
+"""
+
+# Micro-batched judging: same task and rules, but the model writes only the verdict fields; the
+# statement, evidence summary, sources and search query are filled in from state afterwards.
+JUDGE_BATCH_INSTRUCTION = JUDGE_INSTRUCTION.split("**Output Format:**")[0] + """**Output Format:**
+*   You MUST output ONLY a valid JSON object with a single key, `"fact_check_results"`.
+*   The value will be a list with one object per claim in the input, in the same order, each containing only:
+    *   `id`: The claim's `id` from the input, unchanged.
+    *   `claim`: The `contextualized_claim` that was investigated.
+    *   `status`: Your final verdict ('Supported', 'Contradicted', or 'Unsubstantiated').
+    *   `reasoning`: Your explanation (empty string if 'Supported').
+    *   `confidence`: How certain you are of the verdict, from 0.0 (guessing) to 1.0 (certain).
+*   Do NOT repeat the evidence summary, sources or search query; they are attached to your verdicts automatically.
+
+**Example Output:**
+```json
+{
+  "fact_check_results": [
+    {
+      "id": "c1",
+      "claim": "The Chaves administration in Costa Rica has built 200 new schools.",
+      "status": "Contradicted",
+      "reasoning": "The evidence states that 195 educational infrastructure projects were completed, not 200 schools.",
+      "confidence": 0.9
     }
   ]
 }
 reply in spanish
 ```
-""",
-    description="Analyzes the gathered evidence to determine the final fact-check status of each claim.",
-    output_key='final_results'
-)
-
-
-# --- Pipeline Definition ---
-agent = SequentialAgent(
-    name="FactCheckingPipeline",
-    sub_agents=[
-        extract_claims_fact_check_agent,
-        # evidence_search_fact_check_agent,
-        claim_analysis_fact_check_agent
-    ],
-    description="A 3-step pipeline of fact-checking agents that extracts claims, gathers evidence, and analyzes the findings."
-)
-
-# --- Runner and Interaction Function ---
+"""
+
+# --- Pipeline Construction ---
 APP_NAME_FACTCHECK = "political_factcheck_app"
-# session_service = InMemorySessionService()
-# Example using a local SQLite file:
-db_url = "sqlite:///./my_agent_data.db"
-session_service = DatabaseSessionService(db_url=db_url)
-
-try:
-    factcheck_runner = Runner(
-        agent=agent,
-        app_name=APP_NAME_FACTCHECK,
-        session_service=session_service
+
+
+class FactCheckPipeline:
+    """The agents, runner and long-lived services shared by every fact-check run in this process."""
+
+    def __init__(self, runner, session_service, run_config, extraction_authors: set, judge_authors: set,
+                 claim_cache, claim_dedup_index, checkpoint_store, metrics_exporter, url_resolver,
+                 provider_limiters: dict, results_store, evidence_index, prompt_budget):
+        self.runner = runner
+        self.session_service = session_service
+        self.run_config = run_config
+        self.extraction_authors = extraction_authors
+        self.judge_authors = judge_authors
+        self.claim_cache = claim_cache
+        self.claim_dedup_index = claim_dedup_index
+        self.checkpoint_store = checkpoint_store
+        self.metrics_exporter = metrics_exporter
+        self.url_resolver = url_resolver
+        self.provider_limiters = provider_limiters
+        self.results_store = results_store
+        self.evidence_index = evidence_index
+        self.prompt_budget = prompt_budget
+
+    def stats(self) -> dict:
+        return {
+            "claim_cache": self.claim_cache.stats() if self.claim_cache else None,
+            "checkpoints": self.checkpoint_store.stats() if self.checkpoint_store else None,
+            "url_resolver": dict(self.url_resolver.stats),
+            "rate_limiters": {provider: limiter.snapshot() for provider, limiter in self.provider_limiters.items()},
+            "results_store": self.results_store.stats() if self.results_store else None,
+            "local_evidence": self.evidence_index.stats() if self.evidence_index else None,
+            "prompt_budget": self.prompt_budget.stats(),
+        }
+
+
+def build_model(model_id: str, provider_limiters: dict, json_mode: bool = False):
+    """Builds the model for an id (native Gemini or LiteLlm), wrapped in retries with backoff.
+
+    Calls go through the provider's limiter; providers without configured RATE_LIMITS get an unlimited
+    one (added to `provider_limiters`), so retryable failures are retried either way.
+    `json_mode` turns on LiteLLM's JSON response format; Gemini models get it from the agent's content config.
+    """
+    from google.adk.models.google_llm import Gemini
+    from prompt_budget import prefix_cache_args
+    from rate_limited_llm import RateLimitedLlm
+    from rate_limiter import provider_of, unlimited_limiter
+
+    provider = provider_of(model_id)
+    limiter = provider_limiters.get(provider)
+    if limiter is None:
+        limiter = provider_limiters[provider] = unlimited_limiter(provider)
+    if model_id.startswith("gemini"):
+        inner = Gemini(model=model_id)
+    else:
+        from google.adk.models.lite_llm import LiteLlm
+
+        cache_args = prefix_cache_args(provider) if PROMPT_PREFIX_CACHE else {}
+        if json_mode:
+            cache_args["response_format"] = {"type": "json_object"}
+        inner = LiteLlm(model=model_id, **cache_args)
+    return RateLimitedLlm(model=model_id, inner=inner, limiter=limiter,
+                          max_retries=RATE_LIMIT_MAX_RETRIES, backoff_seconds=RATE_LIMIT_BACKOFF_SECONDS)
+
+
+def build_pipeline() -> FactCheckPipeline:
+    """Builds the agents, stage wrappers, caches, session service and runner from the configuration."""
+    # Heavy dependencies are imported here rather than at module level, so importing this module
+    # (and CLI commands such as --help, config validation or cache lookups) stays fast.
+    from google.adk.agents.llm_agent import LlmAgent
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.adk.agents.sequential_agent import SequentialAgent
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.adk.tools import google_search
+    from google.genai import types
+
+    from cascade import ModelCascadeAgent, extraction_escalation_reason, fallback_tier, verdict_escalation_reason
+    from checkpoints import StageCheckpointStore
+    from chunked_extraction import ChunkedClaimExtractionAgent
+    from claim_cache import ClaimExtractionCache
+    from claim_dedup import ClaimDedupIndex, ClaimReuseAgent, KnownClaimsFilterAgent, skip_when_no_pending_claims
+    from evidence_fanout import ParallelEvidenceSearchAgent
+    from instrumentation import MetricsExporter, instrument_agent
+    from judge_batching import MicroBatchedJudgeAgent
+    from local_retrieval import LocalEvidenceIndex, make_search_tool
+    from prefilter import PrefilteredExtractionAgent
+    from prompt_budget import PromptBudget
+    from rate_limiter import ProviderLimiter, parse_rate_limits
+    from rate_limiter import prometheus_text as rate_limiter_prometheus_text
+    from results_store import ResultsStore
+    from schema_repair import SchemaRepairAgent
+    from session_store import LeanSessionService, database_session_service, prune_database_sessions
+    from url_resolver import UrlResolver
+
+    provider_limiters = {
+        provider: ProviderLimiter(provider, rps, burst, max_concurrency)
+        for provider, (rps, burst, max_concurrency) in parse_rate_limits(RATE_LIMITS).items()
+    }
+
+    # --- Agent Definitions ---
+    # JSON-only responses for the tool-free stages (Gemini rejects a JSON response type alongside google_search)
+    json_config = types.GenerateContentConfig(response_mime_type="application/json") if STRUCTURED_OUTPUT else None
+
+    # Agent 1: Extract Claims for Fact-Checking
+    extract_claims_fact_check_agent = LlmAgent(
+        name="ExtractClaimsFactCheckAgent",
+        description="Identifies and extracts verifiable factual claims from text for the fact-checking process.",
+        # model=MODEL_NAME,
+        model=build_model(EXTRACTION_MODEL, provider_limiters, json_mode=STRUCTURED_OUTPUT),
+        instruction=EXTRACTION_INSTRUCTION,
+        generate_content_config=json_config,
+        output_key='claims'
+    )
+
+    # Agent 2: Search for Fact-Checking Evidence
+    evidence_index = None
+    if EVIDENCE_RETRIEVAL == "local":
+        # A plain function tool over the offline index, so it works with any provider
+        evidence_index = LocalEvidenceIndex(LOCAL_EVIDENCE_PATH, LOCAL_EVIDENCE_RERANK_MODEL or None)
+        print(f"📚 Local evidence index loaded: {evidence_index.stats()}")
+        evidence_tools = [make_search_tool(evidence_index, LOCAL_EVIDENCE_TOP_K)]
+        evidence_instruction = EVIDENCE_INSTRUCTION.replace("`google_search` tool", "`local_evidence_search` tool")
+    else:
+        # google_search is a Gemini built-in tool; other providers answer from the instruction alone.
+        evidence_tools = [google_search] if EVIDENCE_MODEL.startswith("gemini") else []
+        evidence_instruction = EVIDENCE_INSTRUCTION
+    evidence_search_fact_check_agent = LlmAgent(
+        name="EvidenceSearchFactCheckAgent",
+        description="Gathers and summarizes evidence for each claim as part of the fact-checking process.",
+        model=build_model(EVIDENCE_MODEL, provider_limiters),
+        tools=evidence_tools,
+        instruction=evidence_instruction,
+        output_key='google_search_results'
     )
-    print("✅ FactCheck Runner initialized successfully.")
-except Exception as e:
-    print(f"❌ Error initializing FactCheck Runner: {e}")
-    traceback.print_exc()
-    exit()
 
-async def call_fact_check_pipeline(political_text: str, user_id: str, session_id: str):
-    """Runs the political content fact-checking pipeline."""
-    print(f"\n>>> Starting Fact-Checking Pipeline for Text:")
-    print(f"'''\n{political_text[:500].strip()}...\n'''")
-    print(f">>> User: {user_id}, Session: {session_id}")
+    # Agent 3: Analyze Evidence and Finalize Fact-Check
+    claim_analysis_fact_check_agent = LlmAgent(
+        name="ClaimAnalysisFactCheckAgent",
+        # model=MODEL_NAME,
+        model=build_model(JUDGE_MODEL, provider_limiters, json_mode=STRUCTURED_OUTPUT),
+        instruction=JUDGE_BATCH_INSTRUCTION if JUDGE_BATCH_MAX_TOKENS > 0 else JUDGE_INSTRUCTION,
+        generate_content_config=json_config,
+        description="Analyzes the gathered evidence to determine the final fact-check status of each claim.",
+        output_key='final_results'
+    )
+
+    # --- Prompt Budget ---
+    # Attached before the cascade so fallback tiers, which copy the agent, are scoped the same way
+    prompt_budget = PromptBudget(PROMPT_BUDGET_TOKENS, PROMPT_PREFIX_TTL_SECONDS)
+    prompt_budget.attach(extract_claims_fact_check_agent)
+    prompt_budget.attach(evidence_search_fact_check_agent, {"claims": "Claims"} if PROMPT_SCOPING else None)
+    prompt_budget.attach(claim_analysis_fact_check_agent, {
+        "claims": "Initial Analysis (`claims_analysis`)",
+        "google_search_results": "Research Findings (`google_search_results`)",
+    } if PROMPT_SCOPING else None)
+
+    # --- Model Cascade ---
+    extraction_agent = extract_claims_fact_check_agent
+    if EXTRACTION_FALLBACK_MODEL:
+        extraction_agent = ModelCascadeAgent(
+            name="ClaimExtractionCascade",
+            description="Extracts claims with the primary model and escalates to the fallback model on schema failures.",
+            tiers=[extract_claims_fact_check_agent,
+                   fallback_tier(extract_claims_fact_check_agent,
+                                 build_model(EXTRACTION_FALLBACK_MODEL, provider_limiters, json_mode=STRUCTURED_OUTPUT))],
+            output_key="claims",
+            escalation_check=extraction_escalation_reason,
+            min_confidence=CASCADE_MIN_CONFIDENCE,
+        )
+
+    judge_agent = claim_analysis_fact_check_agent
+    if JUDGE_FALLBACK_MODEL:
+        judge_agent = ModelCascadeAgent(
+            name="ClaimAnalysisCascade",
+            description="Judges claims with the primary model and escalates on invalid, incomplete or low-confidence verdicts.",
+            tiers=[claim_analysis_fact_check_agent,
+                   fallback_tier(claim_analysis_fact_check_agent,
+                                 build_model(JUDGE_FALLBACK_MODEL, provider_limiters, json_mode=STRUCTURED_OUTPUT))],
+            output_key="final_results",
+            escalation_check=verdict_escalation_reason,
+            min_confidence=CASCADE_MIN_CONFIDENCE,
+        )
+
+    # --- Judge Micro-Batching ---
+    if JUDGE_BATCH_MAX_TOKENS > 0:
+        judge_stage = MicroBatchedJudgeAgent(
+            name="MicroBatchedJudgeAgent",
+            description="Judges claims in concurrent token-budgeted batches and merges the verdicts in order.",
+            judge_agent=judge_agent,
+            max_batch_tokens=JUDGE_BATCH_MAX_TOKENS,
+            max_concurrency=JUDGE_BATCH_CONCURRENCY,
+        )
+    else:
+        judge_stage = judge_agent
+
+    # --- Claim Extraction Cache ---
+    claim_cache = None
+    if CLAIM_CACHE_PATH:
+        claim_cache = ClaimExtractionCache(CLAIM_CACHE_PATH, CLAIM_CACHE_MAX_BYTES)
+        claim_cache.attach(extraction_agent, model_agent=extract_claims_fact_check_agent)
+
+    # --- Pipeline Definition ---
+    if CLAIM_EXTRACTION_MODE == "chunked":
+        extraction_stage = ChunkedClaimExtractionAgent(
+            name="ChunkedClaimExtractionAgent",
+            description="Extracts claims from overlapping windows of the transcript concurrently and merges them.",
+            extraction_agent=extraction_agent,
+            max_chars=CLAIM_CHUNK_MAX_CHARS,
+            overlap_sentences=CLAIM_CHUNK_OVERLAP_SENTENCES,
+            max_concurrency=CLAIM_CHUNK_CONCURRENCY,
+        )
+    else:
+        extraction_stage = extraction_agent
+
+    if CLAIM_PREFILTER:
+        extraction_stage = PrefilteredExtractionAgent(
+            name="PrefilteredExtractionAgent",
+            description="Scores sentences locally and sends only check-worthy ones to claim extraction.",
+            extraction_stage=extraction_stage,
+            threshold=CLAIM_PREFILTER_THRESHOLD,
+        )
+
+    if EVIDENCE_SEARCH_MODE == "fanout":
+        evidence_stage = [ParallelEvidenceSearchAgent(
+            name="ParallelEvidenceSearchAgent",
+            description="Runs the evidence search once per claim, concurrently, and merges the results.",
+            search_agent=evidence_search_fact_check_agent,
+            max_concurrency=EVIDENCE_SEARCH_CONCURRENCY,
+        )]
+    elif EVIDENCE_SEARCH_MODE == "single":
+        evidence_stage = [evidence_search_fact_check_agent]
+    else:
+        evidence_stage = []
+
+    # --- Schema Validation and Repair ---
+    # Wrapped before dedup and checkpoints attach, so skipped or resumed stages bypass repair and only
+    # repaired output is checkpointed. Micro-batching already re-requests unjudged claims on its own.
+    if SCHEMA_REPAIR:
+        extraction_stage = SchemaRepairAgent(
+            name="ClaimExtractionRepair",
+            description="Validates extracted claims, salvaging truncated output and re-requesting unusable output once.",
+            stage_agent=extraction_stage,
+            output_key="claims",
+        )
+        evidence_stage = [SchemaRepairAgent(
+            name="EvidenceSearchRepair",
+            description="Validates evidence packages and re-searches only the claims left without a valid one.",
+            stage_agent=stage_agent,
+            output_key=stage_agent.output_key,
+            repair_agent=evidence_search_fact_check_agent,
+        ) for stage_agent in evidence_stage]
+        if JUDGE_BATCH_MAX_TOKENS <= 0:
+            judge_stage = SchemaRepairAgent(
+                name="ClaimAnalysisRepair",
+                description="Validates verdicts and re-judges only the claims left without a valid one.",
+                stage_agent=judge_stage,
+                output_key="final_results",
+                repair_agent=judge_agent,
+            )
+
+    # --- Cross-Document Claim Deduplication ---
+    # Claims the caller already has verdicts for (a live transcript's context) are dropped before any reuse lookup
+    reuse_stage = [KnownClaimsFilterAgent(
+        name="KnownClaimsFilterAgent",
+        description="Drops claims the caller already has verdicts for and forwards only the rest.",
+    )]
+    claim_dedup_index = None
+    if CLAIM_DEDUP_PATH:
+        claim_dedup_index = ClaimDedupIndex(CLAIM_DEDUP_PATH, CLAIM_DEDUP_THRESHOLD, CLAIM_DEDUP_FRESHNESS_DAYS)
+        reuse_stage.append(ClaimReuseAgent(
+            name="ClaimReuseAgent",
+            description="Reuses recent verdicts for near-duplicate claims and forwards only novel claims.",
+            index=claim_dedup_index,
+        ))
+    for stage_agent in evidence_stage:
+        add_callback(stage_agent, "before_agent_callback",
+                     skip_when_no_pending_claims(stage_agent.output_key, {}))
+    add_callback(judge_stage, "before_agent_callback",
+                 skip_when_no_pending_claims("final_results", {"fact_check_results": []}))
+
+    # --- Stage Checkpoints ---
+    checkpoint_store = None
+    if CHECKPOINT_PATH:
+        checkpoint_store = StageCheckpointStore(CHECKPOINT_PATH, CHECKPOINT_MAX_AGE_DAYS * 86400)
+        for stage_agent in [extraction_stage, *evidence_stage, judge_stage]:
+            checkpoint_store.attach(stage_agent)
+
+    agent = SequentialAgent(
+        name="FactCheckingPipeline",
+        sub_agents=[
+            extraction_stage,
+            *reuse_stage,
+            *evidence_stage,
+            judge_stage
+        ],
+        description="A 3-step pipeline of fact-checking agents that extracts claims, gathers evidence, and analyzes the findings."
+    )
 
-    session = await session_service.create_session(app_name=APP_NAME_FACTCHECK, user_id=user_id, session_id=session_id)
-    print(f"FactCheck session created/retrieved with ID: {session_id}")
+    # --- Instrumentation ---
+    instrumented_agents = []
+    for candidate in [
+        extract_claims_fact_check_agent, evidence_search_fact_check_agent, claim_analysis_fact_check_agent,
+        extraction_agent, extraction_stage, *reuse_stage, *evidence_stage, judge_agent, judge_stage,
+        *(getattr(stage_agent, "stage_agent", stage_agent) for stage_agent in [extraction_stage, *evidence_stage, judge_stage]),
+        *(tier for cascade_stage in (extraction_agent, judge_agent) for tier in getattr(cascade_stage, "tiers", [])[1:]),
+    ]:
+        # Wrappers may be the same object as the agent they wrap when a feature is off
+        if all(candidate is not seen for seen in instrumented_agents):
+            instrumented_agents.append(candidate)
+    for instrumented_agent in instrumented_agents:
+        instrument_agent(instrumented_agent)
+    metrics_exporter = MetricsExporter(METRICS_LOG_PATH or None, METRICS_PROM_PATH or None,
+                                       extra_prometheus=[lambda: rate_limiter_prometheus_text(provider_limiters)])
+
+    # --- Runner ---
+    if SESSION_BACKEND == "memory":
+        session_service = InMemorySessionService()
+    elif SESSION_BACKEND == "lean":
+        session_service = LeanSessionService(db_path=SESSION_RESULTS_DB_PATH, retention_days=SESSION_RETENTION_DAYS)
+    else:
+        # Example using a local SQLite file:
+        if os.path.exists(SESSION_DB_PATH):
+            pruned = prune_database_sessions(SESSION_DB_PATH, SESSION_RETENTION_DAYS)
+            if pruned:
+                print(f"🧹 Pruned {pruned} sessions older than {SESSION_RETENTION_DAYS:g} days from {SESSION_DB_PATH}")
+        session_service = database_session_service(SESSION_DB_PATH)
 
     try:
-        content = Content(role='user', parts=[Part(text=political_text)])
-        print("Running fact-checking pipeline...")
-        start_run_time = time.time()
-        final_event = None
-        async for event in factcheck_runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
-            print(f"  ...Event from: {event.author}")
-            if event.is_final_response():
-                final_event = event
-        end_run_time = time.time()
-        print(f"Fact-checking pipeline run complete in {end_run_time - start_run_time:.2f} seconds.")
-
-        print("\n--- Final Fact-Checking Results ---")
-        if final_event and final_event.content and final_event.content.parts:
-            final_output_text = final_event.content.parts[0].text
-            print(f"Raw Output (FactChecker):\n{final_output_text}")
-            final_json = clean_and_parse_json(final_output_text)
-            if final_json and 'fact_check_results' in final_json:
-                # Add original text to the final JSON
-                final_json['original_text'] = political_text
-
-                # Write the output to a file
-                output_filename = "fact_check_results.json"
-                with open(output_filename, "w") as f:
-                    json.dump(final_json, f, indent=2)
-                print(f"\n✅ Results saved to {output_filename}")
-
-                print("\n--- Parsed Fact-Check Status ---")
-                results = final_json['fact_check_results']
-                if isinstance(results, list):
-                    # Resolve redirect URLs before printing
-                    async def resolve_url(client: httpx.AsyncClient, url: str) -> str:
-                        """Resolves a redirect URL if it's a vertexai search link."""
-                        if "vertexaisearch.cloud.google.com" not in url:
-                            return url
-                        try:
-                            resp = await client.head(url, follow_redirects=True, timeout=10)
-                            return str(resp.url)
-                        except httpx.RequestError as e:
-                            print(f"\n(Warning: Could not resolve URL {url}: {e})")
-                            return url
-
-                    async with httpx.AsyncClient() as client:
-                        update_tasks = []
-                        for item in results:
-                            if isinstance(item, dict) and 'sources' in item:
-                                sources = item.get('sources', [])
-                                if isinstance(sources, list):
-                                    resolve_tasks = [resolve_url(client, url) for url in sources]
-                                    async def update_item_sources(item_to_update, tasks_to_await):
-                                        item_to_update['sources'] = await asyncio.gather(*tasks_to_await)
-                                    update_tasks.append(update_item_sources(item, resolve_tasks))
-                        await asyncio.gather(*update_tasks)
-
-                    if not results:
-                        print("(No verifiable claims were extracted from the input text)")
-                    for item in results:
+        factcheck_runner = Runner(
+            agent=agent,
+            app_name=APP_NAME_FACTCHECK,
+            session_service=session_service
+        )
+        print("✅ FactCheck Runner initialized successfully.")
+    except Exception as e:
+        print(f"❌ Error initializing FactCheck Runner: {e}")
+        traceback.print_exc()
+        raise
+
+    url_resolver = UrlResolver(
+        cache_path=URL_CACHE_PATH or None,
+        ttl_seconds=URL_CACHE_TTL_SECONDS,
+        per_host_limit=URL_RESOLVE_PER_HOST_LIMIT,
+        resolve_hosts=URL_RESOLVE_HOSTS,
+    )
+
+    return FactCheckPipeline(
+        runner=factcheck_runner,
+        session_service=session_service,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE if PIPELINE_STREAMING else StreamingMode.NONE),
+        # Authors whose streamed output carries claims / verdicts
+        extraction_authors={tier.name for tier in getattr(extraction_agent, "tiers", [extraction_agent])},
+        judge_authors={judge_stage.name, *(tier.name for tier in getattr(judge_agent, "tiers", [judge_agent]))},
+        claim_cache=claim_cache,
+        claim_dedup_index=claim_dedup_index,
+        checkpoint_store=checkpoint_store,
+        metrics_exporter=metrics_exporter,
+        url_resolver=url_resolver,
+        provider_limiters=provider_limiters,
+        results_store=ResultsStore(RESULTS_STORE_PATH) if RESULTS_STORE_PATH else None,
+        evidence_index=evidence_index,
+        prompt_budget=prompt_budget,
+    )
+
+
+_pipeline: FactCheckPipeline | None = None
+
+def get_pipeline() -> FactCheckPipeline:
+    """Returns the process-wide pipeline, building it on first use."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = build_pipeline()
+    return _pipeline
+
+
+async def resolve_sources_timed(sources: list, run_metrics: RunMetrics) -> list:
+    """Resolves source URLs through the shared resolver, timing each lookup."""
+    url_resolver = get_pipeline().url_resolver
+
+    async def timed_resolve(url):
+        start = time.perf_counter()
+        resolved = await url_resolver.resolve(url)
+        run_metrics.record_url_resolution(time.perf_counter() - start)
+        return resolved
+    return list(await asyncio.gather(*(timed_resolve(url) for url in sources)))
+
+async def stream_fact_check(political_text: str, user_id: str, session_id: str, rerun_stages: tuple[str, ...] = (),
+                            document_id: str | None = None, verbose: bool = False,
+                            known_claims: Iterable[str] = ()) -> AsyncIterator[dict]:
+    """Runs the fact-checking pipeline, yielding each verdict (with resolved sources) as soon as it is known.
+
+    Yields {"type": "verdict", "result", "revised", "elapsed_seconds"} events, then one
+    {"type": "done", "results", "failed_claims", "elapsed_seconds"} event whose results are the parsed
+    run output (None on failure) and whose failed_claims lists the claims left with a placeholder
+    evidence package or verdict. With PIPELINE_STREAMING=on verdicts arrive while the judge is still
+    writing; otherwise each one is delivered as soon as its own sources resolve. A verdict that a later stage
+    replaces (e.g. a cascade escalation) is yielded again with "revised": true. Extracted claims whose
+    normalized text is in `known_claims` are dropped before the evidence search.
+    """
+    from claim_dedup import KNOWN_CLAIMS_STATE_KEY
+
+    log = print if verbose else (lambda *args, **kwargs: None)
+    pipeline = get_pipeline()
+    log(f"\n>>> Starting Fact-Checking Pipeline for Text:")
+    log(f"'''\n{political_text[:500].strip()}...\n'''")
+    log(f">>> User: {user_id}, Session: {session_id}")
+
+    await pipeline.session_service.create_session(app_name=APP_NAME_FACTCHECK, user_id=user_id,
+                                                  session_id=session_id, state={RERUN_STATE_KEY: list(rerun_stages),
+                                                                                KNOWN_CLAIMS_STATE_KEY: list(known_claims)})
+    log(f"FactCheck session created/retrieved with ID: {session_id}")
+
+    run_metrics = RunMetrics(session_id)
+    events: asyncio.Queue = asyncio.Queue()
+    # Verdicts handed out so far, keyed by claim text: (verdict as parsed, task resolving its sources)
+    published: dict[str, tuple[dict, asyncio.Task]] = {}
+
+    def publish(item: dict) -> asyncio.Task:
+        """Starts resolving a verdict's sources and queues it for the caller once they resolve; returns that task."""
+        key = item.get('claim') or json.dumps(item, sort_keys=True, ensure_ascii=False)
+        previous = published.get(key)
+        if previous and previous[0] == item:
+            return previous[1]
+        snapshot = json.loads(json.dumps(item))
+
+        async def resolve_and_queue() -> dict:
+            resolved = dict(snapshot)
+            if isinstance(resolved.get('sources'), list):
+                resolved['sources'] = await resolve_sources_timed(resolved['sources'], run_metrics)
+            events.put_nowait(("verdict", resolved, previous is not None))
+            return resolved
+
+        task = asyncio.create_task(resolve_and_queue())
+        published[key] = (snapshot, task)
+        return task
+
+    async def run_pipeline() -> None:
+        # Set inside the task so the runner, its sub-runs and the source resolutions all record into this run
+        current_run_metrics.set(run_metrics)
+        final_json = None
+        try:
+            content = Content(role='user', parts=[Part(text=political_text)])
+            claims_parser = IncrementalArrayParser("verifiable_claims")
+            verdicts_parser = IncrementalArrayParser("fact_check_results")
+            log("Running fact-checking pipeline...")
+            start_run_time = time.time()
+            final_event = None
+            state_updates = {}
+            async for event in pipeline.runner.run_async(user_id=user_id, session_id=session_id,
+                                                         new_message=content, run_config=pipeline.run_config):
+                run_metrics.observe_event(event.author)
+                if event.partial:
+                    delta = event.content.parts[0].text if event.content and event.content.parts else None
+                    if delta and event.author in pipeline.extraction_authors:
+                        for claim in claims_parser.feed(delta):
+                            if isinstance(claim, dict):
+                                log(f"  ...Claim extracted: \"{claim.get('contextualized_claim', 'N/A')}\"")
+                    elif delta and event.author in pipeline.judge_authors:
+                        for item in verdicts_parser.feed(delta):
+                            if isinstance(item, dict):
+                                publish(item)
+                                log(f"  ...Verdict streamed: [{item.get('status', 'N/A')}] \"{item.get('claim', 'N/A')}\"")
+                    continue
+                log(f"  ...Event from: {event.author}")
+                if event.actions and event.actions.state_delta:
+                    state_updates.update(event.actions.state_delta)
+                    # Verdicts reused from earlier documents are final as soon as the reuse stage emits them
+                    for item in event.actions.state_delta.get('reused_results') or []:
                         if isinstance(item, dict):
-                            claim = item.get('claim', 'N/A')
-                            status = item.get('status', 'N/A')
-                            reasoning = item.get('reasoning', '')
-                            sources = item.get('sources', [])
-                            search_query = item.get('search_query', 'N/A')
-                            print(f"- Claim: \"{claim}\"")
-                            print(f"  Status: {status}")
-                            if reasoning:
-                                print(f"  Reasoning: {reasoning}")
-                            print(f"  Search Query: \"{search_query}\"")
-                            if sources:
-                                print("  Sources:")
-                                for source in sources:
-                                    print(f"    - {source}")
-                        else:
-                            print(f"  (Error: Result item expected dictionary, got {type(item)})")
-                else:
-                    print("(Error: 'fact_check_results' key found, but value is not a list)")
-            elif final_json:
-                print("(Error: Parsed JSON, but missing 'fact_check_results' key)")
-        elif final_event and final_event.error_message:
-             print(f"❌ Pipeline ended with error: {final_event.error_message}")
+                            publish(item)
+                if event.is_final_response():
+                    final_event = event
+            end_run_time = time.time()
+            log(f"Fact-checking pipeline run complete in {end_run_time - start_run_time:.2f} seconds.")
+
+            log("\n--- Final Fact-Checking Results ---")
+            if final_event and final_event.content and final_event.content.parts:
+                final_output_text = final_event.content.parts[0].text
+                log(f"Raw Output (FactChecker):\n{final_output_text}")
+                parsed = clean_and_parse_json(final_output_text)
+                if parsed and 'fact_check_results' in parsed:
+                    judged_results = parsed['fact_check_results']
+                    reused_results = state_updates.get('reused_results')
+                    if reused_results and isinstance(judged_results, list):
+                        parsed['fact_check_results'] = judged_results + reused_results
+                    if 'prefilter_stats' in state_updates:
+                        parsed['prefilter_stats'] = state_updates['prefilter_stats']
+                    # Add original text to the final JSON
+                    parsed['original_text'] = political_text
+
+                    results = parsed['fact_check_results']
+                    if isinstance(results, list):
+                        # Verdicts already published while streaming reuse their resolution; the rest start now
+                        resolved = iter(await asyncio.gather(*(publish(item) for item in results if isinstance(item, dict))))
+                        results[:] = [next(resolved) if isinstance(item, dict) else item for item in results]
+
+                        freshly_judged = 'final_results' not in state_updates.get(HITS_STATE_KEY, [])
+                        # Placeholders stand in for claims whose evidence or verdict could not be produced:
+                        # they are reported as failed and never indexed or stored as final verdicts
+                        verdicts = [item for item in results if isinstance(item, dict) and not has_placeholder(item)]
+                        parsed['failed_claims'] = [item.get('claim') for item in results
+                                                   if isinstance(item, dict) and has_placeholder(item)]
+                        if parsed['failed_claims']:
+                            print(f"(Warning: {len(parsed['failed_claims'])} claims got no usable evidence or verdict)")
+                        # Index freshly judged claims so later documents can reuse their verdicts
+                        if pipeline.claim_dedup_index and freshly_judged:
+                            for item in verdicts:
+                                if item.get('claim') and 'reused_from_claim_id' not in item:
+                                    pipeline.claim_dedup_index.add(item['claim'], item, document_hash(political_text))
+                        # Verdicts served from a checkpoint were already recorded by the run that produced them
+                        if pipeline.results_store and freshly_judged and verdicts:
+                            stored = pipeline.results_store.append(
+                                document_id or session_id, document_hash(political_text), political_text, verdicts,
+                                extra={'session_id': session_id, 'prefilter_stats': parsed.get('prefilter_stats')},
+                            )
+                            log(f"\n✅ {stored} verdicts appended to the results store")
+                        final_json = parsed
+                    else:
+                        print("(Error: 'fact_check_results' key found, but value is not a list)")
+                elif parsed:
+                    print("(Error: Parsed JSON, but missing 'fact_check_results' key)")
+                if final_json is None and pipeline.checkpoint_store:
+                    print("(Re-running this text resumes from the last checkpointed stage)")
+            elif final_event and final_event.error_message:
+                 print(f"❌ Pipeline ended with error: {final_event.error_message}")
+            else:
+                print("❌ Final FactCheck Output: (No final event captured or content missing)")
+
+        except Exception as e:
+            print(f"❌ An error occurred during the fact-checking pipeline execution: {e}")
+            traceback.print_exc()
+        finally:
+            events.put_nowait(("done", final_json, False))
+
+    runner_task = asyncio.create_task(run_pipeline())
+    try:
+        while True:
+            kind, payload, revised = await events.get()
+            elapsed = round(time.perf_counter() - run_metrics.started_at, 4)
+            if kind == "done":
+                yield {"type": "done", "results": payload,
+                       "failed_claims": payload.get('failed_claims', []) if payload else None,
+                       "elapsed_seconds": elapsed}
+                return
+            run_metrics.record_verdict()
+            yield {"type": "verdict", "result": payload, "revised": revised, "elapsed_seconds": elapsed}
+    finally:
+        # Also reached when the caller stops early (e.g. a client disconnects): don't leave the run behind
+        pending = [task for _, task in published.values() if not task.done()]
+        if not runner_task.done():
+            pending.append(runner_task)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        run_metrics.finish()
+        metrics_summary = run_metrics.summary()
+        pipeline.metrics_exporter.export(metrics_summary)
+        log("\n--- Stage Metrics ---")
+        log(format_summary_table(metrics_summary))
+        if SESSION_BACKEND == "lean":
+            await pipeline.session_service.finalize_session(app_name=APP_NAME_FACTCHECK, user_id=user_id,
+                                                            session_id=session_id)
+        elif SESSION_BACKEND == "memory":
+            # Nothing reads an in-memory session after its run, and long-lived callers (serve, live) would keep them all
+            await pipeline.session_service.delete_session(app_name=APP_NAME_FACTCHECK, user_id=user_id,
+                                                          session_id=session_id)
+
+
+async def call_fact_check_pipeline(political_text: str, user_id: str, session_id: str,
+                                   output_filename: str | None = None, verbose: bool = True,
+                                   rerun_stages: tuple[str, ...] = (), document_id: str | None = None) -> dict | None:
+    """Runs the fact-checking pipeline and returns the parsed results (or None); `rerun_stages` bypasses checkpoints.
+
+    Verdicts are appended to the results store under `document_id` (the session id if not given);
+    `output_filename` additionally writes this run's results as a standalone JSON file. Use
+    `stream_fact_check` to receive verdicts as they become available instead.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    final_json = None
+    async for event in stream_fact_check(political_text, user_id, session_id, rerun_stages, document_id, verbose):
+        if event["type"] == "done":
+            final_json = event["results"]
+    if final_json is None:
+        return None
+
+    # Write this run's output to a file as well, if asked
+    if output_filename:
+        with open(output_filename, "w") as f:
+            json.dump(final_json, f, indent=2)
+        log(f"✅ Results saved to {output_filename}")
+
+    log("\n--- Parsed Fact-Check Status ---")
+    results = final_json['fact_check_results']
+    if not results:
+        log("(No verifiable claims were extracted from the input text)")
+    for item in results:
+        if isinstance(item, dict):
+            claim = item.get('claim', 'N/A')
+            status = item.get('status', 'N/A')
+            reasoning = item.get('reasoning', '')
+            sources = item.get('sources', [])
+            search_query = item.get('search_query', 'N/A')
+            log(f"- Claim: \"{claim}\"")
+            log(f"  Status: {status}")
+            if reasoning:
+                log(f"  Reasoning: {reasoning}")
+            log(f"  Search Query: \"{search_query}\"")
+            if sources:
+                log("  Sources:")
+                for source in sources:
+                    log(f"    - {source}")
         else:
-            print("❌ Final FactCheck Output: (No final event captured or content missing)")
+            print(f"  (Error: Result item expected dictionary, got {type(item)})")
+    return final_json
 
-    except Exception as e:
-        print(f"❌ An error occurred during the fact-checking pipeline execution: {e}")
-        traceback.print_exc()
+async def shutdown_services():
+    """Flushes and closes the long-lived services; call once before the event loop exits."""
+    if _pipeline is None:
+        return
+    await _pipeline.url_resolver.aclose()
+    if SESSION_BACKEND == "lean":
+        await _pipeline.session_service.aclose()
 
 async def main(political_text_to_check):
     """Runs an example for the fact-checking pipeline."""
@@ -404,6 +942,19 @@ async def main(political_text_to_check):
     factcheck_session_id = f"factcheck_run_{time.time()}_{time.monotonic_ns()}"
 
     await call_fact_check_pipeline(political_text_to_check, user_id, factcheck_session_id)
+    await shutdown_services()
+    stats = get_pipeline().stats()
+    if stats["claim_cache"]:
+        print(f"\nClaim cache stats: {stats['claim_cache']}")
+    if stats["checkpoints"]:
+        print(f"Checkpoint stats: {stats['checkpoints']}")
+    for provider, limiter_stats in stats["rate_limiters"].items():
+        print(f"Rate limiter [{provider}]: {limiter_stats}")
+    print(f"URL resolver stats: {stats['url_resolver']}")
+    if stats["results_store"]:
+        print(f"Results store ({RESULTS_STORE_PATH}): {stats['results_store']}")
+    for stage, prompt_stats in stats["prompt_budget"].items():
+        print(f"Prompt budget [{stage}]: {prompt_stats}")
 
 if __name__ == "__main__":
     political_text_to_check = """
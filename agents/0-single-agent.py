@@ -1,59 +1,66 @@
+import argparse
 import asyncio
 import time
 import os
 import sys
 
 from dotenv import load_dotenv
-from google.adk.agents import Agent
-from google.adk.cli.utils import logs
-from google.adk.runners import InMemoryRunner
-from google.adk.sessions import Session
-from google.genai import types
 
  
 
 # # --- CONFIGURATION ---
 load_dotenv(override=True)
-logs.log_to_tmp_folder()
 
 FILE_PATH = os.environ.get("FILE_PATH")
 # GUIDE_FILE_PATH = os.environ.get("GUIDE_FILE_PATH")
 # OUTPUT_FILE_PATH = os.environ.get("OUTPUT_FILE_PATH")
 # STATE_ANALYZED_JSON = "analyzed_json"
-TEXT = "question_payload"
+APP_NAME = 'certification_analyzer_agent'
 
-try:
-  with open(FILE_PATH, 'r') as f:
-    TEXT = f.read()
 
-except FileNotFoundError as e:
-  print(f"** ERROR: Could not find a required file. Please check your paths in the CONFIGURATION section.", file=sys.stderr)
-  print(f"** Details: {e}", file=sys.stderr)
-  sys.exit(1)
+def read_text(file_path: str | None) -> str:
+  try:
+    with open(file_path, 'r') as f:
+      return f.read()
+
+  except (FileNotFoundError, TypeError) as e:
+    print(f"** ERROR: Could not find a required file. Pass --file or set FILE_PATH in the environment.", file=sys.stderr)
+    print(f"** Details: {e}", file=sys.stderr)
+    sys.exit(1)
 
 
 # # --- END CONFIGURATION ---
 
-root_agent = Agent(
-    name='certification_analyzer_agent',
-    
-    model="gemini-2.0-flash",
-    description=(
-        'An agent that analyzes cloud certification questions against an exam'
-        ' guide to produce structured JSON study materials.'
-    ),
-    instruction=f"""
+def build_root_agent(text: str):
+  # ADK is imported here so `--help` and argument errors don't pay for it
+  from google.adk.agents import Agent
+
+  return Agent(
+      name=APP_NAME,
+      
+      model="gemini-2.0-flash",
+      description=(
+          'An agent that analyzes cloud certification questions against an exam'
+          ' guide to produce structured JSON study materials.'
+      ),
+      instruction=f"""
 break down the input text into its core statements or semantic chunks.
-{TEXT}
+{text}
 """,
-    output_key='out'
-)
+      output_key='out'
+  )
+
+async def main(file_path: str | None = FILE_PATH):
+  from google.adk.cli.utils import logs
+  from google.adk.runners import InMemoryRunner
+  from google.genai import types
 
-async def main():
-  my_app = 'certification_analyzer_agent'
+  logs.log_to_tmp_folder()
+  text = read_text(file_path)
+  my_app = APP_NAME
   my_user_id = 'user1'
   runner = InMemoryRunner(
-      agent=root_agent,
+      agent=build_root_agent(text),
       app_name=my_app,
   )
 
@@ -89,7 +96,7 @@ async def main():
   print('------------------------------------')
  
   await run_analysis(
-      TEXT
+      text
   )
 
   # print(
@@ -106,4 +113,7 @@ async def main():
 
 
 if __name__ == '__main__':
-  asyncio.run(main())
+  parser = argparse.ArgumentParser(description="Break a text file into its core statements with a single agent.")
+  parser.add_argument("--file", default=FILE_PATH, help="Text file to analyze (defaults to $FILE_PATH).")
+  args = parser.parse_args()
+  asyncio.run(main(args.file))
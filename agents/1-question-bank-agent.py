@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Iterator
+
+from dotenv import load_dotenv
+
+from guide_index import GuideIndex
+
+
+
+# # --- CONFIGURATION ---
+load_dotenv(override=True)
+
+FILE_PATH = os.environ.get("FILE_PATH")
+GUIDE_FILE_PATH = os.environ.get("GUIDE_FILE_PATH")
+OUTPUT_FILE_PATH = os.environ.get("OUTPUT_FILE_PATH", "question_bank_results.jsonl")
+QUESTION_CONCURRENCY = int(os.environ.get("QUESTION_CONCURRENCY", "8"))
+GUIDE_TOP_K = int(os.environ.get("GUIDE_TOP_K", "3"))
+GUIDE_MAX_CHARS = int(os.environ.get("GUIDE_MAX_CHARS", "3000"))
+STATE_GUIDE_SECTIONS = "guide_sections"
+STATE_ANALYZED_JSON = "analyzed_json"
+APP_NAME = 'question_bank_analyzer_agent'
+USER_ID = 'user1'
+
+# # --- END CONFIGURATION ---
+
+
+def iter_questions(file_path: str) -> Iterator[dict]:
+  """Yields {'id', 'question'} from a JSONL file, or from a text file with questions separated by '---' lines."""
+  with open(file_path, 'r', encoding='utf-8') as f:
+    if file_path.endswith('.jsonl'):
+      for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+          continue
+        try:
+          record = json.loads(line)
+        except json.JSONDecodeError as e:
+          print(f"** WARNING: Skipping malformed line {line_number} of {file_path}: {e}", file=sys.stderr)
+          continue
+        if not isinstance(record, dict):
+          print(f"** WARNING: Skipping line {line_number} of {file_path}: not a JSON object", file=sys.stderr)
+          continue
+        question = record.get('question') or record.get('text')
+        if question:
+          yield {'id': str(record.get('id', line_number)), 'question': question}
+      return
+    block, number = [], 0
+    for line in f:
+      if line.strip() == '---':
+        if ''.join(block).strip():
+          number += 1
+          yield {'id': str(number), 'question': ''.join(block).strip()}
+        block = []
+      else:
+        block.append(line)
+    if ''.join(block).strip():
+      yield {'id': str(number + 1), 'question': ''.join(block).strip()}
+
+
+def build_root_agent():
+  from google.adk.agents import Agent
+
+  # The question arrives as the user message and the guide sections through session state,
+  # so the instruction stays the same size however large the bank or the guide is.
+  return Agent(
+      name=APP_NAME,
+      model="gemini-2.0-flash",
+      description=(
+          'An agent that analyzes cloud certification questions against an exam'
+          ' guide to produce structured JSON study materials.'
+      ),
+      instruction=f"""
+You analyze one cloud certification exam question using the exam guide sections below.
+
+Relevant exam guide sections:
+{{{STATE_GUIDE_SECTIONS}}}
+
+Return only a JSON object with these keys:
+- "core_statements": the question broken down into its core statements or semantic chunks
+- "guide_sections": titles of the guide sections the question tests
+- "concepts": the key concepts a candidate must know to answer it
+- "study_notes": a short explanation tying the question to those sections
+""",
+      output_key=STATE_ANALYZED_JSON
+  )
+
+
+async def main(file_path: str, guide_path: str, output_path: str, concurrency: int):
+  from google.adk.cli.utils import logs
+  from google.adk.runners import InMemoryRunner
+  from google.genai import types
+
+  logs.log_to_tmp_folder()
+  index = GuideIndex.load_or_build(guide_path)
+  print(f"📚 Exam guide indexed into {len(index.sections)} sections")
+  runner = InMemoryRunner(
+      agent=build_root_agent(),
+      app_name=APP_NAME,
+  )
+
+  async def run_analysis(question: dict) -> dict:
+    my_session = await runner.session_service.create_session(
+        app_name=APP_NAME,
+        user_id=USER_ID,
+        state={
+           STATE_GUIDE_SECTIONS: index.relevant_sections(question['question'], GUIDE_TOP_K, GUIDE_MAX_CHARS)
+        }
+    )
+    content = types.Content(role='user', parts=[types.Part(text=question['question'])])
+    response_text = None
+    try:
+      async for event in runner.run_async(
+          user_id=USER_ID,
+          session_id=my_session.id,
+          new_message=content,
+      ):
+        if event.is_final_response() and event.content and event.content.parts:
+          response_text = event.content.parts[0].text
+    finally:
+      # Failed questions must not leave their session behind in a long bank run
+      await runner.session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=my_session.id)
+    return {'id': question['id'], 'question': question['question'], 'analysis': response_text}
+
+  queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+  counts = {'ok': 0, 'failed': 0}
+
+  start_time = time.time()
+  print('Start time:', time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start_time)))
+  print('------------------------------------')
+
+  with open(output_path, 'w', encoding='utf-8') as out:
+
+    async def worker():
+      while True:
+        question = await queue.get()
+        if question is None:
+          return
+        try:
+          result = await run_analysis(question)
+          counts['ok'] += 1
+          print(f"  ✅ Question {question['id']} analyzed")
+        except Exception as e:
+          print(f"** ERROR: Question {question['id']} failed: {e}", file=sys.stderr)
+          result = {'id': question['id'], 'question': question['question'], 'analysis': None, 'error': str(e)}
+          counts['failed'] += 1
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    for question in iter_questions(file_path):
+      await queue.put(question)
+    for _ in workers:
+      await queue.put(None)
+    await asyncio.gather(*workers)
+
+  end_time = time.time()
+  print('------------------------------------')
+  print('End time:', time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(end_time)))
+  print('Total time (seconds):', end_time - start_time)
+  print(f"Questions: {counts['ok']} analyzed, {counts['failed']} failed -> {output_path}")
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Analyze a bank of certification questions against the exam guide.")
+  parser.add_argument("--file", default=FILE_PATH,
+                      help="Questions: JSONL with a 'question' field, or text separated by '---' lines.")
+  parser.add_argument("--guide", default=GUIDE_FILE_PATH, help="Exam guide text or markdown file.")
+  parser.add_argument("--output", default=OUTPUT_FILE_PATH, help="Output JSONL path.")
+  parser.add_argument("-c", "--concurrency", type=int, default=QUESTION_CONCURRENCY,
+                      help="Questions analyzed at once.")
+  args = parser.parse_args()
+  if not args.file or not args.guide:
+    parser.error("--file and --guide (or FILE_PATH and GUIDE_FILE_PATH) are required")
+  asyncio.run(main(args.file, args.guide, args.output, max(1, args.concurrency)))
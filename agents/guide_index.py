@@ -0,0 +1,114 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+HEADING_PATTERN = re.compile(r"^(#{1,6}\s+.+|Section\s+\d+[.:].*|\d+(\.\d+)*\s+[A-Z].{2,80})$")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to what which with you your".split())
+
+
+def tokenize(text: str) -> list[str]:
+  return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def split_sections(guide_text: str, max_chars: int = 1500) -> list[dict]:
+  """Splits the guide on headings, then splits long sections on paragraphs so each stays under max_chars."""
+  sections, title, lines = [], "Introduction", []
+
+  def flush():
+    body = "\n".join(lines).strip()
+    if not body:
+      return
+    chunk = []
+    for paragraph in re.split(r"\n\s*\n", body):
+      if chunk and sum(len(p) for p in chunk) + len(paragraph) > max_chars:
+        sections.append({"title": title, "text": "\n\n".join(chunk)})
+        chunk = []
+      chunk.append(paragraph.strip())
+    if chunk:
+      sections.append({"title": title, "text": "\n\n".join(chunk)})
+
+  for line in guide_text.splitlines():
+    if HEADING_PATTERN.match(line.strip()):
+      flush()
+      title, lines = line.strip().lstrip("#").strip(), []
+    else:
+      lines.append(line)
+  flush()
+  return sections
+
+
+class GuideIndex:
+  """BM25 index over exam guide sections, precomputed once and cached next to the guide."""
+
+  def __init__(self, sections: list[dict], postings: dict, lengths: list[int], guide_hash: str):
+    self.sections = sections
+    self.postings = postings
+    self.lengths = lengths
+    self.guide_hash = guide_hash
+    self.average_length = sum(lengths) / len(lengths) if lengths else 0.0
+    self.idf = {
+        term: math.log(1 + (len(sections) - len(entries) + 0.5) / (len(entries) + 0.5))
+        for term, entries in postings.items()
+    }
+
+  @classmethod
+  def build(cls, guide_text: str) -> "GuideIndex":
+    sections = split_sections(guide_text)
+    postings: dict[str, list[list[int]]] = {}
+    lengths = []
+    for section_id, section in enumerate(sections):
+      counts = Counter(tokenize(f"{section['title']} {section['text']}"))
+      lengths.append(sum(counts.values()))
+      for term, count in counts.items():
+        postings.setdefault(term, []).append([section_id, count])
+    return cls(sections, postings, lengths, hashlib.sha256(guide_text.encode("utf-8")).hexdigest())
+
+  @classmethod
+  def load_or_build(cls, guide_path: str) -> "GuideIndex":
+    """Loads `<guide>.bm25.json` if it was built from the current guide text, else rebuilds and saves it."""
+    with open(guide_path, "r", encoding="utf-8") as f:
+      guide_text = f.read()
+    guide_hash = hashlib.sha256(guide_text.encode("utf-8")).hexdigest()
+    index_path = f"{guide_path}.bm25.json"
+    if os.path.exists(index_path):
+      with open(index_path, "r", encoding="utf-8") as f:
+        saved = json.load(f)
+      if saved.get("guide_hash") == guide_hash:
+        return cls(saved["sections"], saved["postings"], saved["lengths"], guide_hash)
+    index = cls.build(guide_text)
+    with open(index_path, "w", encoding="utf-8") as f:
+      json.dump({"guide_hash": index.guide_hash, "sections": index.sections, "postings": index.postings,
+                 "lengths": index.lengths}, f, ensure_ascii=False)
+    return index
+
+  def search(self, query: str, top_k: int = 3) -> list[tuple[float, dict]]:
+    scores: dict[int, float] = {}
+    for term in set(tokenize(query)):
+      idf = self.idf.get(term)
+      if idf is None:
+        continue
+      for section_id, count in self.postings[term]:
+        norm = K1 * (1 - B + B * self.lengths[section_id] / self.average_length)
+        scores[section_id] = scores.get(section_id, 0.0) + idf * count * (K1 + 1) / (count + norm)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [(score, self.sections[section_id]) for section_id, score in ranked]
+
+  def relevant_sections(self, query: str, top_k: int = 3, max_chars: int = 3000) -> str:
+    """The best matching sections formatted for a prompt, stopping before max_chars."""
+    parts, used = [], 0
+    for _, section in self.search(query, top_k):
+      part = f"### {section['title']}\n{section['text']}"
+      if parts and used + len(part) > max_chars:
+        break
+      parts.append(part[:max_chars])
+      used += len(part)
+    return "\n\n".join(parts) or "(No matching exam guide sections.)"
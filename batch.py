@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator
+
+from agent import call_fact_check_pipeline, get_pipeline, shutdown_services
+
+# --- Constants ---
+DEFAULT_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+BATCH_USER_ID = "political_dept_batch"
+
+
+# --- Document Loading ---
+def iter_documents(input_path: str) -> Iterator[dict]:
+    """Yields {'id', 'text'} documents from a JSONL file, a plain text file or a directory of them."""
+    path = Path(input_path)
+    if path.is_dir():
+        for child in sorted(path.iterdir()):
+            if child.suffix in (".jsonl", ".txt"):
+                yield from iter_documents(str(child))
+        return
+    if path.suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"(Warning: Skipping invalid JSON at {path}:{line_number}: {e})")
+                    continue
+                text = record.get("text") if isinstance(record, dict) else None
+                if not text:
+                    print(f"(Warning: Skipping record without 'text' at {path}:{line_number})")
+                    continue
+                yield {"id": str(record.get("id", f"{path.stem}:{line_number}")), "text": text}
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield {"id": path.stem, "text": f.read()}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+# --- Batch Runner ---
+async def fact_check_document(doc: dict, rerun_stages: tuple[str, ...] = ()) -> dict:
+    """Runs the pipeline on one {'id', 'text'} document and returns its output record."""
+    session_id = f"factcheck_batch_{doc['id']}_{time.monotonic_ns()}"
+    start_doc_time = time.perf_counter()
+    try:
+        result = await call_fact_check_pipeline(
+            doc["text"], BATCH_USER_ID, session_id, verbose=False, rerun_stages=rerun_stages,
+            document_id=doc["id"],
+        )
+    except Exception as e:
+        print(f"❌ Document {doc['id']} failed: {e}")
+        result = None
+    return {
+        "id": doc["id"],
+        "status": "ok" if result is not None else "failed",
+        "latency_seconds": round(time.perf_counter() - start_doc_time, 3),
+        "fact_check_results": result.get("fact_check_results") if result else None,
+        "prefilter_stats": result.get("prefilter_stats") if result else None,
+        "failed_claims": result.get("failed_claims") if result else None,
+    }
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+                    rerun_stages: tuple[str, ...] = ()) -> dict:
+    """Runs the fact-checking pipeline over every document with at most `concurrency` runs in flight."""
+    # Built up front so construction time stays out of the measured throughput
+    pipeline = get_pipeline()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    latencies: list[float] = []
+    counts = {"ok": 0, "failed": 0}
+
+    with open(output_path, "w", encoding="utf-8") as out:
+
+        async def worker():
+            while True:
+                doc = await queue.get()
+                if doc is None:
+                    queue.task_done()
+                    return
+                record = await fact_check_document(doc, rerun_stages)
+                latencies.append(record["latency_seconds"])
+                counts[record["status"]] += 1
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                print(f"  ...[{record['status']}] {doc['id']} in {record['latency_seconds']:.2f}s")
+                queue.task_done()
+
+        start_batch_time = time.perf_counter()
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for doc in iter_documents(input_path):
+            await queue.put(doc)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - start_batch_time
+    await shutdown_services()
+
+    total = counts["ok"] + counts["failed"]
+    return {
+        "documents": total,
+        "ok": counts["ok"],
+        "failed": counts["failed"],
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(total / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_latency_seconds": round(percentile(latencies, 50), 3),
+        "p95_latency_seconds": round(percentile(latencies, 95), 3),
+        **pipeline.stats(),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the fact-checking pipeline over a corpus of documents.")
+    parser.add_argument("input", help="JSONL file ({'id', 'text'} per line), text file, or directory of them.")
+    parser.add_argument("-o", "--output", default="fact_check_batch_results.jsonl", help="Output JSONL path.")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum number of pipelines running at once.")
+    parser.add_argument("--rerun-judge", action="store_true",
+                        help="Re-run only the judge stage, reusing checkpointed claims and evidence.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"🚀 Starting batch fact-check of '{args.input}' with concurrency {args.concurrency}...")
+    rerun_stages = ("final_results",) if args.rerun_judge else ()
+    summary = asyncio.run(run_batch(args.input, args.output, max(1, args.concurrency), rerun_stages))
+    print("\n--- Batch Summary ---")
+    print(f"Documents: {summary['documents']} (ok: {summary['ok']}, failed: {summary['failed']})")
+    print(f"Throughput: {summary['docs_per_second']:.2f} docs/sec over {summary['elapsed_seconds']:.2f}s")
+    print(f"Latency: p50 {summary['p50_latency_seconds']:.2f}s, p95 {summary['p95_latency_seconds']:.2f}s")
+    if summary["claim_cache"]:
+        print(f"Claim cache: {summary['claim_cache']}")
+    if summary["checkpoints"]:
+        print(f"Checkpoints: {summary['checkpoints']}")
+    print(f"URL resolver: {summary['url_resolver']}")
+    for provider, limiter_stats in summary["rate_limiters"].items():
+        print(f"Rate limiter [{provider}]: {limiter_stats}")
+    print(f"\n✅ Results streamed to {args.output}")
@@ -0,0 +1,111 @@
+"""Measures start-up cost: module import time and CLI latency for commands that should not load ADK.
+
+Each target runs in a fresh interpreter under `python -X importtime`, so the numbers include
+every transitive import but not interpreter start-up. The report lists the cumulative import
+time of each target, the slowest modules it imports directly, whether ADK was loaded, and the
+wall time of the CLI commands that must stay fast.
+
+    python benchmarks/bench_import.py --repeat 5 --output import_times.json
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_TARGETS = ["agent", "cli", "checkpoints", "batch"]
+CLI_COMMANDS = [["--help"], ["config"]]
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Returns (module, cumulative_us, depth) per import line, in the order Python reports them."""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            # Nested imports are indented by two more spaces per level
+            entries.append((match.group(4), int(match.group(2)), (len(match.group(3)) - 1) // 2))
+    return entries
+
+
+def target_imports(entries: list[tuple[str, int, int]], module: str) -> tuple[int, list[tuple[str, int]]]:
+    """Cumulative time of `module` and of each module it imported directly (children report before parents)."""
+    for index, (name, cumulative, depth) in enumerate(entries):
+        if name == module and depth == 0:
+            start = max((i + 1 for i in range(index) if entries[i][2] == 0), default=0)
+            children = [(child, child_cumulative) for child, child_cumulative, child_depth in entries[start:index]
+                        if child_depth == 1]
+            return cumulative, children
+    return 0, []
+
+
+def measure_import(module: str, repeat: int) -> dict:
+    """Median cumulative import time of a module in a fresh interpreter, plus its slowest direct imports."""
+    totals, children, loaded = [], [], []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   cwd=ROOT_DIR, capture_output=True, text=True)
+        if completed.returncode != 0:
+            return {"module": module, "error": completed.stderr.strip().splitlines()[-1:]}
+        entries = parse_importtime(completed.stderr)
+        total, children = target_imports(entries, module)
+        totals.append(total)
+        loaded = [name for name, _, _ in entries]
+    slowest = sorted(children, key=lambda child: child[1], reverse=True)[:10]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals) / 1000, 2),
+        "min_ms": round(min(totals) / 1000, 2),
+        "modules_loaded": len(loaded),
+        "loads_adk": any(name.startswith("google.adk") for name in loaded),
+        "slowest_imports": [{"module": name, "cumulative_ms": round(cumulative / 1000, 2)} for name, cumulative in slowest],
+    }
+
+
+def measure_cli(arguments: list[str], repeat: int) -> dict:
+    """Median wall time of a CLI invocation, including interpreter start-up."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "cli.py", *arguments], cwd=ROOT_DIR, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return {"command": " ".join(["cli.py", *arguments]), "median_ms": round(statistics.median(timings) * 1000, 2)}
+
+
+def run(repeat: int) -> dict:
+    return {
+        "imports": [measure_import(module, repeat) for module in IMPORT_TARGETS],
+        "cli": [measure_cli(arguments, repeat) for arguments in CLI_COMMANDS],
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'module':<14} {'median ms':>10} {'min ms':>8} {'modules':>8} {'ADK':>5}")
+    for row in report["imports"]:
+        if "error" in row:
+            print(f"{row['module']:<14} failed: {row['error']}")
+            continue
+        print(f"{row['module']:<14} {row['median_ms']:>10} {row['min_ms']:>8} {row['modules_loaded']:>8} "
+              f"{'yes' if row['loads_adk'] else 'no':>5}")
+    print(f"\n{'command':<20} {'median ms':>10}")
+    for row in report["cli"]:
+        print(f"{row['command']:<20} {row['median_ms']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args()
+    report = run(max(1, args.repeat))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,98 @@
+"""Compares per-run session overhead of the database, in-memory and lean session backends.
+
+Each simulated run creates a session, appends one event per pipeline stage carrying a
+realistically sized state delta, reads the session back and (for the lean backend)
+finalizes it. No model is called, so the numbers are pure session-store cost.
+
+    python benchmarks/bench_sessions.py --runs 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from session_store import LeanSessionService, database_session_service
+
+APP_NAME = "session_benchmark"
+STAGE_OUTPUTS = {
+    "claims": json.dumps({"verifiable_claims": [{"contextualized_claim": "x" * 200}] * 10, "ignored_statements": []}),
+    "google_search_results": json.dumps({f"claim {i}": {"evidence_summary": "y" * 300} for i in range(10)}),
+    "final_results": json.dumps({"fact_check_results": [{"claim": "z" * 200, "status": "Supported"}] * 10}),
+}
+
+
+async def simulate_run(service, run_index: int) -> float:
+    start = time.perf_counter()
+    user_id = f"bench_user_{run_index % 4}"
+    session = await service.create_session(app_name=APP_NAME, user_id=user_id, session_id=f"bench_{run_index}_{time.monotonic_ns()}")
+    for stage, (key, value) in enumerate(STAGE_OUTPUTS.items()):
+        event = Event(
+            author=f"stage_{stage}",
+            invocation_id=f"inv_{run_index}",
+            content=types.Content(role="model", parts=[types.Part(text=value)]),
+            actions=EventActions(state_delta={key: value}),
+        )
+        await service.append_event(session, event)
+    await service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+    if isinstance(service, LeanSessionService):
+        await service.finalize_session(app_name=APP_NAME, user_id=user_id, session_id=session.id)
+    return time.perf_counter() - start
+
+
+async def bench_backend(name: str, service, runs: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def guarded(run_index: int) -> float:
+        async with semaphore:
+            return await simulate_run(service, run_index)
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(guarded(i) for i in range(runs))))
+    if isinstance(service, LeanSessionService):
+        await service.aclose()
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": name,
+        "runs": runs,
+        "concurrency": concurrency,
+        "runs_per_second": round(runs / elapsed, 1),
+        "mean_ms_per_run": round(1000 * sum(latencies) / runs, 3),
+        "p95_ms_per_run": round(1000 * latencies[int(0.95 * (runs - 1))], 3),
+    }
+
+
+async def main(runs: int, concurrency: int, output: str | None):
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "database": database_session_service(os.path.join(tmp, "sessions.db")),
+            "memory": InMemorySessionService(),
+            "lean": LeanSessionService(db_path=os.path.join(tmp, "lean.db")),
+        }
+        results = [await bench_backend(name, service, runs, concurrency) for name, service in backends.items()]
+
+    print(f"{'backend':<10} {'runs/s':>10} {'mean ms':>10} {'p95 ms':>10}")
+    for result in results:
+        print(f"{result['backend']:<10} {result['runs_per_second']:>10} {result['mean_ms_per_run']:>10} {result['p95_ms_per_run']:>10}")
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.concurrency, args.output))
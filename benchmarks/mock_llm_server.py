@@ -0,0 +1,207 @@
+"""Local OpenAI-compatible stand-in for the pipeline's models, with configurable latency and jitter.
+
+Answers POST /v1/chat/completions (plain and streamed) with canned or recorded responses,
+picking the response by which pipeline stage's instruction appears in the request.
+
+    python benchmarks/mock_llm_server.py --port 11435 --latency-ms 200 --jitter-ms 50
+    OPENAI_API_BASE=http://127.0.0.1:11435/v1 EVIDENCE_MODEL=openai/mock python agent.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+CANNED_RESPONSES = {
+    "extraction": json.dumps({
+        "verifiable_claims": [
+            {
+                "original_statement": "logro disminuir el desempleo a la cifra histórica de 6,9%",
+                "contextualized_claim": "La Administración Chaves Robles disminuyó el desempleo en Costa Rica a 6,9%.",
+                "verification_guide": "Consultar la Encuesta Continua de Empleo del INEC.",
+            },
+            {
+                "original_statement": "presentaron más de 2500 nefastas mociones",
+                "contextualized_claim": "Los diputados presentaron más de 2500 mociones al proyecto de jornadas 4x3.",
+                "verification_guide": "Revisar el expediente legislativo en la Asamblea Legislativa.",
+            },
+        ],
+        "ignored_statements": [{"statement": "Al tico le gusta trabajar.", "reason": "Opinion"}],
+    }, ensure_ascii=False),
+    "evidence": json.dumps({
+        "La Administración Chaves Robles disminuyó el desempleo en Costa Rica a 6,9%.": {
+            "evidence_summary": "El INEC reportó una tasa de desempleo de 6,9% en el trimestre más reciente.",
+            "sources": ["https://inec.cr/empleo"],
+            "search_query": "INEC desempleo 6,9% Costa Rica",
+        },
+        "Los diputados presentaron más de 2500 mociones al proyecto de jornadas 4x3.": {
+            "evidence_summary": "El expediente registra alrededor de 2500 mociones de fondo.",
+            "sources": ["https://asamblea.go.cr/expediente"],
+            "search_query": "mociones proyecto jornadas 4x3 Asamblea Legislativa",
+        },
+    }, ensure_ascii=False),
+    "judge": json.dumps({
+        "fact_check_results": [
+            {
+                "original_statement": "logro disminuir el desempleo a la cifra histórica de 6,9%",
+                "claim": "La Administración Chaves Robles disminuyó el desempleo en Costa Rica a 6,9%.",
+                "status": "Supported",
+                "reasoning": "",
+                "evidence_summary": "El INEC reportó una tasa de desempleo de 6,9% en el trimestre más reciente.",
+                "sources": ["https://inec.cr/empleo"],
+                "search_query": "INEC desempleo 6,9% Costa Rica",
+                "confidence": 0.9,
+            },
+            {
+                "original_statement": "presentaron más de 2500 nefastas mociones",
+                "claim": "Los diputados presentaron más de 2500 mociones al proyecto de jornadas 4x3.",
+                "status": "Supported",
+                "reasoning": "",
+                "evidence_summary": "El expediente registra alrededor de 2500 mociones de fondo.",
+                "sources": ["https://asamblea.go.cr/expediente"],
+                "search_query": "mociones proyecto jornadas 4x3 Asamblea Legislativa",
+                "confidence": 0.85,
+            },
+        ]
+    }, ensure_ascii=False),
+}
+
+# Markers from each agent's instruction, checked in order.
+STAGE_MARKERS = [
+    ("judge", "Lead Fact-Check Judge"),
+    ("evidence", "AI Research Analyst"),
+    ("extraction", "Claim Identification"),
+]
+
+
+def message_text(messages: list) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(item.get("text", "") for item in content if isinstance(item, dict))
+    return "\n".join(parts)
+
+
+class MockLlmServer:
+    def __init__(self, responses: dict, latency_ms: float, jitter_ms: float, stream_chunk_chars: int = 64):
+        self.responses = responses
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stream_chunk_chars = stream_chunk_chars
+        self.requests_served = 0
+
+    def pick_response(self, prompt: str) -> str:
+        for stage, marker in STAGE_MARKERS:
+            if marker in prompt:
+                return self.responses[stage]
+        return self.responses["extraction"]
+
+    async def delay(self) -> None:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+        await asyncio.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                if method == "POST" and path.rstrip("/").endswith("/chat/completions"):
+                    await self.chat_completion(writer, json.loads(body or b"{}"))
+                elif method == "GET" and path.rstrip("/").endswith("/models"):
+                    self.write_json(writer, 200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+                else:
+                    self.write_json(writer, 404, {"error": {"message": f"Unknown route {method} {path}"}})
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def write_json(self, writer: asyncio.StreamWriter, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        reason = "OK" if status == 200 else "Not Found"
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+
+    async def chat_completion(self, writer: asyncio.StreamWriter, request: dict) -> None:
+        self.requests_served += 1
+        prompt = message_text(request.get("messages", []))
+        text = self.pick_response(prompt)
+        model = request.get("model", "mock")
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                 "total_tokens": len(prompt) // 4 + len(text) // 4}
+        await self.delay()
+        if not request.get("stream"):
+            self.write_json(writer, 200, {
+                "id": f"mock-{self.requests_served}", "object": "chat.completion", "created": int(time.time()),
+                "model": model, "usage": usage,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            })
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        pieces = [text[i:i + self.stream_chunk_chars] for i in range(0, len(text), self.stream_chunk_chars)]
+        for index, piece in enumerate(pieces):
+            last = index == len(pieces) - 1
+            chunk = {
+                "id": f"mock-{self.requests_served}", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece},
+                             "finish_reason": "stop" if last else None}],
+            }
+            if last:
+                chunk["usage"] = usage
+            self.write_chunk(writer, f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+            await writer.drain()
+        self.write_chunk(writer, "data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def write_chunk(writer: asyncio.StreamWriter, data: str) -> None:
+        encoded = data.encode()
+        writer.write(f"{len(encoded):x}\r\n".encode() + encoded + b"\r\n")
+
+
+async def serve(host: str, port: int, responses: dict, latency_ms: float, jitter_ms: float) -> None:
+    mock = MockLlmServer(responses, latency_ms, jitter_ms)
+    server = await asyncio.start_server(mock.handle, host, port, backlog=1024)
+    print(f"✅ Mock LLM server listening on http://{host}:{port}/v1 (latency {latency_ms}±{jitter_ms} ms)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def load_responses(path: str | None) -> dict:
+    """Canned responses, optionally overridden per stage by a recorded {stage: text} JSON file."""
+    responses = dict(CANNED_RESPONSES)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        responses.update({stage: text if isinstance(text, str) else json.dumps(text, ensure_ascii=False)
+                          for stage, text in recorded.items()})
+    return responses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--responses", help="JSON file of recorded responses keyed by stage (extraction, evidence, judge).")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, load_responses(args.responses), args.latency_ms, args.jitter_ms))
+    except KeyboardInterrupt:
+        pass
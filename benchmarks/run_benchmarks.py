@@ -0,0 +1,279 @@
+"""Offline benchmark suite for the fact-checking pipeline.
+
+Runs every model call against the local mock LLM server, so the numbers measure our own
+overhead: end-to-end throughput, per-stage overhead on top of model latency, session-store
+cost and URL-resolution cost, each at several concurrency levels, plus import and CLI start-up
+time. Results are written to a JSON file tagged with the current git revision so runs can be
+diffed between versions.
+
+    python benchmarks/run_benchmarks.py --levels 1 8 32 128 --latency-ms 200 --output bench_results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+import bench_import
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def start_mock_llm(port: int, latency_ms: float, jitter_ms: float, responses: str | None) -> subprocess.Popen:
+    command = [sys.executable, str(BENCH_DIR / "mock_llm_server.py"), "--port", str(port),
+               "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms)]
+    if responses:
+        command += ["--responses", responses]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Mock LLM server did not start")
+
+
+def configure_environment(port: int, tmp: str, session_backend: str, rate_limits: str) -> str:
+    """Points every stage at the mock server and disables caches that would hide pipeline cost."""
+    metrics_path = os.path.join(tmp, "metrics.jsonl")
+    os.environ.update({
+        "OPENAI_API_BASE": f"http://127.0.0.1:{port}/v1",
+        "OPENAI_API_KEY": "mock",
+        "EXTRACTION_MODEL": "openai/mock-extraction",
+        "EVIDENCE_MODEL": "openai/mock-search",
+        "JUDGE_MODEL": "openai/mock-judge",
+        "EVIDENCE_SEARCH_MODE": "single",
+        "CLAIM_CACHE_PATH": "",
+        "CLAIM_DEDUP_PATH": "",
+        "CHECKPOINT_PATH": "",
+        "URL_CACHE_PATH": "",
+        "SESSION_BACKEND": session_backend,
+        "SESSION_DB_PATH": os.path.join(tmp, "sessions.db"),
+        "SESSION_RESULTS_DB_PATH": os.path.join(tmp, "session_results.db"),
+        "METRICS_LOG_PATH": metrics_path,
+        "METRICS_PROM_PATH": "",
+        "RATE_LIMITS": rate_limits,
+    })
+    return metrics_path
+
+
+def stage_overhead(metrics_lines: list[dict], latency_ms: float) -> dict:
+    """Mean stage wall time minus the mock model latency it waited on, in milliseconds."""
+    totals: dict[str, dict] = {}
+    for summary in metrics_lines:
+        for name, stage in summary["stages"].items():
+            if stage["wall_seconds"] is None:
+                continue
+            total = totals.setdefault(name, {"wall_ms": 0.0, "model_calls": 0, "runs": 0})
+            total["wall_ms"] += stage["wall_seconds"] * 1000
+            total["model_calls"] += stage["model_calls"]
+            total["runs"] += 1
+    return {
+        name: {
+            "mean_wall_ms": round(total["wall_ms"] / total["runs"], 2),
+            "mean_overhead_ms": round((total["wall_ms"] - total["model_calls"] * latency_ms) / total["runs"], 2),
+        }
+        for name, total in totals.items()
+    }
+
+
+async def bench_pipeline(levels: list[int], docs: int, latency_ms: float, tmp: str, metrics_path: str,
+                         processes: int = 1) -> list[dict]:
+    import batch
+    from sharded_batch import run_sharded_batch
+
+    text = (ROOT_DIR / "agents" / "ticos.txt").read_text(encoding="utf-8")
+    results = []
+    for level in levels:
+        input_path = os.path.join(tmp, f"docs_{level}.jsonl")
+        doc_count = max(docs, level)
+        with open(input_path, "w", encoding="utf-8") as f:
+            for i in range(doc_count):
+                # Distinct texts so sharded runs spread documents across workers by hash
+                f.write(json.dumps({"id": f"doc{i}", "text": f"[{i}] {text}"}, ensure_ascii=False) + "\n")
+        metrics_offset = os.path.getsize(metrics_path) if os.path.exists(metrics_path) else 0
+        output_path = os.path.join(tmp, f"out_{level}.jsonl")
+        if processes > 1:
+            # Each worker gets an equal share of the level, so total concurrency matches the single-process run
+            summary = await asyncio.to_thread(run_sharded_batch, input_path, output_path, processes,
+                                              max(1, level // processes))
+        else:
+            summary = await batch.run_batch(input_path, output_path, level)
+        with open(metrics_path, "r", encoding="utf-8") as f:
+            f.seek(metrics_offset)
+            metrics_lines = [json.loads(line) for line in f if line.strip()]
+        results.append({
+            "concurrency": level,
+            "processes": processes,
+            "documents": summary["documents"],
+            "failed": summary["failed"],
+            "docs_per_second": summary["docs_per_second"],
+            "p50_latency_seconds": summary["p50_latency_seconds"],
+            "p95_latency_seconds": summary["p95_latency_seconds"],
+            "stage_overhead": stage_overhead(metrics_lines, latency_ms),
+        })
+    return results
+
+
+async def bench_session_stores(levels: list[int], runs: int, tmp: str) -> list[dict]:
+    from google.adk.sessions import InMemorySessionService
+
+    from bench_sessions import bench_backend
+    from session_store import LeanSessionService, database_session_service
+
+    results = []
+    for level in levels:
+        backends = {
+            "database": database_session_service(os.path.join(tmp, f"bench_db_{level}.db")),
+            "memory": InMemorySessionService(),
+            "lean": LeanSessionService(db_path=os.path.join(tmp, f"bench_lean_{level}.db")),
+        }
+        for name, service in backends.items():
+            results.append(await bench_backend(name, service, max(runs, level), level))
+    return results
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", "/final/" + self.path.rsplit("/", 1)[-1])
+        else:
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+async def bench_url_resolution(levels: list[int], urls_per_level: int, tmp: str) -> list[dict]:
+    from url_resolver import UrlResolver
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    results = []
+    try:
+        for level in levels:
+            resolver = UrlResolver(cache_path=os.path.join(tmp, f"urls_{level}.db"), resolve_hosts=("127.0.0.1",),
+                                   per_host_limit=level)
+            # Half of the URLs repeat, like shared sources across claims.
+            urls = [f"{base}/redirect/{i % max(1, urls_per_level // 2)}" for i in range(urls_per_level)]
+            semaphore = asyncio.Semaphore(level)
+
+            async def resolve(url):
+                async with semaphore:
+                    return await resolver.resolve(url)
+
+            timings = {}
+            for phase in ("cold", "warm"):
+                start = time.perf_counter()
+                await asyncio.gather(*(resolve(url) for url in urls))
+                timings[phase] = (time.perf_counter() - start) * 1000 / len(urls)
+            await resolver.aclose()
+            results.append({
+                "concurrency": level,
+                "urls": len(urls),
+                "cold_ms_per_url": round(timings["cold"], 3),
+                "warm_ms_per_url": round(timings["warm"], 3),
+                "network_requests": resolver.stats["network_requests"],
+                "coalesced": resolver.stats["coalesced"],
+            })
+    finally:
+        server.shutdown()
+    return results
+
+
+async def run_suite(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        metrics_path = configure_environment(port, tmp, args.session_backend, args.rate_limits)
+        mock = start_mock_llm(port, args.latency_ms, args.jitter_ms, args.responses)
+        try:
+            pipeline = await bench_pipeline(args.levels, args.docs, args.latency_ms, tmp, metrics_path, args.processes)
+        finally:
+            mock.terminate()
+            mock.wait()
+        sessions = await bench_session_stores(args.levels, args.session_runs, tmp)
+        urls = await bench_url_resolution(args.levels, args.urls, tmp)
+    import_time = bench_import.run(args.import_repeat)
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "levels": args.levels, "docs": args.docs, "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+            "session_backend": args.session_backend, "session_runs": args.session_runs, "urls": args.urls,
+            "rate_limits": args.rate_limits, "import_repeat": args.import_repeat, "processes": args.processes,
+        },
+        "pipeline": pipeline,
+        "session_store": sessions,
+        "url_resolution": urls,
+        "import_time": import_time,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\n--- Benchmark Report ({report['revision']}) ---")
+    print(f"{'conc.':>6} {'docs/s':>10} {'p50 s':>8} {'p95 s':>8} {'failed':>7}")
+    for row in report["pipeline"]:
+        print(f"{row['concurrency']:>6} {row['docs_per_second']:>10} {row['p50_latency_seconds']:>8} "
+              f"{row['p95_latency_seconds']:>8} {row['failed']:>7}")
+    print(f"\n{'conc.':>6} {'backend':<10} {'runs/s':>10} {'mean ms':>10}")
+    for row in report["session_store"]:
+        print(f"{row['concurrency']:>6} {row['backend']:<10} {row['runs_per_second']:>10} {row['mean_ms_per_run']:>10}")
+    print(f"\n{'conc.':>6} {'cold ms/url':>12} {'warm ms/url':>12} {'requests':>9}")
+    for row in report["url_resolution"]:
+        print(f"{row['concurrency']:>6} {row['cold_ms_per_url']:>12} {row['warm_ms_per_url']:>12} {row['network_requests']:>9}")
+    print()
+    bench_import.print_report(report["import_time"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--docs", type=int, default=32, help="Minimum documents per concurrency level.")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--responses", help="Recorded responses JSON for the mock server.")
+    parser.add_argument("--session-backend", default="database", choices=["database", "memory", "lean"])
+    parser.add_argument("--rate-limits", default="",
+                        help="RATE_LIMITS spec for the run; empty measures the pipeline without provider throttling.")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Worker processes for the pipeline benchmark (sharded_batch.py when above 1).")
+    parser.add_argument("--session-runs", type=int, default=200)
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--import-repeat", type=int, default=5, help="Fresh interpreters per import-time target.")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+    report = asyncio.run(run_suite(args))
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to {args.output}")
@@ -0,0 +1,96 @@
+from typing import AsyncGenerator, Callable
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.llm_agent import LlmAgent
+from google.adk.events import Event
+
+from checkpoints import STAGE_VALIDATORS
+from helpers import clean_and_parse_json, content_text, normalize_claim_key
+from instrumentation import current_run_metrics
+from schemas import VERDICT_STATUSES
+
+
+def extraction_escalation_reason(output: dict | None, state, min_confidence: float) -> str | None:
+    """Rejects claim extraction output that does not match the claims schema."""
+    if not STAGE_VALIDATORS["claims"](output):
+        return "schema"
+    if not all(isinstance(claim, dict) and claim.get("contextualized_claim") for claim in output["verifiable_claims"]):
+        return "schema"
+    return None
+
+
+def verdict_escalation_reason(output: dict | None, state, min_confidence: float) -> str | None:
+    """Rejects verdicts that fail the schema, leave input claims unjudged or report low confidence."""
+    if not STAGE_VALIDATORS["final_results"](output):
+        return "schema"
+    verdicts = output["fact_check_results"]
+    if not all(isinstance(verdict, dict) and verdict.get("status") in VERDICT_STATUSES for verdict in verdicts):
+        return "schema"
+
+    judged = {normalize_claim_key(verdict.get(field) or "")
+              for verdict in verdicts for field in ("claim", "original_statement")}
+    claims = clean_and_parse_json(state.get("claims"))
+    for claim in claims.get("verifiable_claims", []) if isinstance(claims, dict) else []:
+        if not isinstance(claim, dict):
+            continue
+        keys = {normalize_claim_key(claim.get(field) or "") for field in ("contextualized_claim", "original_statement")}
+        keys.discard("")
+        if keys and not keys & judged:
+            return "missing_claims"
+
+    confidences = [verdict["confidence"] for verdict in verdicts if isinstance(verdict.get("confidence"), (int, float))]
+    if confidences and min(confidences) < min_confidence:
+        return "low_confidence"
+    return None
+
+
+def fallback_tier(agent: LlmAgent, model) -> LlmAgent:
+    """Copy of a stage agent on a bigger model, without the primary tier's cache and skip callbacks."""
+    return agent.model_copy(update={
+        "name": f"{agent.name}Fallback",
+        "model": model,
+        "before_agent_callback": None,
+        "after_agent_callback": None,
+    })
+
+
+class ModelCascadeAgent(BaseAgent):
+    """Runs a tool-free stage on the cheapest model tier first, escalating only when its output is rejected.
+
+    Partial events stream through as they arrive; a tier's final events are held back until its output
+    passes `escalation_check`, so rejected output never reaches the session or later stages.
+    """
+
+    tiers: list[BaseAgent]
+    output_key: str
+    escalation_check: Callable[[dict | None, dict, float], str | None]
+    min_confidence: float = 0.6
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        metrics = current_run_metrics.get()
+        for index, tier in enumerate(self.tiers):
+            held_events, output_text = [], None
+            async for event in tier.run_async(ctx):
+                if event.partial:
+                    yield event
+                    continue
+                held_events.append(event)
+                state_delta = event.actions.state_delta if event.actions else None
+                if state_delta and isinstance(state_delta.get(self.output_key), str):
+                    output_text = state_delta[self.output_key]
+                elif event.is_final_response() and output_text is None:
+                    output_text = content_text(event.content)
+
+            is_last_tier = index == len(self.tiers) - 1
+            reason = None if is_last_tier else self.escalation_check(
+                clean_and_parse_json(output_text), ctx.session.state, self.min_confidence)
+            if reason is None:
+                for event in held_events:
+                    yield event
+                return
+            print(f"  ...Escalating {self.name} from {tier.name} to {self.tiers[index + 1].name} ({reason})")
+            if metrics:
+                metrics.record_escalation(self.name, reason)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import TYPE_CHECKING
+
+from helpers import add_callback, clean_and_parse_json, content_text, has_placeholder, normalize_text, tune_sqlite
+
+if TYPE_CHECKING:
+    from google.adk.agents.callback_context import CallbackContext
+
+# Initial session state key listing stage output keys whose checkpoints a run must ignore.
+RERUN_STATE_KEY = "checkpoint_rerun_stages"
+# Set once any stage runs for real, so every later stage recomputes from the fresh upstream output.
+STALE_STATE_KEY = "checkpoint_stale"
+# Stage output keys served from checkpoints during the run.
+HITS_STATE_KEY = "checkpoint_hits"
+
+STAGE_VALIDATORS = {
+    "claims": lambda value: isinstance(value, dict) and isinstance(value.get("verifiable_claims"), list),
+    "google_search_results": lambda value: isinstance(value, dict),
+    "final_results": lambda value: isinstance(value, dict) and isinstance(value.get("fact_check_results"), list),
+}
+
+
+def document_hash(text: str) -> str:
+    """Hashes the normalized document text; checkpoints of all stages of a document share this key."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def stage_version(agent) -> str:
+    """Hashes the model ids and instructions of every LLM agent inside a stage (cascade tiers, repair agents, ...).
+
+    Checkpoints are stored under this version, so changing a stage's model or prompt invalidates them.
+    """
+    from google.adk.agents import BaseAgent
+
+    from claim_cache import model_id_of
+
+    fingerprints, seen, pending = set(), set(), [agent]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if hasattr(current, "model") and hasattr(current, "instruction"):
+            instruction = current.instruction if isinstance(current.instruction, str) else repr(current.instruction)
+            fingerprints.add((model_id_of(current), instruction))
+        for field in type(current).model_fields:
+            if field == "parent_agent":
+                continue
+            value = getattr(current, field, None)
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, BaseAgent):
+                    pending.append(child)
+    digest = hashlib.sha256()
+    for model_id, instruction in sorted(fingerprints):
+        for field in (model_id, instruction):
+            digest.update(field.encode("utf-8"))
+            digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class StageCheckpointStore:
+    """Persists each stage's validated output per document so a failed run resumes at the first missing stage.
+
+    Entries are keyed by the stage's model/instruction version and expire after `max_age_seconds`.
+    """
+
+    def __init__(self, db_path: str = "./stage_checkpoints.db", max_age_seconds: float = 7 * 86400):
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        tune_sqlite(self.conn)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS stage_checkpoints ("
+            " doc_hash TEXT NOT NULL, stage TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL,"
+            " version TEXT NOT NULL DEFAULT '', PRIMARY KEY (doc_hash, stage))"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(stage_checkpoints)")}
+        if "version" not in columns:
+            self.conn.execute("ALTER TABLE stage_checkpoints ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS stage_checkpoints_created_at ON stage_checkpoints (created_at)")
+        # Version each stage was last attached with, so tools can look checkpoints up without building the agents
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS stage_versions ("
+            " stage TEXT PRIMARY KEY, version TEXT NOT NULL, attached_at REAL NOT NULL)"
+        )
+        self.prune()
+
+    def get(self, doc_hash: str, stage: str, version: str | None = None) -> dict | None:
+        """Returns a fresh checkpoint of the stage; with a `version`, only one stored under that version."""
+        row = self.conn.execute(
+            "SELECT value, version FROM stage_checkpoints WHERE doc_hash = ? AND stage = ? AND created_at >= ?",
+            (doc_hash, stage, time.time() - self.max_age_seconds),
+        ).fetchone()
+        if row is None or (version is not None and row[1] != version):
+            return None
+        return json.loads(row[0])
+
+    def put(self, doc_hash: str, stage: str, value: dict, version: str = "") -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO stage_checkpoints (doc_hash, stage, value, created_at, version)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (doc_hash, stage, json.dumps(value, ensure_ascii=False), time.time(), version),
+        )
+        self.conn.commit()
+
+    def current_version(self, stage: str) -> str | None:
+        """The version the stage had when a pipeline last attached this store (None if it never did)."""
+        row = self.conn.execute("SELECT version FROM stage_versions WHERE stage = ?", (stage,)).fetchone()
+        return row[0] if row else None
+
+    def prune(self) -> int:
+        """Deletes expired checkpoints; returns how many were removed."""
+        removed = self.conn.execute(
+            "DELETE FROM stage_checkpoints WHERE created_at < ?", (time.time() - self.max_age_seconds,)).rowcount
+        self.conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        documents, entries = self.conn.execute(
+            "SELECT COUNT(DISTINCT doc_hash), COUNT(*) FROM stage_checkpoints").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "documents": documents, "entries": entries}
+
+    def attach(self, agent) -> None:
+        """Serves the agent's output from a valid checkpoint when possible and checkpoints valid fresh output.
+
+        Output holding placeholders for missing evidence or verdicts is never checkpointed or replayed.
+        """
+        # Imported here so cache-only tools can read checkpoints without loading ADK
+        from google.genai import types
+        output_key = agent.output_key
+        version = stage_version(agent)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO stage_versions VALUES (?, ?, ?)",
+                              (output_key, version, time.time()))
+        is_valid = STAGE_VALIDATORS.get(output_key, lambda value: value is not None)
+
+        def doc_key(callback_context: CallbackContext) -> str | None:
+            text = content_text(callback_context.user_content)
+            return document_hash(text) if text else None
+
+        def resume_from_checkpoint(callback_context: CallbackContext) -> types.Content | None:
+            key = doc_key(callback_context)
+            if key is None:
+                return None
+            state = callback_context.state
+            if state.get(STALE_STATE_KEY) or output_key in (state.get(RERUN_STATE_KEY) or []):
+                state[STALE_STATE_KEY] = True
+                return None
+            checkpoint = self.get(key, output_key, version)
+            if not is_valid(checkpoint) or has_placeholder(checkpoint):
+                self.misses += 1
+                state[STALE_STATE_KEY] = True
+                return None
+            self.hits += 1
+            checkpoint_text = json.dumps(checkpoint, ensure_ascii=False, indent=2)
+            state[output_key] = checkpoint_text
+            state[HITS_STATE_KEY] = [*(state.get(HITS_STATE_KEY) or []), output_key]
+            print(f"  ...Resumed '{output_key}' from checkpoint ({key[:12]})")
+            return types.Content(role="model", parts=[types.Part(text=checkpoint_text)])
+
+        def save_checkpoint(callback_context: CallbackContext) -> None:
+            key = doc_key(callback_context)
+            value = clean_and_parse_json(callback_context.state.get(output_key))
+            if key and is_valid(value) and not has_placeholder(value):
+                self.put(key, output_key, value, version)
+            return None
+
+        add_callback(agent, "before_agent_callback", resume_from_checkpoint)
+        add_callback(agent, "after_agent_callback", save_checkpoint)
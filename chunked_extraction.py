@@ -0,0 +1,90 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from helpers import clean_and_parse_json, content_text, normalize_claim_key, split_sentences
+from subrun import SubRunner
+
+CHUNKED_APP_NAME = "claim_extraction_chunks"
+
+
+def split_into_windows(text: str, max_chars: int = 3000, overlap_sentences: int = 1) -> list[str]:
+    """Groups sentences into windows of at most `max_chars`, repeating `overlap_sentences` between windows."""
+    sentences = split_sentences(text)
+    windows, current, current_len = [], [], 0
+    for sentence in sentences:
+        if current and current_len + len(sentence) + 1 > max_chars:
+            windows.append(" ".join(current))
+            current = current[-overlap_sentences:] if overlap_sentences > 0 else []
+            current_len = sum(len(s) + 1 for s in current)
+        current.append(sentence)
+        current_len += len(sentence) + 1
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+
+def merge_window_claims(window_outputs: list[dict]) -> dict:
+    """Merges per-window extraction outputs in order, dropping items repeated across window overlaps."""
+    merged = {"verifiable_claims": [], "ignored_statements": []}
+    seen_claims, seen_ignored = set(), set()
+    for output in window_outputs:
+        for claim in output.get("verifiable_claims", []):
+            if not isinstance(claim, dict):
+                continue
+            keys = {normalize_claim_key(claim.get(field) or "") for field in ("original_statement", "contextualized_claim")}
+            keys.discard("")
+            if keys & seen_claims:
+                continue
+            seen_claims |= keys
+            merged["verifiable_claims"].append(claim)
+        for ignored in output.get("ignored_statements", []):
+            key = normalize_claim_key(ignored.get("statement") or "") if isinstance(ignored, dict) else ""
+            if not key or key in seen_ignored:
+                continue
+            seen_ignored.add(key)
+            merged["ignored_statements"].append(ignored)
+    return merged
+
+
+class ChunkedClaimExtractionAgent(BaseAgent):
+    """Extracts claims from overlapping windows of a long transcript concurrently and merges them."""
+
+    extraction_agent: BaseAgent
+    max_chars: int = 3000
+    overlap_sentences: int = 1
+    max_concurrency: int = 4
+    output_key: str = "claims"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        windows = split_into_windows(content_text(ctx.user_content), self.max_chars, self.overlap_sentences)
+        sub_runner = SubRunner(self.extraction_agent, CHUNKED_APP_NAME)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def extract_window(index: int, window: str) -> dict:
+            async with semaphore:
+                try:
+                    parsed = clean_and_parse_json(await sub_runner.run(ctx.session.user_id, window))
+                except Exception as e:
+                    print(f"\n(Warning: Claim extraction failed for window {index + 1}/{len(windows)}: {e})")
+                    return {}
+            if not isinstance(parsed, dict):
+                print(f"\n(Warning: Claim extraction for window {index + 1}/{len(windows)} was not parsable)")
+                return {}
+            return parsed
+
+        window_outputs = await asyncio.gather(*(extract_window(i, w) for i, w in enumerate(windows)))
+        merged_text = json.dumps(merge_window_claims(window_outputs), ensure_ascii=False, indent=2)
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=merged_text)]),
+            actions=EventActions(state_delta={self.output_key: merged_text}),
+        )
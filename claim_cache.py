@@ -0,0 +1,123 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from helpers import add_callback, clean_and_parse_json, content_text, normalize_text, tune_sqlite
+
+
+def model_id_of(agent) -> str:
+    """Returns a stable model identifier for an agent's model (plain string or LiteLlm)."""
+    return agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", repr(agent.model))
+
+
+class ClaimExtractionCache:
+    """Persistent, content-addressed cache of parsed claim extraction results with LRU eviction."""
+
+    def __init__(self, db_path: str = "./claim_cache.db", max_bytes: int = 64 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        tune_sqlite(self.conn)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS claim_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claim_cache_lru ON claim_cache (last_access)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text: str, model_id: str, instruction: str) -> str:
+        """Hashes the normalized input text together with the model id and instruction text."""
+        digest = hashlib.sha256()
+        for field in (normalize_text(text), model_id, instruction):
+            digest.update(field.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """Returns the cached claims JSON for a key and marks it as recently used."""
+        row = self.conn.execute("SELECT value FROM claim_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE claim_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, claims: dict) -> None:
+        """Stores parsed claims JSON and evicts least recently used entries beyond the size limit."""
+        value = json.dumps(claims, ensure_ascii=False)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO claim_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now, now),
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self) -> None:
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM claim_cache").fetchone()[0]
+        while total > self.max_bytes:
+            row = self.conn.execute("SELECT key, size FROM claim_cache ORDER BY last_access ASC LIMIT 1").fetchone()
+            if row is None:
+                break
+            self.conn.execute("DELETE FROM claim_cache WHERE key = ?", (row[0],))
+            total -= row[1]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the current on-disk footprint."""
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM claim_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def attach(self, agent, model_agent=None) -> None:
+        """Wires the cache into an extraction agent via before/after agent callbacks.
+
+        Keys use the model and instruction of `model_agent` (default: `agent` itself), so wrappers such as a
+        model cascade can be cached under their primary LlmAgent.
+        """
+        model_agent = model_agent or agent
+        model_id = model_id_of(model_agent)
+        instruction = model_agent.instruction if isinstance(model_agent.instruction, str) else repr(model_agent.instruction)
+        output_key = agent.output_key
+
+        def cache_key(callback_context: CallbackContext) -> str | None:
+            text = content_text(callback_context.user_content)
+            return self.make_key(text, model_id, instruction) if text else None
+
+        def serve_from_cache(callback_context: CallbackContext) -> types.Content | None:
+            key = cache_key(callback_context)
+            cached = self.get(key) if key else None
+            if cached is None:
+                return None
+            cached_text = json.dumps(cached, ensure_ascii=False, indent=2)
+            callback_context.state[output_key] = cached_text
+            print(f"  ...Claim extraction served from cache ({key[:12]})")
+            return types.Content(role="model", parts=[types.Part(text=cached_text)])
+
+        def store_in_cache(callback_context: CallbackContext) -> None:
+            key = cache_key(callback_context)
+            claims = clean_and_parse_json(callback_context.state.get(output_key))
+            if key and isinstance(claims, dict) and "verifiable_claims" in claims:
+                self.put(key, claims)
+            return None
+
+        add_callback(agent, "before_agent_callback", serve_from_cache)
+        add_callback(agent, "after_agent_callback", store_in_cache)
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from checkpoints import RERUN_STATE_KEY, document_hash
+from helpers import clean_and_parse_json, content_text, normalize_claim_key, tune_sqlite
+
+# Initial session state key listing normalized claims the caller already has verdicts for (e.g. the claims a live
+# transcript reported for its context sentences); they are dropped right after extraction.
+KNOWN_CLAIMS_STATE_KEY = "known_claim_keys"
+
+# --- MinHash / LSH Parameters ---
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 5
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _seeded_permutations(count: int) -> list[tuple[int, int]]:
+    """Deterministic (a, b) pairs so signatures stay comparable across processes."""
+    permutations = []
+    for i in range(count):
+        seed = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(seed[:8], "big") % _MERSENNE_PRIME or 1
+        b = int.from_bytes(seed[8:], "big") % _MERSENNE_PRIME
+        permutations.append((a, b))
+    return permutations
+
+
+_PERMUTATIONS = _seeded_permutations(NUM_PERMUTATIONS)
+
+
+def normalize_claim(text: str) -> str:
+    """Lowercases, strips accents and collapses whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.split())
+
+
+def claim_numbers(text: str) -> list[str]:
+    """Numeric tokens in a claim; near-duplicates must agree on these exactly (6,9% is not 6,5%)."""
+    return sorted(re.sub(r"[.,](?=\d{3}\b)", "", n).replace(",", ".") for n in re.findall(r"\d[\d.,]*\d|\d", text))
+
+
+def shingles(text: str) -> set[int]:
+    """Hashed character shingles of the normalized claim."""
+    normalized = normalize_claim(text)
+    if len(normalized) <= SHINGLE_SIZE:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return {int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "big") for g in grams}
+
+
+def minhash_signature(shingle_set: set[int]) -> list[int]:
+    return [min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingle_set) for a, b in _PERMUTATIONS]
+
+
+def lsh_buckets(signature: list[int]) -> list[str]:
+    return [
+        hashlib.blake2b(repr(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]).encode(), digest_size=8).hexdigest()
+        for band in range(LSH_BANDS)
+    ]
+
+
+def jaccard(a: set[int], b: set[int]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+class ClaimDedupIndex:
+    """Persistent MinHash/LSH index of past claims and their fact-check verdicts.
+
+    Each normalized claim keeps only its latest verdict, and verdicts older than the freshness window are
+    pruned as new ones are added, so the table and its LSH buckets stay bounded.
+    """
+
+    def __init__(self, db_path: str = "./claim_dedup.db", threshold: float = 0.8, freshness_days: float = 7.0):
+        self.threshold = threshold
+        self.freshness_seconds = freshness_days * 86400
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        tune_sqlite(self.conn)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS claims (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                claim TEXT NOT NULL,
+                numbers TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                claim_key TEXT,
+                doc_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS claim_buckets (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                claim_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS claim_buckets_lookup ON claim_buckets (band, bucket);
+            CREATE INDEX IF NOT EXISTS claim_buckets_claim ON claim_buckets (claim_id);
+            CREATE TABLE IF NOT EXISTS claim_reuse_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                reused_at REAL NOT NULL,
+                claim TEXT NOT NULL,
+                matched_claim_id INTEGER NOT NULL,
+                similarity REAL NOT NULL
+            );
+            """
+        )
+        # Indexes created before claim_key / doc_hash existed get the columns added in place
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(claims)")}
+        for column in ("claim_key", "doc_hash"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE claims ADD COLUMN {column} TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claims_key ON claims (claim_key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claims_created_at ON claims (created_at)")
+        self.conn.commit()
+        self.prune()
+
+    def find(self, claim: str, exclude_doc_hash: str | None = None) -> tuple[int, float, dict] | None:
+        """Returns (claim_id, similarity, result) of the best fresh match above the threshold.
+
+        Verdicts indexed from the document `exclude_doc_hash` are skipped, so a document never reuses its own.
+        """
+        claim_shingles = shingles(claim)
+        buckets = lsh_buckets(minhash_signature(claim_shingles))
+        placeholders = " OR ".join("(band = ? AND bucket = ?)" for _ in buckets)
+        params = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        candidate_ids = {row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT claim_id FROM claim_buckets WHERE {placeholders}", params)}
+        if not candidate_ids:
+            return None
+
+        numbers = json.dumps(claim_numbers(claim))
+        min_created_at = time.time() - self.freshness_seconds
+        best = None
+        id_placeholders = ",".join("?" for _ in candidate_ids)
+        rows = self.conn.execute(
+            f"SELECT id, claim, numbers, result, doc_hash FROM claims WHERE id IN ({id_placeholders}) AND created_at >= ?",
+            [*candidate_ids, min_created_at],
+        )
+        for claim_id, past_claim, past_numbers, result, past_doc_hash in rows:
+            if past_numbers != numbers or (exclude_doc_hash and past_doc_hash == exclude_doc_hash):
+                continue
+            similarity = jaccard(claim_shingles, shingles(past_claim))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (claim_id, similarity, json.loads(result))
+        return best
+
+    def add(self, claim: str, result: dict, doc_hash: str | None = None) -> int:
+        """Indexes a judged claim and its fact-check result entry, replacing the claim's previous verdict."""
+        claim_key = normalize_claim(claim)
+        self._delete_claims([row[0] for row in self.conn.execute(
+            "SELECT id FROM claims WHERE claim_key = ?", (claim_key,))])
+        cursor = self.conn.execute(
+            "INSERT INTO claims (claim, numbers, result, created_at, claim_key, doc_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            (claim, json.dumps(claim_numbers(claim)), json.dumps(result, ensure_ascii=False), time.time(),
+             claim_key, doc_hash),
+        )
+        claim_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO claim_buckets (band, bucket, claim_id) VALUES (?, ?, ?)",
+            [(band, bucket, claim_id) for band, bucket in enumerate(lsh_buckets(minhash_signature(shingles(claim))))],
+        )
+        self.conn.commit()
+        self.prune()
+        return claim_id
+
+    def prune(self) -> int:
+        """Deletes verdicts older than the freshness window (they can no longer be reused) and their buckets."""
+        expired = [row[0] for row in self.conn.execute(
+            "SELECT id FROM claims WHERE created_at < ?", (time.time() - self.freshness_seconds,))]
+        self._delete_claims(expired)
+        self.conn.commit()
+        return len(expired)
+
+    def _delete_claims(self, claim_ids: list[int]) -> None:
+        # Chunked to stay under SQLite's bound parameter limit
+        for start in range(0, len(claim_ids), 500):
+            chunk = claim_ids[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            self.conn.execute(f"DELETE FROM claim_buckets WHERE claim_id IN ({placeholders})", chunk)
+            self.conn.execute(f"DELETE FROM claims WHERE id IN ({placeholders})", chunk)
+
+    def log_reuse(self, claim: str, matched_claim_id: int, similarity: float) -> None:
+        """Records a verdict reuse so it can be audited later."""
+        self.conn.execute(
+            "INSERT INTO claim_reuse_log (reused_at, claim, matched_claim_id, similarity) VALUES (?, ?, ?, ?)",
+            (time.time(), claim, matched_claim_id, similarity),
+        )
+        self.conn.commit()
+        print(f"  ...Reused verdict of claim #{matched_claim_id} (similarity {similarity:.2f}) for: \"{claim}\"")
+
+
+class ClaimReuseAgent(BaseAgent):
+    """Answers near-duplicate claims from the dedup index and forwards only novel claims downstream."""
+
+    index: ClaimDedupIndex
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        # A forced re-judge (e.g. `batch --rerun-judge`) must not be answered from earlier verdicts
+        if "final_results" in (ctx.session.state.get(RERUN_STATE_KEY) or []):
+            return
+        claims = clean_and_parse_json(ctx.session.state.get("claims"))
+        if not isinstance(claims, dict):
+            return
+        text = content_text(ctx.user_content)
+        doc_hash = document_hash(text) if text else None
+        novel_claims, reused_results = [], []
+        for claim in claims.get("verifiable_claims", []):
+            claim_text = claim.get("contextualized_claim") if isinstance(claim, dict) else None
+            match = self.index.find(claim_text, exclude_doc_hash=doc_hash) if claim_text else None
+            if match is None:
+                novel_claims.append(claim)
+                continue
+            matched_claim_id, similarity, past_result = match
+            self.index.log_reuse(claim_text, matched_claim_id, similarity)
+            reused_results.append({
+                **past_result,
+                "original_statement": claim.get("original_statement", past_result.get("original_statement")),
+                "claim": claim_text,
+                "reused_from_claim_id": matched_claim_id,
+            })
+        if not reused_results:
+            return
+
+        remaining = {**claims, "verifiable_claims": novel_claims}
+        remaining_text = json.dumps(remaining, ensure_ascii=False, indent=2)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=remaining_text)]),
+            actions=EventActions(state_delta={
+                "claims": remaining_text,
+                "reused_results": reused_results,
+                "pending_claims_count": len(novel_claims),
+            }),
+        )
+
+
+class KnownClaimsFilterAgent(BaseAgent):
+    """Drops extracted claims listed in the run's known claims, so only new claims are searched and judged."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        known = set(ctx.session.state.get(KNOWN_CLAIMS_STATE_KEY) or [])
+        claims = clean_and_parse_json(ctx.session.state.get("claims")) if known else None
+        if not isinstance(claims, dict) or not isinstance(claims.get("verifiable_claims"), list):
+            return
+        novel_claims = [claim for claim in claims["verifiable_claims"] if not isinstance(claim, dict)
+                        or normalize_claim_key(claim.get("contextualized_claim") or "") not in known]
+        if len(novel_claims) == len(claims["verifiable_claims"]):
+            return
+        print(f"  ...Dropped {len(claims['verifiable_claims']) - len(novel_claims)} already checked claims")
+        remaining_text = json.dumps({**claims, "verifiable_claims": novel_claims}, ensure_ascii=False, indent=2)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=remaining_text)]),
+            actions=EventActions(state_delta={"claims": remaining_text, "pending_claims_count": len(novel_claims)}),
+        )
+
+
+def skip_when_no_pending_claims(output_key: str, empty_output: dict):
+    """Builds a before_agent_callback that skips a stage once every claim was answered from the index or dropped."""
+
+    def callback(callback_context: CallbackContext) -> types.Content | None:
+        if callback_context.state.get("pending_claims_count", None) != 0:
+            return None
+        empty_text = json.dumps(empty_output)
+        callback_context.state[output_key] = empty_text
+        return types.Content(role="model", parts=[types.Part(text=empty_text)])
+
+    return callback
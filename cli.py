@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Only the standard library and dotenv load up front; each command imports what it needs, so
+# `--help`, `config` and `cached` never load ADK, the model clients or the session database.
+
+VALID_MODES = {
+    "CLAIM_EXTRACTION_MODE": {"single", "chunked"},
+    "EVIDENCE_SEARCH_MODE": {"off", "single", "fanout"},
+    "EVIDENCE_RETRIEVAL": {"google", "local"},
+    "SESSION_BACKEND": {"memory", "lean", "database"},
+}
+CLI_USER_ID = "political_dept_cli"
+
+
+def read_input(path: str) -> str:
+    """Reads a document from a file path, or from stdin for '-'."""
+    if path == "-":
+        return sys.stdin.read()
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+# --- Config Validation ---
+def validate_config() -> list[str]:
+    """Checks the environment configuration without building anything; returns the problems found."""
+    try:
+        import agent
+    except ValueError as e:
+        return [f"Invalid numeric setting: {e}"]
+
+    problems = []
+    for name, allowed in VALID_MODES.items():
+        value = getattr(agent, name)
+        if value not in allowed:
+            problems.append(f"{name}={value!r} is not one of {sorted(allowed)}")
+    for name in ("CLAIM_CHUNK_MAX_CHARS", "CLAIM_CHUNK_CONCURRENCY", "EVIDENCE_SEARCH_CONCURRENCY",
+                 "URL_RESOLVE_PER_HOST_LIMIT", "CLAIM_CACHE_MAX_BYTES",
+                 "LOCAL_EVIDENCE_TOP_K", "JUDGE_BATCH_CONCURRENCY"):
+        if getattr(agent, name) < 1:
+            problems.append(f"{name} must be at least 1")
+    for name in ("CLAIM_DEDUP_THRESHOLD", "CASCADE_MIN_CONFIDENCE"):
+        if not 0 <= getattr(agent, name) <= 1:
+            problems.append(f"{name} must be between 0 and 1")
+    for entry in filter(None, (part.strip() for part in agent.RATE_LIMITS.split(","))):
+        provider, _, values = entry.partition("=")
+        fields = values.split("/")
+        try:
+            valid = bool(provider.strip()) and len(fields) == 3 and float(fields[0]) >= 0 and min(map(int, fields[1:])) >= 1
+        except ValueError:
+            valid = False
+        if not valid:
+            problems.append(f"RATE_LIMITS entry {entry!r} is not provider=rps/burst/max_concurrency")
+    if agent.EVIDENCE_RETRIEVAL == "local" and not os.path.exists(agent.LOCAL_EVIDENCE_PATH):
+        problems.append(f"EVIDENCE_RETRIEVAL=local but no index at '{agent.LOCAL_EVIDENCE_PATH}' "
+                        f"(build it with `cli.py evidence index`)")
+    return problems
+
+
+# --- Commands ---
+def command_check(args) -> int:
+    import asyncio
+    from agent import call_fact_check_pipeline, shutdown_services
+
+    session_id = f"factcheck_cli_{time.time()}_{time.monotonic_ns()}"
+    rerun_stages = ("final_results",) if args.rerun_judge else ()
+    document_id = args.id or (None if args.file == "-" else Path(args.file).stem)
+
+    async def run():
+        try:
+            return await call_fact_check_pipeline(
+                read_input(args.file), CLI_USER_ID, session_id, output_filename=args.output,
+                rerun_stages=rerun_stages, document_id=document_id,
+            )
+        finally:
+            await shutdown_services()
+
+    async def run_streaming(out):
+        from agent import stream_fact_check
+        from helpers import format_stream_event
+
+        result = None
+        try:
+            async for event in stream_fact_check(read_input(args.file), CLI_USER_ID, session_id, rerun_stages,
+                                                 document_id):
+                out.write(format_stream_event(event, args.stream))
+                out.flush()
+                if event["type"] == "done":
+                    result = event["results"]
+        finally:
+            await shutdown_services()
+        if result is not None and args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+        return result
+
+    if args.stream:
+        from contextlib import redirect_stdout
+
+        # Only events go to stdout; anything the pipeline prints goes to stderr
+        out = sys.stdout
+        with redirect_stdout(sys.stderr):
+            return 0 if asyncio.run(run_streaming(out)) is not None else 1
+    return 0 if asyncio.run(run()) is not None else 1
+
+
+def command_batch(args) -> int:
+    rerun_stages = ("final_results",) if args.rerun_judge else ()
+    if args.processes > 1:
+        from sharded_batch import run_sharded_batch
+
+        summary = run_sharded_batch(args.input, args.output, args.processes, max(1, args.concurrency), rerun_stages)
+    else:
+        import asyncio
+        from batch import run_batch
+
+        summary = asyncio.run(run_batch(args.input, args.output, max(1, args.concurrency), rerun_stages))
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+def command_serve(args) -> int:
+    import uvicorn
+    from server import create_app
+
+    uvicorn.run(create_app(args.workers, args.queue_size), host=args.host, port=args.port)
+    return 0
+
+
+def command_live(args) -> int:
+    import asyncio
+    from contextlib import redirect_stdout
+
+    from helpers import format_stream_event
+    from live_transcript import LiveTranscript
+
+    async def feed(transcript: LiveTranscript):
+        """Feeds the file as it grows (or stdin line by line) until it stops growing for --idle-timeout seconds."""
+        loop = asyncio.get_running_loop()
+        if args.file == "-":
+            while line := await loop.run_in_executor(None, sys.stdin.readline):
+                transcript.append(line)
+            return
+        with open(args.file, "r", encoding="utf-8") as f:
+            idle_since = time.monotonic()
+            while True:
+                chunk = f.read()
+                if chunk:
+                    transcript.append(chunk)
+                    idle_since = time.monotonic()
+                elif not args.follow or time.monotonic() - idle_since >= args.idle_timeout:
+                    return
+                await asyncio.sleep(args.poll_interval)
+
+    async def run(out):
+        from agent import get_pipeline, shutdown_services
+
+        get_pipeline()
+        transcript = LiveTranscript(args.id or (None if args.file == "-" else Path(args.file).stem) or "live")
+
+        async def produce():
+            try:
+                await feed(transcript)
+            finally:
+                await transcript.close()
+
+        producer = asyncio.create_task(produce())
+        try:
+            async for event in transcript.events():
+                out.write(format_stream_event(event, args.stream))
+                out.flush()
+        finally:
+            await producer
+            await shutdown_services()
+        return transcript.stats
+
+    # Only events go to stdout; anything the pipeline prints goes to stderr
+    out = sys.stdout
+    with redirect_stdout(sys.stderr):
+        stats = asyncio.run(run(out))
+    return 0 if stats["segments"] and not stats["failed_segments"] else 1
+
+
+def command_config(args) -> int:
+    problems = validate_config()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Configuration is valid.")
+    return 1 if problems else 0
+
+
+def command_cached(args) -> int:
+    from agent import CHECKPOINT_MAX_AGE_DAYS, CHECKPOINT_PATH
+    from checkpoints import StageCheckpointStore, document_hash
+
+    if not CHECKPOINT_PATH or not os.path.exists(CHECKPOINT_PATH):
+        print(f"(Warning: No checkpoint database at '{CHECKPOINT_PATH}')", file=sys.stderr)
+        return 1
+    store = StageCheckpointStore(CHECKPOINT_PATH, CHECKPOINT_MAX_AGE_DAYS * 86400)
+    doc_hash = document_hash(read_input(args.file))
+    for stage in ("final_results", "claims"):
+        # Only checkpoints of the stage version the pipeline last ran with would be replayed
+        version = store.current_version(stage)
+        value = store.get(doc_hash, stage, version) if version is not None else None
+        if value is not None:
+            print(json.dumps({"stage": stage, "document": doc_hash, "version": version, "value": value},
+                             indent=2, ensure_ascii=False))
+            return 0
+        if store.get(doc_hash, stage) is not None:
+            print(f"(Warning: The '{stage}' checkpoint of document {doc_hash[:12]} is from an older model or prompt"
+                  " version and would not be replayed)", file=sys.stderr)
+    print(f"(Warning: No checkpointed results for document {doc_hash[:12]})", file=sys.stderr)
+    return 1
+
+
+def parse_since(value: str) -> float:
+    """'7d', '12h' or '30m' ago, or an ISO date, as a Unix timestamp."""
+    units = {"d": 86400, "h": 3600, "m": 60}
+    if value[-1:] in units and value[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    from datetime import datetime
+    return datetime.fromisoformat(value).timestamp()
+
+
+def command_results(args) -> int:
+    from agent import RESULTS_STORE_PATH
+    from results_store import ResultsStore
+
+    if not RESULTS_STORE_PATH or not os.path.isdir(RESULTS_STORE_PATH):
+        print(f"(Warning: No results store at '{RESULTS_STORE_PATH}')", file=sys.stderr)
+        return 1
+    store = ResultsStore(RESULTS_STORE_PATH)
+    if args.rebuild_index:
+        print(f"Re-indexed {store.rebuild_index()} claim records")
+    if args.stats:
+        print(json.dumps(store.stats(), indent=2, ensure_ascii=False))
+        return 0
+    filters = {key: value for key, value in (
+        ("doc_id", args.doc), ("claim", args.claim), ("status", args.status),
+        ("since", parse_since(args.since) if args.since else None), ("limit", args.limit),
+    ) if value is not None}
+    if args.export:
+        with open(args.export, "w", encoding="utf-8") as out:
+            print(f"✅ Exported {store.export(out, **filters)} claim records to {args.export}")
+        return 0
+    for record in store.query(**filters):
+        print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+def command_evidence(args) -> int:
+    from agent import LOCAL_EVIDENCE_PATH, LOCAL_EVIDENCE_RERANK_MODEL
+    from local_retrieval import LocalEvidenceIndex
+
+    index = LocalEvidenceIndex(LOCAL_EVIDENCE_PATH, LOCAL_EVIDENCE_RERANK_MODEL or None)
+    if args.action == "index":
+        for path in args.targets:
+            indexed, unchanged = index.add_path(path)
+            print(f"✅ {path}: {indexed} documents indexed, {unchanged} unchanged")
+    elif args.action == "remove":
+        for doc_id in args.targets:
+            print(f"✅ Removed {doc_id}" if index.remove_document(doc_id) else f"(Warning: '{doc_id}' is not indexed)")
+    elif args.action == "search":
+        start = time.perf_counter()
+        hits = index.search(" ".join(args.targets), args.top_k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"[{hit['score']}] {hit['title']} ({hit['source']})\n    {hit['snippet']}")
+        print(f"{len(hits)} results in {elapsed_ms:.2f} ms")
+    print(json.dumps(index.stats()))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Defaults are read from the environment here so `--help` doesn't import the server or batch modules
+    parser = argparse.ArgumentParser(description="Political fact-checking pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser("check", help="Fact-check one document.")
+    check.add_argument("file", help="Text file to check, or '-' for stdin.")
+    check.add_argument("-o", "--output", help="Also write this run's results to a JSON file.")
+    check.add_argument("--id", help="Document id in the results store (defaults to the file name).")
+    check.add_argument("--stream", choices=("ndjson", "sse"),
+                       help="Write each verdict to stdout as soon as it is available, as NDJSON or server-sent events.")
+    check.add_argument("--rerun-judge", action="store_true",
+                       help="Re-run only the judge stage, reusing checkpointed claims and evidence.")
+    check.set_defaults(handler=command_check)
+
+    batch = commands.add_parser("batch", help="Fact-check a corpus of documents.")
+    batch.add_argument("input", help="JSONL file ({'id', 'text'} per line), text file, or directory of them.")
+    batch.add_argument("-o", "--output", default="fact_check_batch_results.jsonl", help="Output JSONL path.")
+    batch.add_argument("-c", "--concurrency", type=int, default=int(os.environ.get("BATCH_CONCURRENCY", "8")),
+                       help="Maximum number of pipelines running at once (per process).")
+    batch.add_argument("-p", "--processes", type=int, default=int(os.environ.get("BATCH_PROCESSES", "1")),
+                       help="Worker processes; above 1 the corpus is sharded by document hash across them.")
+    batch.add_argument("--rerun-judge", action="store_true",
+                       help="Re-run only the judge stage, reusing checkpointed claims and evidence.")
+    batch.set_defaults(handler=command_batch)
+
+    serve = commands.add_parser("serve", help="Serve the pipeline over a local HTTP API.")
+    serve.add_argument("--host", default=os.environ.get("SERVER_HOST", "127.0.0.1"))
+    serve.add_argument("--port", type=int, default=int(os.environ.get("SERVER_PORT", "8080")))
+    serve.add_argument("--workers", type=int, default=int(os.environ.get("SERVER_WORKERS", "8")),
+                       help="Pipelines running at once.")
+    serve.add_argument("--queue-size", type=int, default=int(os.environ.get("SERVER_QUEUE_SIZE", "64")),
+                       help="Jobs waiting beyond the running ones before requests get 429.")
+    serve.set_defaults(handler=command_serve)
+
+    live = commands.add_parser("live", help="Fact-check a transcript as it grows, checking only new sentences.")
+    live.add_argument("file", help="Transcript file being appended to, or '-' to read stdin line by line.")
+    live.add_argument("-f", "--follow", action="store_true", help="Keep reading the file as text is appended.")
+    live.add_argument("--idle-timeout", type=float, default=30.0,
+                      help="With --follow, stop after the file hasn't grown for this many seconds.")
+    live.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between checks for appended text.")
+    live.add_argument("--id", help="Document id in the results store (defaults to the file name).")
+    live.add_argument("--stream", choices=("ndjson", "sse"), default="ndjson", help="Event output format.")
+    live.set_defaults(handler=command_live)
+
+    config = commands.add_parser("config", help="Validate the environment configuration without building anything.")
+    config.set_defaults(handler=command_config)
+
+    cached = commands.add_parser("cached", help="Print checkpointed results for a document without running models.")
+    cached.add_argument("file", help="Text file to look up, or '-' for stdin.")
+    cached.set_defaults(handler=command_cached)
+
+    results = commands.add_parser("results", help="Query the append-only results store without running models.")
+    results.add_argument("--status", help="Only verdicts with this status, e.g. Contradicted.")
+    results.add_argument("--doc", help="Only claims from this document id.")
+    results.add_argument("--claim", help="History of one claim (matched case and whitespace insensitively).")
+    results.add_argument("--since", help="Only verdicts recorded since '7d', '12h', '30m' ago or an ISO date.")
+    results.add_argument("--limit", type=int)
+    results.add_argument("--export", help="Write the matching records to a JSONL file instead of stdout.")
+    results.add_argument("--stats", action="store_true", help="Print record counts by status.")
+    results.add_argument("--rebuild-index", action="store_true", help="Re-index the log before querying.")
+    results.set_defaults(handler=command_results)
+
+    evidence = commands.add_parser("evidence", help="Build or query the offline evidence index (EVIDENCE_RETRIEVAL=local).")
+    evidence.add_argument("action", choices=("index", "remove", "search", "stats"))
+    evidence.add_argument("targets", nargs="*",
+                          help="index: files or directories (.txt, .md, .csv, .tsv, .jsonl); remove: document ids; "
+                               "search: the query.")
+    evidence.add_argument("-k", "--top-k", type=int, default=int(os.environ.get("LOCAL_EVIDENCE_TOP_K", "5")))
+    evidence.set_defaults(handler=command_evidence)
+    return parser
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    args = build_parser().parse_args()
+    sys.exit(args.handler(args))
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.llm_agent import LlmAgent
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from helpers import clean_and_parse_json, normalize_claim_key
+from subrun import SubRunner
+
+FANOUT_APP_NAME = "evidence_search_fanout"
+
+
+def empty_evidence(reason: str) -> dict:
+    """Placeholder evidence package used when a single claim's search fails, so the rest of the run survives.
+
+    It is flagged `placeholder`, so schema validation treats the claim's evidence as missing.
+    """
+    return {"evidence_summary": reason, "sources": [], "search_query": "", "placeholder": True}
+
+
+class ParallelEvidenceSearchAgent(BaseAgent):
+    """Runs one evidence search sub-run per claim and merges them into `google_search_results`."""
+
+    search_agent: LlmAgent
+    max_concurrency: int = 4
+    output_key: str = "google_search_results"
+
+    async def _search_one_claim(self, sub_runner: SubRunner, user_id: str, claim: dict) -> dict:
+        """Runs the search agent on a single-claim input and returns its evidence package."""
+        payload = json.dumps({"verifiable_claims": [claim], "ignored_statements": []}, ensure_ascii=False)
+        final_text = await sub_runner.run(user_id, payload)
+
+        parsed = clean_and_parse_json(final_text)
+        if not isinstance(parsed, dict) or not parsed:
+            return empty_evidence("Evidence search returned no parsable result for this claim.")
+        evidence = parsed.get(claim.get("contextualized_claim"))
+        if evidence is None:
+            # Single-claim runs only ever produce one entry, even if the model rewrote the key.
+            evidence = next(iter(parsed.values()))
+        return evidence if isinstance(evidence, dict) else empty_evidence("Evidence search returned an invalid entry.")
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        claims = clean_and_parse_json(ctx.session.state.get("claims"))
+        verifiable_claims = claims.get("verifiable_claims", []) if isinstance(claims, dict) else []
+
+        sub_runner = SubRunner(self.search_agent, FANOUT_APP_NAME)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        in_flight: dict[str, asyncio.Task] = {}
+
+        async def guarded_search(claim: dict) -> dict:
+            async with semaphore:
+                try:
+                    return await self._search_one_claim(sub_runner, ctx.session.user_id, claim)
+                except Exception as e:
+                    print(f"\n(Warning: Evidence search failed for claim '{claim.get('contextualized_claim')}': {e})")
+                    return empty_evidence(f"Evidence search failed for this claim: {e}")
+
+        claim_keys = []
+        for claim in verifiable_claims:
+            if not isinstance(claim, dict) or not claim.get("contextualized_claim"):
+                continue
+            key = normalize_claim_key(claim["contextualized_claim"])
+            if key not in in_flight:
+                in_flight[key] = asyncio.create_task(guarded_search(claim))
+            claim_keys.append((claim["contextualized_claim"], key))
+
+        await asyncio.gather(*in_flight.values())
+        merged = {claim_text: in_flight[key].result() for claim_text, key in claim_keys}
+        merged_text = json.dumps(merged, ensure_ascii=False, indent=2)
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=merged_text)]),
+            actions=EventActions(state_delta={self.output_key: merged_text}),
+        )
@@ -0,0 +1,109 @@
+import json
+import re
+import sqlite3
+import unicodedata
+
+
+# --- Helper Classes and Functions ---
+class Part:
+    def __init__(self, text):
+        self.text = text
+
+class Content:
+    def __init__(self, role, parts):
+        self.role = role
+        self.parts = parts
+
+_JSON_DECODER = json.JSONDecoder()
+
+def clean_and_parse_json(text_output: str) -> dict | None:
+    """Cleans markdown fences and attempts to parse JSON."""
+    if not text_output:
+        return None
+    cleaned_output_text = text_output.strip()
+    if cleaned_output_text.startswith("```json"):
+        cleaned_output_text = cleaned_output_text[len("```json"):].strip()
+    if cleaned_output_text.startswith("```"):
+         cleaned_output_text = cleaned_output_text[len("```"):].strip()
+    if cleaned_output_text.endswith("```"):
+        cleaned_output_text = cleaned_output_text[:-len("```")].strip()
+    try:
+        return json.loads(cleaned_output_text)
+    except json.JSONDecodeError:
+        # Decode the first JSON object in place instead of slicing and re-parsing the whole text.
+        start_index = cleaned_output_text.find('{')
+        if start_index == -1:
+            print(f"\n(Warning: Output could not be parsed as JSON, invalid structure. Started with: '{cleaned_output_text[:100]}...')")
+            return None
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(cleaned_output_text, start_index)
+            return parsed
+        except json.JSONDecodeError as e:
+            print(f"\n(Warning: Output could not be parsed as JSON after extensive cleaning. Error at char {e.pos}: '{cleaned_output_text[start_index:start_index + 100]}...')")
+            return None
+    except Exception as parse_err:
+        print(f"\n(Warning: Unexpected error parsing JSON: {parse_err})")
+        return None
+
+def add_callback(agent, attribute: str, callback, first: bool = False) -> None:
+    """Adds a callback to an agent's callback slot (e.g. 'before_agent_callback'), keeping existing ones.
+
+    ADK stops at the first callback that returns a value, so observers that must always run go `first`.
+    """
+    existing = getattr(agent, attribute)
+    if existing is None:
+        callbacks = [callback]
+    elif isinstance(existing, list):
+        callbacks = [callback, *existing] if first else [*existing, callback]
+    else:
+        callbacks = [callback, existing] if first else [existing, callback]
+    setattr(agent, attribute, callbacks[0] if len(callbacks) == 1 else callbacks)
+
+def content_text(content) -> str:
+    """Joins the text parts of a Content object (empty string if there are none)."""
+    if not content or not getattr(content, "parts", None):
+        return ""
+    return "".join(part.text for part in content.parts if getattr(part, "text", None))
+
+def normalize_text(text: str) -> str:
+    """Normalizes unicode and whitespace so cosmetic edits map to the same cache key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def tune_sqlite(conn: sqlite3.Connection) -> None:
+    """WAL journaling and relaxed fsync: readers never block the writer and commits skip most fsyncs.
+
+    Writers from other processes (sharded batch workers) wait on the lock instead of failing with "database is locked".
+    """
+    conn.execute("PRAGMA busy_timeout=10000")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+def normalize_claim_key(claim: str) -> str:
+    """Normalizes a claim or statement so trivially different spellings compare equal."""
+    return re.sub(r"\s+", " ", claim).strip().lower()
+
+def has_placeholder(value) -> bool:
+    """True if any object nested in a parsed stage output is a placeholder standing in for a missing result."""
+    if isinstance(value, dict):
+        return value.get("placeholder") is True or any(has_placeholder(item) for item in value.values())
+    if isinstance(value, list):
+        return any(has_placeholder(item) for item in value)
+    return False
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for budgeting without a tokenizer."""
+    return (len(text) + 3) // 4 if text else 0
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n\s*\n")
+
+def split_sentences(text: str) -> list[str]:
+    """Splits text on sentence punctuation and blank lines."""
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence and sentence.strip()]
+
+def format_stream_event(event: dict, stream_format: str = "ndjson") -> str:
+    """One streamed pipeline event as an NDJSON line or a server-sent event ('sse')."""
+    data = json.dumps(event, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event.get('type', 'message')}\ndata: {data}\n\n"
+    return data + "\n"
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from helpers import add_callback, clean_and_parse_json
+
+if TYPE_CHECKING:
+    from google.adk.agents.callback_context import CallbackContext
+    from google.adk.models import LlmRequest, LlmResponse
+
+# The metrics of the pipeline run being executed; sub-run tasks inherit it through the asyncio context.
+current_run_metrics: contextvars.ContextVar["RunMetrics | None"] = contextvars.ContextVar("current_run_metrics", default=None)
+# Name of the stage whose model call is in progress, for attributing retries made inside the model wrapper.
+current_model_stage: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_model_stage", default=None)
+
+
+def new_stage_record() -> dict:
+    return {
+        "started_at": None, "ended_at": None, "first_event_at": None,
+        "invocations": 0, "model_calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0,
+        "retries": 0, "model_errors": 0, "parse_failures": 0, "escalations": 0,
+        "repairs": 0,
+    }
+
+
+class RunMetrics:
+    """Per-stage timings, token counts and failure counters for a single pipeline run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started_at = time.perf_counter()
+        self.ended_at = None
+        self.stages: dict[str, dict] = defaultdict(new_stage_record)
+        self.url_resolutions: list[float] = []
+        self.escalation_reasons: list[dict] = []
+        self.repair_kinds: list[dict] = []
+        self.first_verdict_at: float | None = None
+        self.prompts: list[dict] = []
+
+    def stage_started(self, stage: str) -> None:
+        record = self.stages[stage]
+        now = time.perf_counter()
+        record["invocations"] += 1
+        if record["started_at"] is None or now < record["started_at"]:
+            record["started_at"] = now
+
+    def stage_ended(self, stage: str) -> None:
+        record = self.stages[stage]
+        record["ended_at"] = max(record["ended_at"] or 0.0, time.perf_counter())
+
+    def observe_event(self, author: str) -> None:
+        """Records event arrival times from the runner's stream (time to first event, stage end)."""
+        if author == "user":
+            return
+        record = self.stages[author]
+        now = time.perf_counter()
+        if record["first_event_at"] is None:
+            record["first_event_at"] = now
+        record["ended_at"] = max(record["ended_at"] or 0.0, now)
+
+    def model_call(self, stage: str, response: LlmResponse) -> None:
+        record = self.stages[stage]
+        record["model_calls"] += 1
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record["prompt_tokens"] += usage.prompt_token_count or 0
+            record["completion_tokens"] += usage.candidates_token_count or 0
+            # Prompt tokens the provider served from its context / prefix cache, where it reports them
+            record["cached_prompt_tokens"] += getattr(usage, "cached_content_token_count", None) or 0
+        if getattr(response, "error_code", None):
+            record["model_errors"] += 1
+
+    def record_retry(self, stage: str) -> None:
+        self.stages[stage]["retries"] += 1
+
+    def record_parse_failure(self, stage: str) -> None:
+        self.stages[stage]["parse_failures"] += 1
+
+    def record_escalation(self, stage: str, reason: str) -> None:
+        self.stages[stage]["escalations"] += 1
+        self.escalation_reasons.append({"stage": stage, "reason": reason})
+
+    def record_repair(self, stage: str, kind: str, elements: int) -> None:
+        """A stage output that failed schema validation and was fixed (salvaged, normalized or re-requested)."""
+        self.stages[stage]["repairs"] += 1
+        self.repair_kinds.append({"stage": stage, "kind": kind, "elements": elements})
+
+    def record_url_resolution(self, seconds: float) -> None:
+        self.url_resolutions.append(seconds)
+
+    def record_prompt(self, stage: str, instruction_tokens: int, context_tokens: int, scoped_out_tokens: int) -> None:
+        """Estimated size of one model request, split into the static instruction and the per-call context."""
+        self.prompts.append({"stage": stage, "instruction_tokens": instruction_tokens,
+                             "context_tokens": context_tokens, "scoped_out_tokens": scoped_out_tokens})
+
+    def record_verdict(self) -> None:
+        """Marks a verdict delivered to the caller; the first one gives the run's time to first verdict."""
+        if self.first_verdict_at is None:
+            self.first_verdict_at = time.perf_counter()
+
+    def finish(self) -> None:
+        self.ended_at = time.perf_counter()
+
+    def summary(self) -> dict:
+        """JSON-serializable view with durations in seconds relative to the run start."""
+        stages = {}
+        for name, record in self.stages.items():
+            started = record["started_at"] or record["first_event_at"]
+            stages[name] = {
+                "wall_seconds": round(record["ended_at"] - started, 4) if started and record["ended_at"] else None,
+                "time_to_first_event_seconds": (
+                    round(record["first_event_at"] - started, 4) if started and record["first_event_at"] else None),
+                **{key: record[key] for key in (
+                    "invocations", "model_calls", "prompt_tokens", "cached_prompt_tokens", "completion_tokens",
+                    "retries", "model_errors", "parse_failures", "escalations", "repairs")},
+            }
+        return {
+            "run_id": self.run_id,
+            "timestamp": time.time(),
+            "total_seconds": round((self.ended_at or time.perf_counter()) - self.started_at, 4),
+            "time_to_first_verdict_seconds": (
+                round(self.first_verdict_at - self.started_at, 4) if self.first_verdict_at else None),
+            "stages": stages,
+            "escalations": self.escalation_reasons,
+            "repairs": self.repair_kinds,
+            "prompts": self.prompts,
+            "url_resolution": {
+                "count": len(self.url_resolutions),
+                "total_seconds": round(sum(self.url_resolutions), 4),
+                "max_seconds": round(max(self.url_resolutions), 4) if self.url_resolutions else 0.0,
+            },
+        }
+
+
+def format_summary_table(summary: dict) -> str:
+    """Per-run summary table for the console."""
+    header = f"{'stage':<32} {'wall s':>8} {'ttfe s':>8} {'calls':>6} {'prompt':>8} {'compl.':>8} {'retry':>6} {'parse!':>6} {'esc.':>5} {'rep.':>5}"
+    lines = [header, "-" * len(header)]
+    for name, stage in summary["stages"].items():
+        wall = f"{stage['wall_seconds']:.2f}" if stage["wall_seconds"] is not None else "-"
+        ttfe = f"{stage['time_to_first_event_seconds']:.2f}" if stage["time_to_first_event_seconds"] is not None else "-"
+        lines.append(
+            f"{name:<32} {wall:>8} {ttfe:>8} {stage['model_calls']:>6} {stage['prompt_tokens']:>8} "
+            f"{stage['completion_tokens']:>8} {stage['retries']:>6} {stage['parse_failures']:>6} {stage['escalations']:>5} {stage.get('repairs', 0):>5}"
+        )
+    prompts = summary.get("prompts") or []
+    if prompts:
+        lines.append(f"Prompt estimate: {len(prompts)} requests, "
+                     f"{sum(p['instruction_tokens'] for p in prompts)} instruction + "
+                     f"{sum(p['context_tokens'] for p in prompts)} context tokens, "
+                     f"{sum(p['scoped_out_tokens'] for p in prompts)} scoped out")
+    urls = summary["url_resolution"]
+    first_verdict = summary.get("time_to_first_verdict_seconds")
+    lines.append(f"URL resolution: {urls['count']} lookups, {urls['total_seconds']:.2f}s total, "
+                 f"{urls['max_seconds']:.2f}s max | first verdict "
+                 f"{f'{first_verdict:.2f}s' if first_verdict is not None else '-'} | run total {summary['total_seconds']:.2f}s")
+    return "\n".join(lines)
+
+
+class MetricsExporter:
+    """Appends per-run JSON log lines and keeps a cumulative Prometheus text-format file up to date."""
+
+    def __init__(self, json_log_path: str | None = "./factcheck_metrics.jsonl",
+                 prometheus_path: str | None = "./factcheck_metrics.prom", extra_prometheus=()):
+        self.json_log_path = json_log_path
+        self.prometheus_path = prometheus_path
+        # Callables returning extra Prometheus text appended on every write (e.g. live rate limiter gauges)
+        self.extra_prometheus = list(extra_prometheus)
+        self.runs_total = 0
+        self.stage_totals: dict[str, dict] = defaultdict(lambda: defaultdict(float))
+        self.url_seconds_sum = 0.0
+        self.url_count = 0
+        self.first_verdict_seconds_sum = 0.0
+        self.first_verdict_count = 0
+
+    def export(self, summary: dict) -> None:
+        if self.json_log_path:
+            with open(self.json_log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        self.runs_total += 1
+        for name, stage in summary["stages"].items():
+            totals = self.stage_totals[name]
+            if stage["wall_seconds"] is not None:
+                totals["seconds_sum"] += stage["wall_seconds"]
+                totals["seconds_count"] += 1
+            for key in ("model_calls", "prompt_tokens", "cached_prompt_tokens", "completion_tokens", "retries",
+                        "model_errors", "parse_failures", "escalations", "repairs"):
+                totals[key] += stage.get(key, 0)
+        self.url_seconds_sum += summary["url_resolution"]["total_seconds"]
+        self.url_count += summary["url_resolution"]["count"]
+        if summary.get("time_to_first_verdict_seconds") is not None:
+            self.first_verdict_seconds_sum += summary["time_to_first_verdict_seconds"]
+            self.first_verdict_count += 1
+        if self.prometheus_path:
+            self.write_prometheus()
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP factcheck_runs_total Completed fact-checking pipeline runs.",
+            "# TYPE factcheck_runs_total counter",
+            f"factcheck_runs_total {self.runs_total}",
+            "# HELP factcheck_stage_seconds Wall time per pipeline stage.",
+            "# TYPE factcheck_stage_seconds summary",
+        ]
+        for name, totals in self.stage_totals.items():
+            lines.append(f'factcheck_stage_seconds_sum{{stage="{name}"}} {totals["seconds_sum"]:.6f}')
+            lines.append(f'factcheck_stage_seconds_count{{stage="{name}"}} {int(totals["seconds_count"])}')
+        counters = {
+            "model_calls": "Model calls per stage.",
+            "prompt_tokens": "Prompt tokens per stage.",
+            "cached_prompt_tokens": "Prompt tokens served from the provider's context or prefix cache per stage.",
+            "completion_tokens": "Completion tokens per stage.",
+            "retries": "Model call retries per stage.",
+            "model_errors": "Model calls that returned an error per stage.",
+            "parse_failures": "Stage outputs that could not be parsed as JSON.",
+            "escalations": "Model cascade escalations to a bigger model per stage.",
+            "repairs": "Stage outputs that failed schema validation and were repaired per stage.",
+        }
+        for key, help_text in counters.items():
+            lines.append(f"# HELP factcheck_stage_{key}_total {help_text}")
+            lines.append(f"# TYPE factcheck_stage_{key}_total counter")
+            for name, totals in self.stage_totals.items():
+                lines.append(f'factcheck_stage_{key}_total{{stage="{name}"}} {int(totals[key])}')
+        lines += [
+            "# HELP factcheck_url_resolution_seconds Time spent resolving evidence source URLs.",
+            "# TYPE factcheck_url_resolution_seconds summary",
+            f"factcheck_url_resolution_seconds_sum {self.url_seconds_sum:.6f}",
+            f"factcheck_url_resolution_seconds_count {self.url_count}",
+            "# HELP factcheck_first_verdict_seconds Time from run start to the first verdict delivered.",
+            "# TYPE factcheck_first_verdict_seconds summary",
+            f"factcheck_first_verdict_seconds_sum {self.first_verdict_seconds_sum:.6f}",
+            f"factcheck_first_verdict_seconds_count {self.first_verdict_count}",
+        ]
+        return "\n".join(lines) + "\n" + "".join(extra() for extra in self.extra_prometheus)
+
+    def write_prometheus(self) -> None:
+        temp_path = f"{self.prometheus_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, self.prometheus_path)
+
+
+def instrument_agent(agent) -> None:
+    """Adds timing, token and parse-failure observers to an agent; they record into `current_run_metrics`."""
+    output_key = getattr(agent, "output_key", None)
+
+    def on_agent_start(callback_context: CallbackContext):
+        metrics = current_run_metrics.get()
+        if metrics:
+            metrics.stage_started(agent.name)
+        return None
+
+    def on_agent_end(callback_context: CallbackContext):
+        metrics = current_run_metrics.get()
+        if metrics:
+            metrics.stage_ended(agent.name)
+            value = callback_context.state.get(output_key) if output_key else None
+            if isinstance(value, str) and clean_and_parse_json(value) is None:
+                metrics.record_parse_failure(agent.name)
+        return None
+
+    def on_model_request(callback_context: CallbackContext, llm_request: LlmRequest):
+        current_model_stage.set(agent.name)
+        return None
+
+    def on_model_response(callback_context: CallbackContext, llm_response: LlmResponse):
+        metrics = current_run_metrics.get()
+        if metrics and not llm_response.partial:
+            metrics.model_call(agent.name, llm_response)
+        return None
+
+    add_callback(agent, "before_agent_callback", on_agent_start, first=True)
+    add_callback(agent, "after_agent_callback", on_agent_end, first=True)
+    if hasattr(agent, "after_model_callback"):
+        add_callback(agent, "before_model_callback", on_model_request, first=True)
+        add_callback(agent, "after_model_callback", on_model_response, first=True)
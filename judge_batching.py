@@ -0,0 +1,176 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from helpers import clean_and_parse_json, estimate_tokens, normalize_claim_key
+from instrumentation import current_run_metrics
+from schemas import VERDICT_STATUSES, claim_evidence
+from subrun import SubRunner
+
+JUDGE_BATCH_APP_NAME = "judge_micro_batches"
+# Estimated response tokens per verdict beyond the claim text itself (status, reasoning, confidence)
+VERDICT_OUTPUT_TOKENS = 80
+
+
+def estimated_claim_tokens(claim: dict, evidence: dict) -> int:
+    """Prompt plus expected response tokens for judging one claim."""
+    prompt = estimate_tokens(json.dumps(claim, ensure_ascii=False)) + estimate_tokens(json.dumps(evidence, ensure_ascii=False))
+    return prompt + estimate_tokens(claim.get("contextualized_claim") or "") + VERDICT_OUTPUT_TOKENS
+
+
+def plan_batches(claims: list[dict], evidence: dict, max_tokens: int) -> list[list[int]]:
+    """Groups claim indexes, in order, into batches whose estimated tokens stay under `max_tokens`."""
+    batches, current, used = [], [], 0
+    for index, claim in enumerate(claims):
+        cost = estimated_claim_tokens(claim, claim_evidence(claim, evidence))
+        if current and used + cost > max_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def full_verdict(claim: dict, evidence: dict, verdict: dict) -> dict:
+    """A complete result item: the model's verdict plus the fields echoed from the claim and its evidence.
+
+    The item is flagged `placeholder` when the verdict or the evidence it was judged on is one.
+    """
+    item = {
+        "original_statement": claim.get("original_statement", ""),
+        "claim": claim.get("contextualized_claim", ""),
+        "status": verdict.get("status"),
+        "reasoning": verdict.get("reasoning", ""),
+        "evidence_summary": evidence.get("evidence_summary", ""),
+        "sources": evidence.get("sources", []) if isinstance(evidence.get("sources"), list) else [],
+        "search_query": evidence.get("search_query", ""),
+        "confidence": verdict.get("confidence"),
+    }
+    if verdict.get("placeholder") is True or evidence.get("placeholder") is True:
+        item["placeholder"] = True
+    return item
+
+
+def match_verdicts(batch: list[tuple[str, dict]], verdicts: list) -> dict[str, dict]:
+    """Maps batch claim ids to the model's verdicts by echoed id, else claim text, else position."""
+    by_id = {verdict.get("id"): verdict for verdict in verdicts if isinstance(verdict, dict) and verdict.get("id")}
+    by_text = {normalize_claim_key(verdict.get("claim") or ""): verdict for verdict in verdicts if isinstance(verdict, dict)}
+    positional = len(verdicts) == len(batch)
+    matched = {}
+    for position, (claim_id, claim) in enumerate(batch):
+        verdict = by_id.get(claim_id) or by_text.get(normalize_claim_key(claim.get("contextualized_claim") or ""))
+        if verdict is None and positional and isinstance(verdicts[position], dict):
+            verdict = verdicts[position]
+        # An invalid status counts as unjudged, so only that claim is re-requested
+        if verdict is not None and verdict.get("status") in VERDICT_STATUSES:
+            matched[claim_id] = verdict
+    return matched
+
+
+class MicroBatchedJudgeAgent(BaseAgent):
+    """Judges claims in token-budgeted micro-batches run concurrently, then merges the verdicts in claim order.
+
+    The judge model only writes each verdict (status, reasoning, confidence); the original statement,
+    evidence summary, sources and search query are copied from state rather than regenerated. A batch
+    whose response is unusable or incomplete is split and retried, so one truncated response costs a
+    few claims at most. Each batch's verdicts are also emitted as a partial event once it finishes.
+    """
+
+    judge_agent: BaseAgent
+    max_batch_tokens: int = 3000
+    max_concurrency: int = 4
+    output_key: str = "final_results"
+
+    async def _judge(self, sub_runner: SubRunner, user_id: str, batch: list[tuple[str, dict]],
+                     evidence: dict) -> dict[str, dict]:
+        """Verdicts for one batch keyed by claim id, splitting the batch when claims come back unjudged."""
+        claims_analysis = {"verifiable_claims": [{"id": claim_id, **claim} for claim_id, claim in batch]}
+        batch_evidence = {claim.get("contextualized_claim"): claim_evidence(claim, evidence) for _, claim in batch}
+        payload = json.dumps({"claims_analysis": claims_analysis, "google_search_results": batch_evidence},
+                             ensure_ascii=False)
+        # The sub-run's state holds the batch as the pipeline state would: a judge cascade checks it for unjudged
+        # claims, and prompt scoping builds the judge's message from both fields instead of the payload
+        state = {"claims": json.dumps(claims_analysis, ensure_ascii=False),
+                 "google_search_results": json.dumps(batch_evidence, ensure_ascii=False)}
+        try:
+            parsed = clean_and_parse_json(await sub_runner.run(user_id, payload, state))
+        except Exception as e:
+            print(f"\n(Warning: Judge batch of {len(batch)} claims failed: {e})")
+            parsed = None
+        verdicts = parsed.get("fact_check_results") if isinstance(parsed, dict) else None
+        matched = match_verdicts(batch, verdicts) if isinstance(verdicts, list) else {}
+        missing = [(claim_id, claim) for claim_id, claim in batch if claim_id not in matched]
+        if not missing:
+            return matched
+        if len(batch) == 1:
+            print(f"\n(Warning: No usable verdict for claim '{batch[0][1].get('contextualized_claim')}')")
+            return matched
+        # Retry only the unjudged claims, halved, so a truncated response doesn't repeat the same failure
+        metrics = current_run_metrics.get()
+        if metrics:
+            metrics.record_repair(self.name, "rerequested", len(missing))
+        half = max(1, len(missing) // 2)
+        for retried in await asyncio.gather(*(self._judge(sub_runner, user_id, part, evidence)
+                                              for part in (missing[:half], missing[half:]) if part)):
+            matched.update(retried)
+        return matched
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        claims = clean_and_parse_json(ctx.session.state.get("claims"))
+        verifiable_claims = [claim for claim in (claims.get("verifiable_claims", []) if isinstance(claims, dict) else [])
+                             if isinstance(claim, dict)]
+        evidence = clean_and_parse_json(ctx.session.state.get("google_search_results"))
+        evidence = evidence if isinstance(evidence, dict) else {}
+
+        sub_runner = SubRunner(self.judge_agent, JUDGE_BATCH_APP_NAME)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        batches = plan_batches(verifiable_claims, evidence, self.max_batch_tokens)
+
+        async def judge_batch(indexes: list[int]) -> tuple[list[int], dict[str, dict]]:
+            async with semaphore:
+                batch = [(f"c{index + 1}", verifiable_claims[index]) for index in indexes]
+                return indexes, await self._judge(sub_runner, ctx.session.user_id, batch, evidence)
+
+        metrics = current_run_metrics.get()
+        results: list[dict | None] = [None] * len(verifiable_claims)
+        streamed = 0
+        for finished in asyncio.as_completed([judge_batch(indexes) for indexes in batches]):
+            indexes, matched = await finished
+            fresh = []
+            for index in indexes:
+                verdict = matched.get(f"c{index + 1}")
+                claim = verifiable_claims[index]
+                if verdict is None:
+                    if metrics:
+                        metrics.record_repair(self.name, "placeholder", 1)
+                    verdict = {"status": "Unsubstantiated", "confidence": 0.0, "placeholder": True,
+                               "reasoning": "The judge returned no usable verdict for this claim."}
+                results[index] = full_verdict(claim, claim_evidence(claim, evidence), verdict)
+                fresh.append(results[index])
+            # Partial events form one streamed JSON document, so verdict streaming sees each batch as it lands
+            chunk = ", ".join(json.dumps(item, ensure_ascii=False) for item in fresh)
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                partial=True,
+                content=types.Content(role="model", parts=[types.Part(
+                    text=('{"fact_check_results": [' if streamed == 0 else ", ") + chunk)]),
+            )
+            streamed += 1
+
+        merged_text = json.dumps({"fact_check_results": results}, ensure_ascii=False, indent=2)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=merged_text)]),
+            actions=EventActions(state_delta={self.output_key: merged_text}),
+        )
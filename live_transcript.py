@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import deque
+
+from helpers import SENTENCE_BOUNDARY, normalize_claim_key, split_sentences
+
+# Nothing here imports agent at module level, so the CLI can construct sessions before the pipeline is built.
+
+# --- Constants ---
+# Already-checked sentences shown before the new ones so claims can be contextualized (e.g. "esto", "ellos")
+LIVE_CONTEXT_SENTENCES = int(os.environ.get("LIVE_CONTEXT_SENTENCES", "8"))
+# Segments checked at once per transcript; sentences arriving meanwhile are coalesced into the next segment
+LIVE_MAX_CONCURRENCY = int(os.environ.get("LIVE_MAX_CONCURRENCY", "2"))
+# Sentence fingerprints and reported claims remembered per transcript; the oldest are forgotten first
+LIVE_MAX_FINGERPRINTS = int(os.environ.get("LIVE_MAX_FINGERPRINTS", "100000"))
+LIVE_USER_ID = "political_dept_live"
+SENTENCE_END_CHARS = ".!?…"
+
+
+def sentence_fingerprint(sentence: str) -> str:
+    """Case and whitespace insensitive id of a sentence, so re-sent or reformatted text is recognized."""
+    return hashlib.sha256(normalize_claim_key(sentence).encode("utf-8")).hexdigest()[:16]
+
+
+def split_complete(text: str) -> tuple[str, str]:
+    """Splits text into its complete sentences and the unfinished sentence after them."""
+    stripped = text.rstrip()
+    if stripped and (stripped[-1] in SENTENCE_END_CHARS or text[len(stripped):].count("\n") >= 2):
+        return stripped, ""
+    last_boundary = None
+    for last_boundary in SENTENCE_BOUNDARY.finditer(text):
+        pass
+    if last_boundary is None:
+        return "", text
+    return text[:last_boundary.start()], text[last_boundary.end():]
+
+
+def segment_text(context: list[str], sentences: list[str]) -> str:
+    """Pipeline input for one segment: the rolling context, marked as already checked, then the new sentences."""
+    new_text = " ".join(sentences)
+    if not context:
+        return new_text
+    return ("[Earlier in the transcript, for context only; its claims were already checked]\n"
+            f"{' '.join(context)}\n\n[New text to check]\n{new_text}")
+
+
+class LiveTranscript:
+    """Fact-checks a transcript while it is being delivered, running the pipeline only on new sentences.
+
+    Text is fed with `append` (new text only) or `update` (the whole transcript so far). Complete
+    sentences whose fingerprint hasn't been seen are queued and checked in segments, each one a
+    single pipeline run over just those sentences plus a bounded window of earlier context; the
+    unfinished last sentence waits for more text. Claims already reported for the context sentences are
+    dropped right after extraction, so only new claims are searched and judged. Verdicts are delivered
+    through `events()` as each segment's run streams them, once per claim for the whole transcript.
+    """
+
+    def __init__(self, document_id: str, context_sentences: int = LIVE_CONTEXT_SENTENCES,
+                 max_concurrency: int = LIVE_MAX_CONCURRENCY, max_fingerprints: int = LIVE_MAX_FINGERPRINTS):
+        self.document_id = document_id
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_fingerprints = max_fingerprints
+        self.tail = ""
+        # (sentence, segment that checked it)
+        self.context: deque[tuple[str, int]] = deque(maxlen=context_sentences)
+        # Insertion ordered, so the oldest fingerprints are evicted first
+        self.fingerprints: dict[str, None] = {}
+        self.pending: list[tuple[str, float]] = []
+        # Bounded like the fingerprints, so a transcript that runs for days doesn't keep every claim
+        self.emitted_claims: dict[str, None] = {}
+        # Claims reported per segment, kept while the segment's sentences are still in the context window
+        self.segment_claims: dict[int, list[str]] = {}
+        self.running: set[asyncio.Task] = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.segments = 0
+        self.stats = {"sentences_received": 0, "sentences_checked": 0, "sentences_skipped": 0,
+                      "segments": 0, "failed_segments": 0, "verdicts": 0, "duplicate_verdicts": 0}
+
+    # --- Input ---
+    def append(self, text: str) -> int:
+        """Adds newly delivered text; returns how many new sentences were queued for checking."""
+        complete, self.tail = split_complete(self.tail + text)
+        return self._ingest(complete)
+
+    def update(self, full_text: str) -> int:
+        """Takes the whole transcript so far; sentences already seen are skipped by fingerprint."""
+        complete, self.tail = split_complete(full_text)
+        return self._ingest(complete)
+
+    def _ingest(self, text: str) -> int:
+        received_at = time.perf_counter()
+        queued = 0
+        for sentence in split_sentences(text):
+            self.stats["sentences_received"] += 1
+            fingerprint = sentence_fingerprint(sentence)
+            if fingerprint in self.fingerprints:
+                self.stats["sentences_skipped"] += 1
+                continue
+            self.fingerprints[fingerprint] = None
+            if len(self.fingerprints) > self.max_fingerprints:
+                del self.fingerprints[next(iter(self.fingerprints))]
+            self.pending.append((sentence, received_at))
+            queued += 1
+        self._dispatch()
+        return queued
+
+    # --- Checking ---
+    def _dispatch(self) -> None:
+        """Starts a segment over every pending sentence while fewer than max_concurrency are running."""
+        while self.pending and len(self.running) < self.max_concurrency:
+            sentences = [sentence for sentence, _ in self.pending]
+            received_at = self.pending[0][1]
+            self.pending = []
+            context = list(self.context)
+            self.segments += 1
+            self.context.extend((sentence, self.segments) for sentence in sentences)
+            # Segments that left the window before this one's context can no longer be known claims
+            oldest = context[0][1] if context else self.segments
+            for segment in [segment for segment in self.segment_claims if segment < oldest]:
+                del self.segment_claims[segment]
+            known_claims = [claim_key for segment in sorted({segment for _, segment in context})
+                            for claim_key in self.segment_claims.get(segment, [])]
+            task = asyncio.create_task(self._check_segment(
+                self.segments, [sentence for sentence, _ in context], sentences, received_at, known_claims))
+            self.running.add(task)
+            task.add_done_callback(self._segment_done)
+
+    def _segment_done(self, task: asyncio.Task) -> None:
+        self.running.discard(task)
+        self._dispatch()
+
+    async def _check_segment(self, segment: int, context: list[str], sentences: list[str], received_at: float,
+                             known_claims: list[str] = ()) -> None:
+        from agent import stream_fact_check
+
+        session_id = f"factcheck_live_{self.document_id}_{segment}_{time.monotonic_ns()}"
+        results = None
+        try:
+            async for event in stream_fact_check(segment_text(context, sentences), LIVE_USER_ID, session_id,
+                                                 document_id=self.document_id, known_claims=known_claims):
+                if event["type"] == "done":
+                    results = event["results"]
+                    continue
+                claim_key = normalize_claim_key(event["result"].get("claim") or "")
+                if claim_key in self.emitted_claims and not event["revised"]:
+                    # Context claims only reach known_claims once their segment has reported them; the rest end here
+                    self.stats["duplicate_verdicts"] += 1
+                    continue
+                if self.emitted_claims.pop(claim_key, False) is False:
+                    self.segment_claims.setdefault(segment, []).append(claim_key)
+                self.emitted_claims[claim_key] = None
+                if len(self.emitted_claims) > self.max_fingerprints:
+                    del self.emitted_claims[next(iter(self.emitted_claims))]
+                self.stats["verdicts"] += 1
+                self.queue.put_nowait({**event, "segment": segment,
+                                       "lag_seconds": round(time.perf_counter() - received_at, 4)})
+        except Exception as e:
+            print(f"❌ Live segment {segment} of '{self.document_id}' failed: {e}")
+        self.stats["segments"] += 1
+        self.stats["failed_segments"] += results is None
+        self.stats["sentences_checked"] += len(sentences)
+        self.queue.put_nowait({"type": "segment", "segment": segment, "sentences": len(sentences),
+                               "status": "ok" if results is not None else "failed",
+                               "lag_seconds": round(time.perf_counter() - received_at, 4)})
+
+    async def close(self) -> None:
+        """Checks the unfinished last sentence too, waits for every segment, then ends `events()`."""
+        if self.tail.strip():
+            tail, self.tail = self.tail, ""
+            self._ingest(tail)
+        while self.running or self.pending:
+            if self.running:
+                await asyncio.wait(set(self.running))
+            self._dispatch()
+        self.queue.put_nowait({"type": "closed", "document_id": self.document_id, **self.stats})
+
+    async def events(self):
+        """Verdict and segment events as they happen, ending with a "closed" event after `close()`."""
+        while True:
+            event = await self.queue.get()
+            yield event
+            if event["type"] == "closed":
+                return
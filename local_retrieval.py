@@ -0,0 +1,256 @@
+import csv
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from helpers import split_sentences, tune_sqlite
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+PASSAGE_MAX_CHARS = 800
+SNIPPET_MAX_CHARS = 320
+# Numbers keep their decimal part ("6,9%" and "6.9%" both index as "6.9"), everything else splits on non-word characters
+TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|[^\W\d_]+")
+STOPWORDS = frozenset((
+    "a al con de del el en es la las lo los para por que se su sus un una y "
+    "an and are as at be by for from in is it of on or that the this to was were with"
+).split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, accent-free terms; decimal commas become points so numbers match across formats."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [token.replace(",", ".") for token in TOKEN_PATTERN.findall(plain) if token not in STOPWORDS]
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_MAX_CHARS) -> list[str]:
+    """Groups consecutive sentences into passages of at most max_chars (longer sentences stay whole)."""
+    passages, current = [], []
+    for sentence in split_sentences(text):
+        if current and sum(len(s) + 1 for s in current) + len(sentence) > max_chars:
+            passages.append(" ".join(current))
+            current = []
+        current.append(sentence)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def table_passages(path: Path) -> list[str]:
+    """One passage per row of a CSV/TSV statistics table, each cell labelled with its column header."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f, delimiter="\t" if path.suffix == ".tsv" else ","))
+    if not rows:
+        return []
+    header, body = rows[0], rows[1:]
+    return ["; ".join(f"{column}: {cell}" for column, cell in zip(header, row) if cell.strip())
+            for row in body if any(cell.strip() for cell in row)]
+
+
+def snippet(text: str, query_terms: set[str], max_chars: int = SNIPPET_MAX_CHARS) -> str:
+    """The sentence covering most query terms, extended with its neighbours while under max_chars."""
+    sentences = split_sentences(text) or [text]
+    coverage = [len(query_terms.intersection(tokenize(sentence))) for sentence in sentences]
+    best = max(range(len(sentences)), key=lambda i: coverage[i])
+    start, end = best, best + 1
+    while True:
+        length = sum(len(s) + 1 for s in sentences[start:end])
+        if end < len(sentences) and length + len(sentences[end]) <= max_chars:
+            end += 1
+        elif start > 0 and length + len(sentences[start - 1]) <= max_chars:
+            start -= 1
+        else:
+            break
+    text = " ".join(sentences[start:end])
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + " …"
+    return ("… " if start > 0 else "") + text + (" …" if end < len(sentences) and not text.endswith("…") else "")
+
+
+class LocalEvidenceIndex:
+    """BM25 index over a local evidence corpus (reports, statistics tables, past articles).
+
+    SQLite holds the documents and their passages; the inverted index lives in memory, is rebuilt
+    from SQLite on open and is kept in step with every incremental add or removal, so queries never
+    touch the database.
+    """
+
+    def __init__(self, db_path: str = "./local_evidence.db", rerank_model: str | None = None):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        tune_sqlite(self.conn)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS evidence_documents ("
+            " doc_id TEXT PRIMARY KEY, source TEXT NOT NULL, title TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL, indexed_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS evidence_passages ("
+            " passage_id INTEGER PRIMARY KEY AUTOINCREMENT, doc_id TEXT NOT NULL, text TEXT NOT NULL, terms TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS evidence_passages_doc ON evidence_passages (doc_id)")
+        self.conn.commit()
+        self.postings: dict[str, dict[int, int]] = {}
+        self.passages: dict[int, tuple[str, str, int]] = {}  # passage_id -> (doc_id, text, length)
+        self.documents: dict[str, tuple[str, str]] = {}  # doc_id -> (source, title)
+        self.total_length = 0
+        self.rerank_model = rerank_model
+        self._encoder = None
+        for doc_id, source, title in self.conn.execute("SELECT doc_id, source, title FROM evidence_documents"):
+            self.documents[doc_id] = (source, title)
+        for passage_id, doc_id, text, terms in self.conn.execute(
+                "SELECT passage_id, doc_id, text, terms FROM evidence_passages"):
+            self._index_passage(passage_id, doc_id, text, json.loads(terms))
+
+    def _index_passage(self, passage_id: int, doc_id: str, text: str, counts: dict[str, int]) -> None:
+        length = sum(counts.values())
+        self.passages[passage_id] = (doc_id, text, length)
+        self.total_length += length
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[passage_id] = count
+
+    def _unindex_document(self, doc_id: str) -> None:
+        for passage_id, terms in self.conn.execute(
+                "SELECT passage_id, terms FROM evidence_passages WHERE doc_id = ?", (doc_id,)).fetchall():
+            _, _, length = self.passages.pop(passage_id)
+            self.total_length -= length
+            for term in json.loads(terms):
+                entries = self.postings.get(term)
+                if entries is not None:
+                    entries.pop(passage_id, None)
+                    if not entries:
+                        del self.postings[term]
+
+    # --- Incremental Updates ---
+    def add_document(self, doc_id: str, text: str, source: str, title: str = "",
+                     passages: list[str] | None = None) -> bool:
+        """Indexes or re-indexes a document; returns False if it is already indexed with the same content."""
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        row = self.conn.execute("SELECT content_hash FROM evidence_documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row and row[0] == content_hash:
+            return False
+        with self.conn:
+            if row:
+                self._unindex_document(doc_id)
+                self.conn.execute("DELETE FROM evidence_passages WHERE doc_id = ?", (doc_id,))
+            self.conn.execute("INSERT OR REPLACE INTO evidence_documents VALUES (?, ?, ?, ?, ?)",
+                              (doc_id, source, title or doc_id, content_hash, time.time()))
+            for passage in passages if passages is not None else split_passages(text):
+                counts = dict(Counter(tokenize(f"{title} {passage}")))
+                cursor = self.conn.execute("INSERT INTO evidence_passages (doc_id, text, terms) VALUES (?, ?, ?)",
+                                           (doc_id, passage, json.dumps(counts, ensure_ascii=False)))
+                self._index_passage(cursor.lastrowid, doc_id, passage, counts)
+        self.documents[doc_id] = (source, title or doc_id)
+        return True
+
+    def remove_document(self, doc_id: str) -> bool:
+        if doc_id not in self.documents:
+            return False
+        with self.conn:
+            self._unindex_document(doc_id)
+            self.conn.execute("DELETE FROM evidence_passages WHERE doc_id = ?", (doc_id,))
+            self.conn.execute("DELETE FROM evidence_documents WHERE doc_id = ?", (doc_id,))
+        del self.documents[doc_id]
+        return True
+
+    def add_path(self, path: str) -> tuple[int, int]:
+        """Indexes .txt/.md files, .csv/.tsv tables and .jsonl records ({'id', 'text', 'source', 'title'}) under a path.
+
+        Returns (documents indexed, documents unchanged).
+        """
+        root = Path(path)
+        files = sorted(p for p in root.rglob("*") if p.is_file()) if root.is_dir() else [root]
+        indexed = unchanged = 0
+        for file in files:
+            if file.suffix == ".jsonl":
+                with open(file, "r", encoding="utf-8") as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+                for number, record in enumerate(records, start=1):
+                    if not isinstance(record, dict) or not record.get("text"):
+                        continue
+                    doc_id = str(record.get("id", f"{file}:{number}"))
+                    added = self.add_document(doc_id, record["text"], record.get("source") or str(file),
+                                              record.get("title", ""))
+                    indexed, unchanged = indexed + added, unchanged + (not added)
+                continue
+            if file.suffix in (".csv", ".tsv"):
+                rows = table_passages(file)
+                added = self.add_document(str(file), "\n".join(rows), str(file), file.stem, passages=rows)
+            elif file.suffix in (".txt", ".md"):
+                added = self.add_document(str(file), file.read_text(encoding="utf-8"), str(file), file.stem)
+            else:
+                continue
+            indexed, unchanged = indexed + added, unchanged + (not added)
+        return indexed, unchanged
+
+    # --- Queries ---
+    def search(self, query: str, top_k: int = 5) -> list[dict]:
+        """Top passages by BM25 (optionally reranked by embedding similarity), with a snippet around the query terms."""
+        terms = set(tokenize(query))
+        count = len(self.passages)
+        if not terms or not count:
+            return []
+        average_length = self.total_length / count
+        scores: dict[int, float] = {}
+        for term in terms:
+            entries = self.postings.get(term)
+            if not entries:
+                continue
+            idf = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            for passage_id, tf in entries.items():
+                norm = K1 * (1 - B + B * self.passages[passage_id][2] / average_length)
+                scores[passage_id] = scores.get(passage_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        candidates = sorted(scores, key=scores.get, reverse=True)[:top_k * 4 if self.rerank_model else top_k]
+        if self.rerank_model and candidates:
+            candidates = self._rerank(query, candidates)
+        results = []
+        for passage_id in candidates[:top_k]:
+            doc_id, text, _ = self.passages[passage_id]
+            source, title = self.documents[doc_id]
+            results.append({"source": source, "title": title, "snippet": snippet(text, terms),
+                            "score": round(scores[passage_id], 3)})
+        return results
+
+    def _rerank(self, query: str, candidates: list[int]) -> list[int]:
+        """Reorders BM25 candidates by cosine similarity from a local sentence-embedding model (CPU)."""
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                print("(Warning: sentence-transformers is not installed; local evidence results are not reranked)")
+                self.rerank_model = None
+                return candidates
+            self._encoder = SentenceTransformer(self.rerank_model, device="cpu")
+        vectors = self._encoder.encode([query] + [self.passages[p][1] for p in candidates], normalize_embeddings=True)
+        similarities = vectors[1:] @ vectors[0]
+        return [passage for _, passage in sorted(zip(similarities.tolist(), candidates), reverse=True)]
+
+    def stats(self) -> dict:
+        return {"documents": len(self.documents), "passages": len(self.passages), "terms": len(self.postings)}
+
+
+def make_search_tool(index: LocalEvidenceIndex, top_k: int = 5):
+    """Wraps the index as a function tool the evidence agent can call in place of google_search."""
+
+    def local_evidence_search(query: str) -> dict:
+        """Searches the local corpus of official reports, statistics tables and past articles.
+
+        Args:
+            query: Search query for one claim, e.g. "Costa Rica unemployment rate INEC 2024".
+
+        Returns:
+            A dict with "results": the best matching passages, each with "source" (URL or file),
+            "title", "snippet" and a relevance "score".
+        """
+        return {"results": index.search(query, top_k)}
+
+    return local_evidence_search
+
@@ -0,0 +1,132 @@
+import json
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from helpers import clean_and_parse_json, content_text, estimate_tokens, split_sentences
+from subrun import SubRunner
+
+PREFILTER_APP_NAME = "claim_extraction_prefiltered"
+
+# --- Check-Worthiness Signals (Spanish and English) ---
+PERCENT_PATTERN = re.compile(r"\d+(?:[.,]\d+)?\s*%|\bpor ciento\b|\bpercent\b", re.IGNORECASE)
+CURRENCY_PATTERN = re.compile(
+    r"[₡$€]|\b(?:colones|d[oó]lares|dollars|euros|usd|crc|millones|billones|millions?|billions?)\b", re.IGNORECASE)
+NUMERAL_PATTERN = re.compile(r"\d")
+DATE_PATTERN = re.compile(
+    r"\b(?:1[89]\d\d|20\d\d)\b|\b(?:enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|setiembre|octubre"
+    r"|noviembre|diciembre|january|february|march|april|june|july|august|september|october|november|december)\b",
+    re.IGNORECASE)
+ENTITY_PATTERN = re.compile(r"(?<!^)(?<![.!?¿¡]\s)\b[A-ZÁÉÍÓÚÑ][\wáéíóúñü]+(?:\s+(?:de|del|la|y)?\s*[A-ZÁÉÍÓÚÑ][\wáéíóúñü]+)*")
+SUPERLATIVE_PATTERN = re.compile(
+    r"\b(?:hist[oó]ric[oa]|r[eé]cord|m[aá]s (?:bajo|baja|alto|alta)|highest|lowest|record)\b", re.IGNORECASE)
+FUTURE_PATTERN = re.compile(
+    r"\b(?:vamos a|va a|queremos|prometemos|promete|podr[ií]amos|will|we promise|going to)\b|\b\w+(?:ará|erá|irá|drá)n?\b",
+    re.IGNORECASE)
+OPINION_PATTERN = re.compile(
+    r"\b(?:creo|me parece|nos parece|pareciera|considero|opino|inconcebible|nefast[oa]s?|absurd[oa]s?|reprocho"
+    r"|i think|we believe|great|terrible)\b", re.IGNORECASE)
+
+
+# (pattern, weight, signal name); entities are scored separately because they count per match.
+WEIGHTED_SIGNALS = [
+    (PERCENT_PATTERN, 3, "percentage"),
+    (CURRENCY_PATTERN, 3, "currency"),
+    (NUMERAL_PATTERN, 3, "numeral"),
+    (DATE_PATTERN, 2, "date"),
+    (SUPERLATIVE_PATTERN, 1, "superlative"),
+    (FUTURE_PATTERN, -1, "future"),
+    (OPINION_PATTERN, -1, "opinion"),
+]
+
+
+def score_sentence(sentence: str) -> tuple[float, list[str]]:
+    """Scores how check-worthy a sentence is and returns the signals that fired."""
+    score, signals = 0.0, []
+    for pattern, weight, name in WEIGHTED_SIGNALS:
+        if pattern.search(sentence):
+            score += weight
+            signals.append(name)
+    entities = ENTITY_PATTERN.findall(sentence)
+    if entities:
+        score += min(len(entities), 2)
+        signals.append("named_entity")
+    if sentence.rstrip().endswith("?"):
+        score -= 3
+        signals.append("question")
+    return score, signals
+
+
+def ignore_reason(signals: list[str]) -> str:
+    """Maps the signals of a dropped sentence onto the extraction prompt's ignore categories."""
+    if "question" in signals:
+        return "Rhetorical Question"
+    if "future" in signals:
+        return "Future Promise"
+    if "opinion" in signals:
+        return "Opinion"
+    return "Vague Statement"
+
+
+def prefilter_text(text: str, threshold: float = 2.0) -> dict:
+    """Splits text into sentences and keeps only check-worthy candidates for the LLM."""
+    candidates, ignored = [], []
+    for sentence in split_sentences(text):
+        score, signals = score_sentence(sentence)
+        if score >= threshold:
+            candidates.append(sentence)
+        else:
+            ignored.append({"statement": sentence, "reason": ignore_reason(signals)})
+    candidate_text = "\n\n".join(candidates)
+    tokens_in = estimate_tokens(text)
+    tokens_forwarded = estimate_tokens(candidate_text)
+    return {
+        "candidate_text": candidate_text,
+        "ignored_statements": ignored,
+        "stats": {
+            "sentences": len(candidates) + len(ignored),
+            "candidates": len(candidates),
+            "tokens_in": tokens_in,
+            "tokens_forwarded": tokens_forwarded,
+            "tokens_saved": tokens_in - tokens_forwarded,
+        },
+    }
+
+
+class PrefilteredExtractionAgent(BaseAgent):
+    """Runs the extraction stage on check-worthy sentences only and records the rest as ignored statements."""
+
+    extraction_stage: BaseAgent
+    threshold: float = 2.0
+    output_key: str = "claims"
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        prefiltered = prefilter_text(content_text(ctx.user_content), self.threshold)
+        stats = prefiltered["stats"]
+        print(f"  ...Pre-filter kept {stats['candidates']}/{stats['sentences']} sentences, "
+              f"saving ~{stats['tokens_saved']} input tokens")
+
+        claims = {"verifiable_claims": [], "ignored_statements": []}
+        if prefiltered["candidate_text"]:
+            sub_runner = SubRunner(self.extraction_stage, PREFILTER_APP_NAME)
+            extracted = clean_and_parse_json(await sub_runner.run(ctx.session.user_id, prefiltered["candidate_text"]))
+            if isinstance(extracted, dict):
+                claims = extracted
+                claims.setdefault("verifiable_claims", [])
+                claims.setdefault("ignored_statements", [])
+            else:
+                print("\n(Warning: Pre-filtered claim extraction output could not be parsed)")
+        claims["ignored_statements"] = claims["ignored_statements"] + prefiltered["ignored_statements"]
+        claims_text = json.dumps(claims, ensure_ascii=False, indent=2)
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=claims_text)]),
+            actions=EventActions(state_delta={self.output_key: claims_text, "prefilter_stats": stats}),
+        )
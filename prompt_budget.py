@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from google.genai import types
+
+from helpers import add_callback, clean_and_parse_json, estimate_tokens
+from instrumentation import current_run_metrics
+
+if TYPE_CHECKING:
+    from google.adk.agents.callback_context import CallbackContext
+    from google.adk.models import LlmRequest
+
+# LiteLLM providers whose APIs take explicit cache_control breakpoints; LiteLLM marks the system message for them.
+# Gemini and OpenAI cache repeated prefixes implicitly, so a stable instruction prefix is all they need.
+CACHE_CONTROL_PROVIDERS = ("anthropic", "bedrock", "vertex_ai")
+
+
+def prefix_cache_args(provider: str) -> dict:
+    """Extra LiteLlm arguments that turn on provider-side caching of the system instruction, if the provider has it."""
+    if provider not in CACHE_CONTROL_PROVIDERS:
+        return {}
+    return {"cache_control_injection_points": [{"location": "message", "role": "system"}]}
+
+
+def part_tokens(part) -> int:
+    if getattr(part, "text", None):
+        return estimate_tokens(part.text)
+    for field in ("function_call", "function_response"):
+        value = getattr(part, field, None)
+        if value is not None:
+            return estimate_tokens(json.dumps(getattr(value, "args", None) or getattr(value, "response", None) or {},
+                                              ensure_ascii=False, default=str))
+    return 0
+
+
+def contents_tokens(contents) -> int:
+    return sum(part_tokens(part) for content in contents or [] for part in content.parts or [])
+
+
+def instruction_text(llm_request: LlmRequest) -> str:
+    instruction = getattr(llm_request.config, "system_instruction", None) if llm_request.config else None
+    if instruction is None:
+        return ""
+    if isinstance(instruction, str):
+        return instruction
+    return "".join(part.text or "" for part in getattr(instruction, "parts", None) or [])
+
+
+def is_own_turn(content) -> bool:
+    """True for the tool calls and responses an agent makes during its own turn, which must stay in the request."""
+    return any(getattr(part, "function_call", None) or getattr(part, "function_response", None)
+               for part in content.parts or [])
+
+
+class PromptBudget:
+    """Measures prompt tokens per stage and call, scopes each agent's context to the state it needs.
+
+    With SequentialAgent every stage receives the whole conversation so far (the document, every
+    earlier stage's output); a scoped agent instead gets one message holding just its state fields,
+    compacted, ahead of its own tool calls. The instruction is left untouched so it stays a stable
+    prefix for provider-side caching; reuse of that prefix is also tracked locally as an estimate
+    of what such caching saves when the provider does not report cached tokens (provider-reported
+    cached tokens are counted per stage by the run metrics).
+    """
+
+    def __init__(self, max_prompt_tokens: int = 0, prefix_ttl_seconds: float = 300.0):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.prefix_ttl_seconds = prefix_ttl_seconds
+        self.stages: dict[str, dict] = defaultdict(lambda: defaultdict(int))
+        self._prefix_seen: dict[tuple[str, str], float] = {}
+
+    def attach(self, agent, state_fields: dict[str, str] | None = None) -> None:
+        """Adds the budget callbacks to an LlmAgent.
+
+        `state_fields` maps the state keys the agent needs to the headings they get in its message;
+        with a single field the value is sent on its own. The first key must be present in state for
+        scoping to apply, so sub-runs (which carry their input in the user message) are left alone.
+        """
+        def scope_and_measure(callback_context: CallbackContext, llm_request: LlmRequest):
+            # Cascade fallback tiers share these callbacks but report under their own names
+            stage = callback_context.agent_name
+            record = self.stages[stage]
+            scoped_out = 0
+            if state_fields and callback_context.state.get(next(iter(state_fields))) is not None:
+                sections = []
+                for key, heading in state_fields.items():
+                    value = callback_context.state.get(key)
+                    if value is None:
+                        continue
+                    parsed = clean_and_parse_json(value) if isinstance(value, str) else value
+                    text = json.dumps(parsed, ensure_ascii=False) if parsed is not None else str(value)
+                    sections.append(text if len(state_fields) == 1 else f"**{heading}:**\n{text}")
+                own_turn = next((i for i, content in enumerate(llm_request.contents) if is_own_turn(content)),
+                                len(llm_request.contents))
+                before = contents_tokens(llm_request.contents[:own_turn])
+                scoped = types.Content(role="user", parts=[types.Part(text="\n\n".join(sections))])
+                llm_request.contents[:own_turn] = [scoped]
+                scoped_out = max(0, before - contents_tokens([scoped]))
+
+            instruction = instruction_text(llm_request)
+            instruction_tokens = estimate_tokens(instruction)
+            context_tokens = contents_tokens(llm_request.contents)
+            record["calls"] += 1
+            record["instruction_tokens"] += instruction_tokens
+            record["context_tokens"] += context_tokens
+            record["scoped_out_tokens"] += scoped_out
+
+            # A prefix resent within the provider's cache lifetime is what prefix caching would serve
+            now = time.monotonic()
+            prefix_key = (str(llm_request.model), hashlib.sha256(instruction.encode("utf-8")).hexdigest())
+            last_seen = self._prefix_seen.get(prefix_key)
+            if last_seen is not None and now - last_seen <= self.prefix_ttl_seconds:
+                record["reusable_prefix_tokens"] += instruction_tokens
+            self._prefix_seen[prefix_key] = now
+
+            total = instruction_tokens + context_tokens
+            if self.max_prompt_tokens and total > self.max_prompt_tokens:
+                record["over_budget_calls"] += 1
+                print(f"\n(Warning: {stage} prompt is about {total} tokens, over the {self.max_prompt_tokens} token budget)")
+            metrics = current_run_metrics.get()
+            if metrics:
+                metrics.record_prompt(stage, instruction_tokens, context_tokens, scoped_out)
+            return None
+
+        add_callback(agent, "before_model_callback", scope_and_measure)
+
+    def stats(self) -> dict:
+        return {stage: dict(record) for stage, record in self.stages.items()}
@@ -0,0 +1,49 @@
+import asyncio
+import random
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from instrumentation import current_model_stage, current_run_metrics
+from rate_limiter import ProviderLimiter, failure_outcome
+
+
+class RateLimitedLlm(BaseLlm):
+    """Routes a model's calls through its provider limiter and retries retryable failures with jittered backoff."""
+
+    inner: BaseLlm
+    limiter: ProviderLimiter
+    max_retries: int = 4
+    backoff_seconds: float = 1.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False
+                                     ) -> AsyncGenerator[LlmResponse, None]:
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            outcome, produced_output = "cancelled", False
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                    produced_output = True
+                    yield response
+                outcome = "ok"
+                return
+            except Exception as e:
+                outcome = failure_outcome(e)
+                # Output already streamed downstream cannot be taken back, so only clean failures are retried
+                if produced_output or attempt >= self.max_retries or outcome == "error":
+                    raise
+            finally:
+                self.limiter.release(outcome)
+
+            attempt += 1
+            self.limiter.stats["retries"] += 1
+            metrics, stage = current_run_metrics.get(), current_model_stage.get()
+            if metrics and stage:
+                metrics.record_retry(stage)
+            # Full jitter: spreads retries of concurrent callers instead of having them collide again
+            delay = random.uniform(0, self.backoff_seconds * 2 ** attempt)
+            print(f"  ...{self.limiter.name} {outcome} ({self.model}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
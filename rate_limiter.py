@@ -0,0 +1,175 @@
+import asyncio
+import time
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = ("RateLimit", "Timeout", "ServiceUnavailable", "ResourceExhausted", "APIConnection")
+# Errors raised when the endpoint can't be reached at all (e.g. a local Ollama server that is down)
+CONNECTION_ERROR_NAMES = ("APIConnection", "ConnectError", "ConnectionError")
+# Fixed concurrency window of providers without configured limits
+UNLIMITED_CONCURRENCY = 1_000_000
+
+
+def provider_of(model_id: str) -> str:
+    """Provider key of a model id: 'gemini' for native Gemini ids, else the LiteLlm prefix ('openai/x' -> 'openai')."""
+    if model_id.startswith("gemini"):
+        return "gemini"
+    return model_id.split("/", 1)[0] if "/" in model_id else model_id
+
+
+def parse_rate_limits(spec: str) -> dict[str, tuple[float, int, int]]:
+    """Parses 'provider=rps/burst/max_concurrency,...' into {provider: (rps, burst, max_concurrency)}."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        provider, _, values = entry.partition("=")
+        try:
+            rps, burst, max_concurrency = values.split("/")
+            limits[provider.strip()] = (float(rps), int(burst), int(max_concurrency))
+        except ValueError:
+            print(f"(Warning: Ignoring malformed rate limit '{entry}', expected provider=rps/burst/max_concurrency)")
+    return limits
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limiting, timeouts and transient server errors from either LiteLLM or the Gemini client."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    return any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+
+
+def failure_outcome(error: Exception) -> str:
+    """Limiter outcome of a failed call: 'unreachable' for connection failures, 'throttled' for other
+    retryable errors, 'error' for the rest.
+
+    Connection failures are retried too, but they say nothing about provider load, so they don't shrink the window.
+    """
+    if isinstance(error, ConnectionError) or any(name in type(error).__name__ for name in CONNECTION_ERROR_NAMES):
+        return "unreachable"
+    return "throttled" if is_retryable(error) else "error"
+
+
+class ProviderLimiter:
+    """Token bucket for request rate plus an AIMD concurrency window for one model provider.
+
+    Every successful call grows the window by 1/window (about +1 per window's worth of calls);
+    every throttled call halves it, down to `min_concurrency`.
+    """
+
+    def __init__(self, name: str, requests_per_second: float, burst: int, max_concurrency: int,
+                 min_concurrency: int = 1):
+        self.name = name
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.concurrency_limit = float(self.max_concurrency)
+        self.tokens = float(self.burst)
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {"requests": 0, "throttle_events": 0, "connection_errors": 0, "retries": 0, "errors": 0,
+                      "wait_seconds": 0.0}
+        self._loop = None
+        self._waiters: list[asyncio.Future] = []
+
+    def _bind_to_running_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = []
+        return loop
+
+    def _take_token(self) -> float:
+        """Takes a token if one is available and returns 0, else returns the seconds until the next one."""
+        if self.requests_per_second <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.requests_per_second)
+        self.refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.requests_per_second
+
+    async def acquire(self) -> None:
+        """Waits for a concurrency slot and a rate token."""
+        loop = self._bind_to_running_loop()
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            while self.in_flight >= int(self.concurrency_limit):
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+                try:
+                    await waiter
+                finally:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+            self.in_flight += 1
+            try:
+                while (delay := self._take_token()) > 0:
+                    await asyncio.sleep(delay)
+            except BaseException:
+                self.release("cancelled")
+                raise
+        finally:
+            self.waiting -= 1
+        self.stats["requests"] += 1
+        self.stats["wait_seconds"] += time.perf_counter() - start
+
+    def release(self, outcome: str) -> None:
+        """Frees the slot and adapts the window: 'ok' grows it, 'throttled' halves it, anything else
+        ('unreachable', 'error', 'cancelled') leaves it."""
+        self.in_flight -= 1
+        if outcome == "throttled":
+            self.stats["throttle_events"] += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        elif outcome == "ok":
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+        elif outcome == "unreachable":
+            self.stats["connection_errors"] += 1
+        elif outcome == "error":
+            self.stats["errors"] += 1
+        # Waiters re-check the window themselves, so waking all of them is safe
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "wait_seconds": round(self.stats["wait_seconds"], 3),
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "concurrency_limit": round(self.concurrency_limit, 2),
+        }
+
+
+def unlimited_limiter(name: str) -> ProviderLimiter:
+    """Limiter for a provider without configured limits: no rate cap and a window that never shrinks,
+    so its calls are only retried and counted."""
+    return ProviderLimiter(name, 0, 1, UNLIMITED_CONCURRENCY, min_concurrency=UNLIMITED_CONCURRENCY)
+
+
+def prometheus_text(limiters: dict[str, ProviderLimiter]) -> str:
+    """Prometheus gauges and counters for every provider limiter."""
+    metrics = {
+        "queue_depth": ("gauge", "Model calls waiting for a provider slot or rate token."),
+        "in_flight": ("gauge", "Model calls currently running against the provider."),
+        "concurrency_limit": ("gauge", "Current adaptive concurrency window."),
+        "throttle_events": ("counter", "Calls rejected by the provider with a retryable error."),
+        "connection_errors": ("counter", "Calls that could not reach the provider endpoint."),
+        "retries": ("counter", "Retried model calls."),
+    }
+    if not limiters:
+        return ""
+    lines = []
+    for key, (kind, help_text) in metrics.items():
+        name = f"factcheck_provider_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for provider, limiter in limiters.items():
+            lines.append(f'{name}{{provider="{provider}"}} {limiter.snapshot()[key]}')
+    return "\n".join(lines) + "\n"
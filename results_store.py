@@ -0,0 +1,192 @@
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import time
+from typing import IO, Iterator
+
+from helpers import normalize_claim_key, tune_sqlite
+
+LOG_FILE_NAME = "results.jsonl"
+INDEX_FILE_NAME = "results_index.db"
+# Fields the store sets on every record; verdict fields with these names are dropped
+RESERVED_FIELDS = ("type", "doc_id", "doc_hash", "claim_hash", "recorded_at")
+
+
+def claim_hash(claim: str) -> str:
+    """Stable id for a claim across documents and runs (case and whitespace insensitive)."""
+    return hashlib.sha256(normalize_claim_key(claim).encode("utf-8")).hexdigest()[:16]
+
+
+def without_reserved(fields: dict) -> dict:
+    return {key: value for key, value in fields.items() if key not in RESERVED_FIELDS}
+
+
+class ResultsStore:
+    """Append-only log of fact-check results, one JSON line per claim, with a SQLite index into it.
+
+    Records are never rewritten: each run appends a document record (holding the original text once)
+    followed by one record per verdict. The index maps document id, claim hash, status and time to
+    byte offsets, and reads slice those offsets out of a memory-mapped view of the log.
+    """
+
+    def __init__(self, directory: str = "./fact_check_results"):
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, LOG_FILE_NAME)
+        self.conn = sqlite3.connect(os.path.join(directory, INDEX_FILE_NAME), check_same_thread=False)
+        tune_sqlite(self.conn)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS claim_records ("
+            " offset INTEGER PRIMARY KEY, length INTEGER NOT NULL, doc_id TEXT NOT NULL,"
+            " claim_hash TEXT NOT NULL, status TEXT, recorded_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS document_records ("
+            " offset INTEGER PRIMARY KEY, length INTEGER NOT NULL, doc_id TEXT NOT NULL,"
+            " doc_hash TEXT NOT NULL, recorded_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claim_records_doc ON claim_records (doc_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claim_records_claim ON claim_records (claim_hash, recorded_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claim_records_status ON claim_records (status, recorded_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS claim_records_time ON claim_records (recorded_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS document_records_doc ON document_records (doc_id)")
+        self.conn.commit()
+        # O_APPEND makes each write land atomically at the end, even with several worker processes appending
+        self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._map: mmap.mmap | None = None
+        self._reader: IO[bytes] | None = None
+
+    # --- Writing ---
+    def append(self, doc_id: str, doc_hash: str, original_text: str, results: list, extra: dict | None = None,
+               recorded_at: float | None = None) -> int:
+        """Appends one document's verdicts in a single write and indexes them; returns the number of claims stored."""
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        document = {"type": "document", "doc_id": doc_id, "doc_hash": doc_hash, "recorded_at": recorded_at,
+                    "original_text": original_text, **without_reserved(extra or {})}
+        lines = [(None, json.dumps(document, ensure_ascii=False).encode("utf-8") + b"\n")]
+        for item in results:
+            if not isinstance(item, dict) or not item.get("claim"):
+                continue
+            record = {"type": "claim", "doc_id": doc_id, "claim_hash": claim_hash(item["claim"]),
+                      "recorded_at": recorded_at, **without_reserved(item)}
+            lines.append((record, json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"))
+
+        payload = b"".join(line for _, line in lines)
+        os.write(self._fd, payload)
+        # After an O_APPEND write the file position is the end of what was just written
+        offset = os.lseek(self._fd, 0, os.SEEK_CUR) - len(payload)
+        claim_rows, document_row = [], None
+        for record, line in lines:
+            if record is None:
+                document_row = (offset, len(line), doc_id, doc_hash, recorded_at)
+            else:
+                claim_rows.append((offset, len(line), doc_id, record["claim_hash"], record.get("status"), recorded_at))
+            offset += len(line)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO document_records VALUES (?, ?, ?, ?, ?)", document_row)
+            self.conn.executemany("INSERT OR REPLACE INTO claim_records VALUES (?, ?, ?, ?, ?, ?)", claim_rows)
+        return len(claim_rows)
+
+    def rebuild_index(self) -> int:
+        """Re-indexes the whole log, e.g. after a crash between a log write and its index insert."""
+        with self.conn:
+            self.conn.execute("DELETE FROM claim_records")
+            self.conn.execute("DELETE FROM document_records")
+        indexed, offset = 0, 0
+        with open(self.log_path, "rb") as f, self.conn:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"(Warning: Skipping unreadable results log line at byte {offset})")
+                    offset += len(line)
+                    continue
+                if record.get("type") == "document":
+                    self.conn.execute("INSERT INTO document_records VALUES (?, ?, ?, ?, ?)",
+                                      (offset, len(line), record["doc_id"], record["doc_hash"], record["recorded_at"]))
+                elif record.get("type") == "claim":
+                    self.conn.execute("INSERT INTO claim_records VALUES (?, ?, ?, ?, ?, ?)",
+                                      (offset, len(line), record["doc_id"], record["claim_hash"],
+                                       record.get("status"), record["recorded_at"]))
+                    indexed += 1
+                offset += len(line)
+        return indexed
+
+    # --- Reading ---
+    def _read(self, offset: int, length: int) -> dict:
+        end = offset + length
+        if self._map is None or end > len(self._map):
+            # Remap once the log has grown past the current view
+            if self._map is not None:
+                self._map.close()
+                self._reader.close()
+            self._reader = open(self.log_path, "rb")
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return json.loads(self._map[offset:end])
+
+    def query(self, doc_id: str | None = None, claim: str | None = None, status: str | None = None,
+              since: float | None = None, until: float | None = None, limit: int | None = None) -> Iterator[dict]:
+        """Streams claim records matching every given filter, oldest first, reading only the matching lines."""
+        conditions, params = [], []
+        for column, value in (("doc_id", doc_id), ("claim_hash", claim_hash(claim) if claim else None),
+                              ("status", status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("recorded_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("recorded_at < ?")
+            params.append(until)
+        sql = "SELECT offset, length FROM claim_records"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY offset"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for offset, length in self.conn.execute(sql, params).fetchall():
+            yield self._read(offset, length)
+
+    def claim_history(self, claim: str) -> list[dict]:
+        """Every verdict recorded for a claim, oldest first."""
+        return list(self.query(claim=claim))
+
+    def document(self, doc_id: str) -> dict | None:
+        """The latest document record (with its original text) for a document id."""
+        row = self.conn.execute(
+            "SELECT offset, length FROM document_records WHERE doc_id = ? ORDER BY offset DESC LIMIT 1", (doc_id,)
+        ).fetchone()
+        return self._read(*row) if row else None
+
+    def export(self, out: IO[str], **filters) -> int:
+        """Writes matching claim records as JSONL; without filters the log is copied through in bulk."""
+        exported = 0
+        if not filters:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith('{"type": "claim"'):
+                        out.write(line)
+                        exported += 1
+            return exported
+        for record in self.query(**filters):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            exported += 1
+        return exported
+
+    def stats(self) -> dict:
+        claims, documents = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM claim_records), (SELECT COUNT(*) FROM document_records)").fetchone()
+        statuses = dict(self.conn.execute("SELECT status, COUNT(*) FROM claim_records GROUP BY status").fetchall())
+        return {"claims": claims, "documents": documents, "by_status": statuses,
+                "log_bytes": os.path.getsize(self.log_path)}
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._reader.close()
+            self._map = None
+        os.close(self._fd)
+        self.conn.close()
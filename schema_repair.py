@@ -0,0 +1,149 @@
+import json
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from evidence_fanout import empty_evidence
+from helpers import clean_and_parse_json, content_text
+from instrumentation import current_run_metrics
+from judge_batching import full_verdict
+from schemas import (claim_evidence, parse_stage_output, valid_evidence_package, validate_claims, validate_evidence,
+                     validate_verdicts)
+from subrun import SubRunner
+
+REPAIR_APP_NAME = "schema_repair"
+
+
+class SchemaRepairAgent(BaseAgent):
+    """Validates a stage's output against its schema and repairs only the invalid parts instead of failing the run.
+
+    Output that parses is normalized locally and a truncated array is salvaged element by element.
+    Claims left without an evidence package or a verdict are re-requested from `repair_agent` in one
+    sub-run holding just those claims; claim extraction with nothing usable is run once more. What is
+    still missing after that gets a placeholder, so the completed work of the run is kept. The repaired
+    output replaces the stage's in state and is emitted as this agent's final event.
+    """
+
+    stage_agent: BaseAgent
+    output_key: str
+    repair_agent: BaseAgent | None = None
+
+    async def _run_stage(self, ctx: InvocationContext, outputs: list) -> AsyncGenerator[Event, None]:
+        """Passes the stage's events through, appending its output text to `outputs` (as cascade tiers do)."""
+        output_text = None
+        async for event in self.stage_agent.run_async(ctx):
+            yield event
+            if event.partial:
+                continue
+            state_delta = event.actions.state_delta if event.actions else None
+            if state_delta and isinstance(state_delta.get(self.output_key), str):
+                output_text = state_delta[self.output_key]
+            elif event.is_final_response() and output_text is None:
+                output_text = content_text(event.content)
+        outputs.append(output_text)
+
+    async def _rerequest(self, user_id: str, payload: dict):
+        """Runs the repair agent on a payload holding only the elements to redo; returns its parsed output."""
+        try:
+            return clean_and_parse_json(await SubRunner(self.repair_agent, REPAIR_APP_NAME).run(
+                user_id, json.dumps(payload, ensure_ascii=False)))
+        except Exception as e:
+            print(f"\n(Warning: {self.name} repair request failed: {e})")
+            return None
+
+    # --- Per-stage repairs; each returns the repaired value (None to keep the output) and {kind: elements} ---
+    def _repair_claims(self, output_text: str | None):
+        value, salvaged = parse_stage_output(output_text, self.output_key)
+        claims, fixed = validate_claims(value)
+        if claims is None:
+            return None, {}
+        return claims, {"salvaged": salvaged * len(claims["verifiable_claims"]), "normalized": fixed}
+
+    async def _repair_evidence(self, ctx: InvocationContext, output_text: str | None, claims: list[dict]):
+        value, _ = parse_stage_output(output_text, self.output_key)
+        merged, missing, fixed = validate_evidence(value, claims)
+        repairs = {"normalized": fixed}
+        if missing and self.repair_agent is not None:
+            repaired = await self._rerequest(ctx.session.user_id, {"verifiable_claims": missing, "ignored_statements": []})
+            found, still_missing, _ = validate_evidence(repaired, missing)
+            if len(missing) == 1 and not found and isinstance(repaired, dict) and len(repaired) == 1:
+                # A single-claim request only ever produces one entry, even if the model rewrote the key
+                package = next(iter(repaired.values()))
+                if valid_evidence_package(package):
+                    found, still_missing, _ = validate_evidence({missing[0]["contextualized_claim"]: package}, missing)
+            merged.update(found)
+            repairs["rerequested"] = len(missing)
+            missing = still_missing
+        for claim in missing:
+            merged[claim["contextualized_claim"]] = empty_evidence("Evidence search returned no valid result for this claim.")
+        repairs["placeholder"] = len(missing)
+        # Back in claim order, as the stage itself writes it
+        return {claim["contextualized_claim"]: merged[claim["contextualized_claim"]] for claim in claims}, repairs
+
+    async def _repair_verdicts(self, ctx: InvocationContext, output_text: str | None, claims: list[dict]):
+        value, salvaged = parse_stage_output(output_text, self.output_key)
+        results, missing, fixed = validate_verdicts(value, claims)
+        repairs = {"salvaged": salvaged * len(results), "normalized": fixed}
+        evidence = clean_and_parse_json(ctx.session.state.get("google_search_results"))
+        evidence = evidence if isinstance(evidence, dict) else {}
+        if missing and self.repair_agent is not None:
+            repaired = await self._rerequest(ctx.session.user_id, {
+                "claims_analysis": {"verifiable_claims": missing},
+                "google_search_results": {claim["contextualized_claim"]: claim_evidence(claim, evidence) for claim in missing},
+            })
+            found, still_missing, _ = validate_verdicts(repaired, missing)
+            results.extend(found)
+            repairs["rerequested"] = len(missing)
+            missing = still_missing
+        for claim in missing:
+            results.append(full_verdict(claim, claim_evidence(claim, evidence), {
+                "status": "Unsubstantiated", "confidence": 0.0,
+                "reasoning": "The judge returned no usable verdict for this claim.", "placeholder": True}))
+        repairs["placeholder"] = len(missing)
+        extra = value if isinstance(value, dict) else {}
+        return {**extra, "fact_check_results": results}, repairs
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        outputs: list[str | None] = []
+        async for event in self._run_stage(ctx, outputs):
+            yield event
+        output_text = outputs[-1]
+
+        if self.output_key == "claims":
+            repaired, repairs = self._repair_claims(output_text)
+            if repaired is None:
+                # Nothing usable at all: the whole extraction is the invalid element, so it is requested once more
+                print(f"  ...{self.name}: claim extraction output is unusable, requesting it again")
+                async for event in self._run_stage(ctx, outputs):
+                    yield event
+                repaired, repairs = self._repair_claims(outputs[-1])
+                repairs["rerequested"] = 1
+                if repaired is None:
+                    print(f"\n(Warning: {self.name}: claim extraction output is still unusable after a second request)")
+        else:
+            claims, _ = validate_claims(clean_and_parse_json(ctx.session.state.get("claims")))
+            claims = claims["verifiable_claims"] if claims else []
+            if self.output_key == "google_search_results":
+                repaired, repairs = await self._repair_evidence(ctx, output_text, claims)
+            else:
+                repaired, repairs = await self._repair_verdicts(ctx, output_text, claims)
+
+        repairs = {kind: elements for kind, elements in repairs.items() if elements}
+        metrics = current_run_metrics.get()
+        if metrics:
+            for kind, elements in repairs.items():
+                metrics.record_repair(self.name, kind, elements)
+        if repaired is None or not repairs:
+            return
+        print(f"  ...Repaired {self.output_key}: " + ", ".join(f"{kind} {elements}" for kind, elements in repairs.items()))
+        repaired_text = json.dumps(repaired, ensure_ascii=False, indent=2)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=repaired_text)]),
+            actions=EventActions(state_delta={self.output_key: repaired_text}),
+        )
@@ -0,0 +1,124 @@
+from helpers import clean_and_parse_json, normalize_claim_key
+from streaming_json import IncrementalArrayParser
+
+# Strict shapes of the three stage outputs. Validators normalize what can be fixed locally (missing
+# optional strings, non-list sources) and report what can't, so callers re-request only those elements.
+
+VERDICT_STATUSES = {"Supported", "Contradicted", "Unsubstantiated"}
+ARRAY_KEYS = {"claims": "verifiable_claims", "final_results": "fact_check_results"}
+
+
+def parse_stage_output(text: str | None, output_key: str) -> tuple[object, bool]:
+    """Parses a stage's output; a truncated or broken array output is salvaged element by element.
+
+    Returns (value, salvaged), where value is None when nothing usable was found.
+    """
+    parsed = clean_and_parse_json(text) if isinstance(text, str) else text
+    if parsed is not None or not text or output_key not in ARRAY_KEYS:
+        return parsed, False
+    elements = IncrementalArrayParser(ARRAY_KEYS[output_key]).feed(text)
+    if not elements:
+        return None, False
+    return {ARRAY_KEYS[output_key]: elements}, True
+
+
+def claim_evidence(claim: dict, evidence: dict) -> dict:
+    """Evidence package for a claim, looked up by exact then normalized `contextualized_claim`."""
+    text = claim.get("contextualized_claim") or ""
+    package = evidence.get(text)
+    if package is None:
+        key = normalize_claim_key(text)
+        package = next((value for name, value in evidence.items() if normalize_claim_key(name) == key), None)
+    return package if isinstance(package, dict) else {}
+
+
+# --- Claims ---
+def validate_claims(value) -> tuple[dict | None, int]:
+    """Normalized `claims` output and the number of elements dropped or fixed; None if it isn't a claims object."""
+    if not isinstance(value, dict) or not isinstance(value.get("verifiable_claims"), list):
+        return None, 0
+    claims, fixed = [], 0
+    for claim in value["verifiable_claims"]:
+        if not isinstance(claim, dict):
+            fixed += 1
+            continue
+        statement = claim.get("original_statement") if isinstance(claim.get("original_statement"), str) else ""
+        contextualized = claim.get("contextualized_claim") if isinstance(claim.get("contextualized_claim"), str) else ""
+        if not statement.strip() and not contextualized.strip():
+            fixed += 1
+            continue
+        guide = claim.get("verification_guide")
+        normalized = {**claim, "original_statement": statement or contextualized,
+                      "contextualized_claim": contextualized or statement,
+                      "verification_guide": guide if isinstance(guide, str) else ""}
+        fixed += normalized != claim
+        claims.append(normalized)
+    ignored = value.get("ignored_statements")
+    ignored = [item for item in ignored if isinstance(item, dict)] if isinstance(ignored, list) else []
+    return {**value, "verifiable_claims": claims, "ignored_statements": ignored}, fixed
+
+
+# --- Evidence ---
+def valid_evidence_package(package) -> bool:
+    """A package with an evidence summary that isn't a placeholder left by a failed search."""
+    return (isinstance(package, dict) and package.get("placeholder") is not True
+            and isinstance(package.get("evidence_summary"), str) and bool(package["evidence_summary"].strip()))
+
+
+def normalize_evidence_package(package: dict) -> dict:
+    sources = package.get("sources")
+    return {**package,
+            "sources": [source for source in sources if isinstance(source, str)] if isinstance(sources, list) else [],
+            "search_query": package.get("search_query") if isinstance(package.get("search_query"), str) else ""}
+
+
+def validate_evidence(value, claims: list[dict]) -> tuple[dict, list[dict], int]:
+    """Evidence keyed by each claim's `contextualized_claim`, the claims without a usable package, and the fixes made."""
+    evidence = value if isinstance(value, dict) else {}
+    merged, missing, fixed = {}, [], 0
+    for claim in claims:
+        package = claim_evidence(claim, evidence)
+        if not valid_evidence_package(package):
+            missing.append(claim)
+            continue
+        normalized = normalize_evidence_package(package)
+        fixed += normalized != package
+        merged[claim["contextualized_claim"]] = normalized
+    return merged, missing, fixed
+
+
+# --- Verdicts ---
+def valid_verdict(verdict) -> bool:
+    return (isinstance(verdict, dict) and verdict.get("status") in VERDICT_STATUSES
+            and isinstance(verdict.get("claim"), str) and bool(verdict["claim"].strip()))
+
+
+def normalize_verdict(verdict: dict) -> dict:
+    sources = verdict.get("sources")
+    normalized = {**verdict,
+                  "reasoning": verdict.get("reasoning") if isinstance(verdict.get("reasoning"), str) else "",
+                  "sources": [source for source in sources if isinstance(source, str)] if isinstance(sources, list) else []}
+    confidence = verdict.get("confidence")
+    if isinstance(confidence, (int, float)) and not isinstance(confidence, bool):
+        normalized["confidence"] = min(1.0, max(0.0, float(confidence)))
+    else:
+        normalized.pop("confidence", None)
+    return normalized
+
+
+def validate_verdicts(value, claims: list[dict]) -> tuple[list[dict], list[dict], int]:
+    """Valid verdicts in output order, the claims left without one, and the number of verdicts dropped or fixed."""
+    verdicts = value.get("fact_check_results") if isinstance(value, dict) else None
+    results, judged, fixed = [], set(), 0
+    for verdict in verdicts if isinstance(verdicts, list) else []:
+        if not valid_verdict(verdict):
+            fixed += 1
+            continue
+        normalized = normalize_verdict(verdict)
+        fixed += normalized != verdict
+        results.append(normalized)
+        judged.update(normalize_claim_key(verdict.get(field) or "") for field in ("claim", "original_statement"))
+    missing = [claim for claim in claims
+               if not {normalize_claim_key(claim.get(field) or "")
+                       for field in ("contextualized_claim", "original_statement")} & judged]
+    return results, missing, fixed
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from agent import get_pipeline, shutdown_services, stream_fact_check
+from helpers import format_stream_event
+
+# --- Constants ---
+# Host and port are read by `cli.py serve`, the service's entry point
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", "8"))
+SERVER_QUEUE_SIZE = int(os.environ.get("SERVER_QUEUE_SIZE", "64"))
+SERVER_JOB_TTL_SECONDS = float(os.environ.get("SERVER_JOB_TTL_SECONDS", "3600"))
+SERVER_USER_ID = "political_dept_api"
+
+
+class FactCheckRequest(BaseModel):
+    text: str
+    id: str | None = None
+    wait: bool = True
+    rerun_stages: list[str] = []
+
+
+class FactCheckJob:
+    """A queued fact-check request, with queue wait and service time tracked separately."""
+
+    def __init__(self, request: FactCheckRequest, stream: bool = False):
+        self.id = request.id or uuid.uuid4().hex
+        self.text = request.text
+        self.rerun_stages = tuple(request.rerun_stages)
+        self.status = "queued"
+        self.result: dict | None = None
+        self.submitted_at = time.perf_counter()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.finished_wall_time: float | None = None
+        self.done = asyncio.Event()
+        # Pipeline events (verdicts as they resolve, then "done") for a streaming request
+        self.events: asyncio.Queue | None = asyncio.Queue() if stream else None
+
+    def view(self) -> dict:
+        queue_wait = (self.started_at or time.perf_counter()) - self.submitted_at
+        service = (self.finished_at or time.perf_counter()) - self.started_at if self.started_at else None
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "queue_wait_seconds": round(queue_wait, 4),
+            "service_seconds": round(service, 4) if service is not None else None,
+            "result": self.result,
+        }
+
+
+class FactCheckService:
+    """Warm worker pool over the shared pipeline, fed by a bounded queue that rejects work when full."""
+
+    def __init__(self, workers: int, queue_size: int, job_ttl_seconds: float):
+        self.worker_count = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.job_ttl_seconds = job_ttl_seconds
+        self.jobs: dict[str, FactCheckJob] = {}
+        self.busy_workers = 0
+        self.stats = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        self._workers.append(asyncio.create_task(self._expire_jobs()))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def submit(self, request: FactCheckRequest, stream: bool = False) -> FactCheckJob | None:
+        """Queues a job, or returns None when the queue is full."""
+        self._forget_expired_jobs()
+        job = FactCheckJob(request, stream)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            return None
+        self.jobs[job.id] = job
+        self.stats["accepted"] += 1
+        return job
+
+    async def _expire_jobs(self) -> None:
+        """Drops finished jobs (and their event queues) past the retention period, even when no new work arrives."""
+        while True:
+            await asyncio.sleep(max(1.0, min(60.0, self.job_ttl_seconds)))
+            self._forget_expired_jobs()
+
+    def _forget_expired_jobs(self) -> None:
+        cutoff = time.time() - self.job_ttl_seconds
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished_wall_time is not None and job.finished_wall_time < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started_at = time.perf_counter()
+            self.busy_workers += 1
+            try:
+                session_id = f"factcheck_api_{job.id}_{time.monotonic_ns()}"
+                async for event in stream_fact_check(job.text, SERVER_USER_ID, session_id, job.rerun_stages,
+                                                     document_id=job.id):
+                    if event["type"] == "done":
+                        job.result = event["results"]
+                    if job.events is not None:
+                        job.events.put_nowait(event)
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                job.result = None
+                if job.events is not None:
+                    job.events.put_nowait({"type": "done", "results": None, "error": str(e)})
+            finally:
+                self.busy_workers -= 1
+                job.finished_at = time.perf_counter()
+                job.finished_wall_time = time.time()
+                job.status = "done" if job.result is not None else "failed"
+                self.stats["completed" if job.result is not None else "failed"] += 1
+                job.done.set()
+                self.queue.task_done()
+
+    def health(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "busy_workers": self.busy_workers,
+            "workers": self.worker_count,
+            "jobs": self.stats,
+            **get_pipeline().stats(),
+        }
+
+
+def timed_response(job: FactCheckJob, status_code: int = 200) -> JSONResponse:
+    """Job view with queue wait and service time also exposed as a Server-Timing header."""
+    body = job.view()
+    timing = f"queue;dur={body['queue_wait_seconds'] * 1000:.1f}"
+    if body["service_seconds"] is not None:
+        timing += f", service;dur={body['service_seconds'] * 1000:.1f}"
+    return JSONResponse(body, status_code=status_code, headers={"Server-Timing": timing})
+
+
+def create_app(workers: int = SERVER_WORKERS, queue_size: int = SERVER_QUEUE_SIZE,
+               job_ttl_seconds: float = SERVER_JOB_TTL_SECONDS) -> FastAPI:
+    service = FactCheckService(workers, queue_size, job_ttl_seconds)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Build the pipeline before accepting traffic so the first request doesn't pay for it
+        get_pipeline()
+        service.start()
+        print(f"✅ Fact-check service ready: {service.worker_count} workers, queue of {service.queue.maxsize}")
+        yield
+        await service.stop()
+        await shutdown_services()
+
+    app = FastAPI(title="Political Fact-Check Service", lifespan=lifespan)
+
+    @app.post("/fact-check")
+    async def fact_check(request: FactCheckRequest):
+        if request.id and request.id in service.jobs:
+            raise HTTPException(status_code=409, detail=f"Job '{request.id}' already exists.")
+        job = service.submit(request)
+        if job is None:
+            raise HTTPException(status_code=429, detail="Fact-check queue is full, retry later.",
+                                headers={"Retry-After": "5"})
+        if not request.wait:
+            return timed_response(job, status_code=202)
+        await job.done.wait()
+        return timed_response(job)
+
+    @app.post("/fact-check/stream")
+    async def fact_check_stream(request: FactCheckRequest, http_request: Request, format: str | None = None):
+        """Streams each verdict as soon as it is available, as NDJSON or (for `text/event-stream` or ?format=sse) SSE."""
+        if request.id and request.id in service.jobs:
+            raise HTTPException(status_code=409, detail=f"Job '{request.id}' already exists.")
+        stream_format = format or ("sse" if "text/event-stream" in http_request.headers.get("accept", "") else "ndjson")
+        if stream_format not in ("ndjson", "sse"):
+            raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'.")
+        job = service.submit(request, stream=True)
+        if job is None:
+            raise HTTPException(status_code=429, detail="Fact-check queue is full, retry later.",
+                                headers={"Retry-After": "5"})
+
+        async def body():
+            # The job keeps running (and is stored) if the client goes away; only the stream stops
+            yield format_stream_event({"type": "queued", "job_id": job.id}, stream_format)
+            while True:
+                event = await job.events.get()
+                yield format_stream_event(event, stream_format)
+                if event["type"] == "done":
+                    return
+
+        media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+        return StreamingResponse(body(), media_type=media_type,
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.get("/jobs/{job_id}")
+    async def job_status(job_id: str):
+        job = service.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+        return timed_response(job)
+
+    @app.get("/health")
+    async def health():
+        return service.health()
+
+    return app
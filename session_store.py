@@ -0,0 +1,121 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from google.adk.sessions import InMemorySessionService
+
+from helpers import tune_sqlite
+
+
+def database_session_service(db_path: str):
+    """ADK DatabaseSessionService on a SQLite file, with whichever driver the installed ADK accepts."""
+    from google.adk.sessions import DatabaseSessionService
+
+    try:
+        return DatabaseSessionService(db_url=f"sqlite:///{db_path}")
+    except ValueError:
+        # Newer ADK releases reject synchronous drivers and require an async one
+        return DatabaseSessionService(db_url=f"sqlite+aiosqlite:///{db_path}")
+
+
+def prune_database_sessions(db_path: str, retention_days: float) -> int:
+    """Deletes DatabaseSessionService sessions (and their events) not updated within the retention window."""
+    cutoff = time.time() - retention_days * 86400
+    conn = sqlite3.connect(db_path)
+    try:
+        tune_sqlite(conn)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "sessions" not in tables:
+            return 0
+        # ADK stores update_time as a naive UTC text timestamp; julianday() also accepts the "T" separator and a
+        # UTC offset, and epoch numbers are compared as they are, so other storage formats don't silently miss.
+        stale = conn.execute(
+            "SELECT app_name, user_id, id FROM sessions WHERE CASE WHEN typeof(update_time) IN ('integer', 'real')"
+            " THEN update_time < ? ELSE julianday(update_time) < julianday(?, 'unixepoch') END", (cutoff, cutoff)
+        ).fetchall()
+        if "events" in tables:
+            conn.executemany("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", stale)
+        conn.executemany("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", stale)
+        conn.commit()
+        return len(stale)
+    finally:
+        conn.close()
+
+
+class LeanSessionService(InMemorySessionService):
+    """In-memory working sessions whose final results are persisted to SQLite in batches, off the hot path."""
+
+    def __init__(self, db_path: str = "./factcheck_sessions.db", persist_keys: tuple[str, ...] = ("final_results",),
+                 batch_size: int = 32, flush_interval: float = 1.0, retention_days: float = 30.0):
+        super().__init__()
+        self.db_path = db_path
+        self.persist_keys = tuple(persist_keys)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self._pending: list[tuple] = []
+        self._flush_timer: asyncio.Task | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._write_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        tune_sqlite(self._conn)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_results ("
+            " app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,"
+            " state TEXT NOT NULL, finalized_at REAL NOT NULL,"
+            " PRIMARY KEY (app_name, user_id, session_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS session_results_age ON session_results (finalized_at)")
+        self._conn.commit()
+        self.prune()
+
+    async def finalize_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        """Queues the session's persisted keys for the next batch write and frees its in-memory state."""
+        session = await self.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            return
+        state = {key: session.state[key] for key in self.persist_keys if key in session.state}
+        self._pending.append((app_name, user_id, session_id, json.dumps(state, ensure_ascii=False), time.time()))
+        await self.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        if len(self._pending) >= self.batch_size:
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Writes all queued results in one transaction on a worker thread."""
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        await asyncio.to_thread(self._write, records)
+
+    def _write(self, records: list[tuple]) -> None:
+        with self._write_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO session_results (app_name, user_id, session_id, state, finalized_at)"
+                " VALUES (?, ?, ?, ?, ?)", records)
+            self._conn.commit()
+
+    def prune(self) -> int:
+        """Deletes persisted results older than the retention window."""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._write_lock:
+            deleted = self._conn.execute("DELETE FROM session_results WHERE finalized_at < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return deleted
+
+    async def aclose(self) -> None:
+        """Flushes anything still queued; call before the event loop shuts down."""
+        if self._flush_timer is not None and not self._flush_timer.done():
+            self._flush_timer.cancel()
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks)
+        await self.flush()
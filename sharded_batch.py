@@ -0,0 +1,308 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+from pathlib import Path
+
+from checkpoints import document_hash
+from rate_limiter import parse_rate_limits
+
+# Nothing here imports agent (or batch) at module level: worker processes must apply their shard's
+# environment before agent reads its configuration, and spawned workers re-import the main module.
+
+# --- Constants ---
+DEFAULT_PROCESSES = int(os.environ.get("BATCH_PROCESSES", str(os.cpu_count() or 1)))
+MAX_DOCUMENT_ATTEMPTS = int(os.environ.get("BATCH_MAX_DOCUMENT_ATTEMPTS", "3"))
+# Session stores get one file per shard; the caches and checkpoints stay shared (all opened with tune_sqlite:
+# WAL plus a busy timeout, so concurrent writers from several workers wait instead of failing)
+SHARDED_PATH_SETTINGS = ("SESSION_DB_PATH", "SESSION_RESULTS_DB_PATH", "METRICS_PROM_PATH")
+
+
+def shard_of(text: str, processes: int) -> int:
+    """Shard for a document; identical documents always land on the same worker and session store."""
+    return int(document_hash(text)[:8], 16) % processes
+
+
+def shard_path(path: str, shard: int) -> str:
+    """'./sessions.db' -> './sessions.shard2.db'."""
+    base = Path(path)
+    return str(base.with_name(f"{base.stem}.shard{shard}{base.suffix}"))
+
+
+def split_rate_limits(spec: str, processes: int) -> str:
+    """Divides each provider's rate and concurrency between the workers so their sum matches the configured limit."""
+    shares = []
+    for provider, (rps, burst, max_concurrency) in parse_rate_limits(spec).items():
+        shares.append(f"{provider}={rps / processes:g}/{max(1, burst // processes)}/{max(1, max_concurrency // processes)}")
+    return ",".join(shares)
+
+
+def shard_environment(shard: int, processes: int) -> dict[str, str]:
+    """Environment overrides for one worker process, derived from the coordinator's configuration."""
+    import agent
+
+    overrides = {"RATE_LIMITS": split_rate_limits(agent.RATE_LIMITS, processes)}
+    for name in SHARDED_PATH_SETTINGS:
+        path = getattr(agent, name)
+        overrides[name] = shard_path(path, shard) if path else ""
+    return overrides
+
+
+# --- Worker Process ---
+def worker_main(shard: int, environment: dict, tasks, results, concurrency: int, rerun_stages: tuple) -> None:
+    """Worker process entry point: its own event loop, pipeline and session-store shard."""
+    os.environ.update(environment)
+    import asyncio
+
+    asyncio.run(serve_shard(shard, tasks, results, concurrency, rerun_stages))
+
+
+async def serve_shard(shard: int, tasks, results, concurrency: int, rerun_stages: tuple) -> None:
+    import asyncio
+
+    from agent import get_pipeline, shutdown_services
+    from batch import fact_check_document
+
+    pipeline = get_pipeline()
+    loop = asyncio.get_running_loop()
+
+    async def worker():
+        while True:
+            # The task queue is a multiprocessing queue, so its blocking get runs off the event loop
+            task = await loop.run_in_executor(None, tasks.get)
+            if task is None:
+                return
+            index, doc = task
+            results.put({"type": "started", "shard": shard, "index": index})
+            record = await fact_check_document(doc, rerun_stages)
+            results.put({"type": "result", "shard": shard, "index": index, "record": record})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await shutdown_services()
+    results.put({"type": "stats", "shard": shard, "stats": pipeline.stats()})
+
+
+# --- Coordinator ---
+class ShardWorker:
+    """Coordinator-side handle for one shard: its process, task queue and the documents it still owes."""
+
+    def __init__(self, context, shard: int, processes: int, results, concurrency: int, rerun_stages: tuple):
+        self.context = context
+        self.shard = shard
+        self.environment = shard_environment(shard, processes)
+        self.results = results
+        self.concurrency = concurrency
+        self.rerun_stages = rerun_stages
+        self.outstanding: dict[int, dict] = {}
+        # Documents the current process has started; only these are suspects when it dies
+        self.started: set[int] = set()
+        self.closed = False
+        self.finished = False
+        self.restarts = 0
+        # Restarts since the shard last finished a document; a worker that can't even start is given up on
+        self.restarts_without_progress = 0
+        self.dead = False
+        self.start()
+
+    def start(self) -> None:
+        # A fresh queue per process, so documents left in a dead worker's queue are never delivered twice
+        self.finished = False
+        self.started = set()
+        self.tasks = self.context.Queue()
+        self.process = self.context.Process(
+            target=worker_main, name=f"factcheck-shard-{self.shard}",
+            args=(self.shard, self.environment, self.tasks, self.results, self.concurrency, self.rerun_stages),
+        )
+        self.process.start()
+
+    def submit(self, index: int, doc: dict) -> None:
+        self.outstanding[index] = doc
+        self.tasks.put((index, doc))
+
+    def close(self) -> None:
+        """Tells every async worker in the process to stop once the queue is drained."""
+        self.closed = True
+        for _ in range(self.concurrency):
+            self.tasks.put(None)
+
+    def crashed(self) -> bool:
+        if self.dead:
+            return False
+        # A clean exit that still owes documents after its final stats arrived is a crash as well
+        exitcode = self.process.exitcode
+        return exitcode is not None and (exitcode != 0 or (self.finished and bool(self.outstanding)))
+
+    def restart(self) -> None:
+        """Replaces a dead worker and hands it every document the old one had not finished."""
+        self.restarts += 1
+        self.restarts_without_progress += 1
+        self.start()
+        for index, doc in self.outstanding.items():
+            self.tasks.put((index, doc))
+        if self.closed:
+            self.close()
+
+
+def run_sharded_batch(input_path: str, output_path: str, processes: int = DEFAULT_PROCESSES,
+                      concurrency: int = 8, rerun_stages: tuple[str, ...] = ()) -> dict:
+    """Runs the batch over `processes` worker processes sharded by document hash, writing results in input order.
+
+    Each worker runs up to `concurrency` documents at once. Documents owed by a crashed worker are
+    re-queued on its replacement; a document that was running in `MAX_DOCUMENT_ATTEMPTS` crashed
+    workers is marked failed. A shard whose worker crashes `MAX_DOCUMENT_ATTEMPTS` times in a row
+    without finishing a document (e.g. the pipeline can't be built) is stopped and all its
+    documents are marked failed.
+    """
+    from batch import iter_documents, percentile
+
+    # Spawned, not forked: workers must not inherit the coordinator's event loop, threads or SQLite handles
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [ShardWorker(context, shard, processes, results, concurrency, rerun_stages) for shard in range(processes)]
+    documents = enumerate(iter_documents(input_path))
+    # Bounds the reorder buffer: documents are dispatched at most this far ahead of the next one written
+    window = processes * concurrency * 4
+    pending: dict[int, dict] = {}
+    attempts: dict[int, int] = {}
+    next_to_write, dispatched, exhausted = 0, 0, False
+    latencies: list[float] = []
+    counts = {"ok": 0, "failed": 0}
+    shard_stats: dict[int, dict] = {}
+
+    def failed_record(doc: dict) -> dict:
+        return {"id": doc["id"], "status": "failed", "latency_seconds": 0.0,
+                "fact_check_results": None, "prefilter_stats": None, "failed_claims": None}
+
+    def complete(index: int, record: dict) -> None:
+        for worker in workers:
+            worker.outstanding.pop(index, None)
+        if index < next_to_write or index in pending:
+            return  # Duplicate from a worker that died after reporting
+        pending[index] = record
+        latencies.append(record["latency_seconds"])
+        counts[record["status"]] += 1
+        print(f"  ...[{record['status']}] {record['id']} in {record['latency_seconds']:.2f}s")
+
+    start_batch_time = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out:
+        while True:
+            while not exhausted and dispatched < next_to_write + window:
+                try:
+                    index, doc = next(documents)
+                except StopIteration:
+                    exhausted = True
+                    for worker in workers:
+                        worker.close()
+                    break
+                worker = workers[shard_of(doc["text"], processes)]
+                if worker.dead:
+                    complete(index, failed_record(doc))
+                else:
+                    worker.submit(index, doc)
+                dispatched += 1
+
+            try:
+                message = results.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            if message and message["type"] == "started":
+                workers[message["shard"]].started.add(message["index"])
+            elif message and message["type"] == "result":
+                workers[message["shard"]].restarts_without_progress = 0
+                complete(message["index"], message["record"])
+            elif message and message["type"] == "stats":
+                shard_stats[message["shard"]] = message["stats"]
+                workers[message["shard"]].finished = True
+
+            while next_to_write in pending:
+                out.write(json.dumps(pending.pop(next_to_write), ensure_ascii=False) + "\n")
+                next_to_write += 1
+            out.flush()
+
+            for worker in workers:
+                if not worker.crashed():
+                    continue
+                print(f"❌ Shard {worker.shard} worker exited with code {worker.process.exitcode}, "
+                      f"{len(worker.outstanding)} documents to reassign")
+                if worker.restarts_without_progress + 1 >= MAX_DOCUMENT_ATTEMPTS:
+                    print(f"❌ Shard {worker.shard} crashed {MAX_DOCUMENT_ATTEMPTS} times without finishing a document, "
+                          f"giving up on it")
+                    worker.dead = True
+                    for index, doc in list(worker.outstanding.items()):
+                        complete(index, failed_record(doc))
+                    continue
+                for index, doc in list(worker.outstanding.items()):
+                    if index not in worker.started:
+                        continue
+                    attempts[index] = attempts.get(index, 1) + 1
+                    if attempts[index] > MAX_DOCUMENT_ATTEMPTS:
+                        complete(index, failed_record(doc))
+                worker.restart()
+
+            if exhausted and next_to_write == dispatched:
+                break
+        elapsed = time.perf_counter() - start_batch_time
+
+    # Collect the final stats each worker reports on its way out
+    deadline = time.time() + 30
+    while len(shard_stats) < processes and time.time() < deadline:
+        try:
+            message = results.get(timeout=0.5)
+        except queue.Empty:
+            if all(worker.process.exitcode is not None for worker in workers):
+                break
+            continue
+        if message["type"] == "stats":
+            shard_stats[message["shard"]] = message["stats"]
+    for worker in workers:
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.terminate()
+
+    total = counts["ok"] + counts["failed"]
+    return {
+        "documents": total,
+        "ok": counts["ok"],
+        "failed": counts["failed"],
+        "processes": processes,
+        "worker_restarts": sum(worker.restarts for worker in workers),
+        "failed_shards": [worker.shard for worker in workers if worker.dead],
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(total / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_latency_seconds": round(percentile(latencies, 50), 3),
+        "p95_latency_seconds": round(percentile(latencies, 95), 3),
+        "shards": {shard: shard_stats.get(shard) for shard in range(processes)},
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the fact-checking pipeline over a corpus with a pool of worker processes.")
+    parser.add_argument("input", help="JSONL file ({'id', 'text'} per line), text file, or directory of them.")
+    parser.add_argument("-o", "--output", default="fact_check_batch_results.jsonl", help="Output JSONL path.")
+    parser.add_argument("-p", "--processes", type=int, default=DEFAULT_PROCESSES, help="Worker processes (shards).")
+    parser.add_argument("-c", "--concurrency", type=int, default=int(os.environ.get("BATCH_CONCURRENCY", "8")),
+                        help="Maximum number of pipelines running at once in each worker.")
+    parser.add_argument("--rerun-judge", action="store_true",
+                        help="Re-run only the judge stage, reusing checkpointed claims and evidence.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    args = parse_args()
+    print(f"🚀 Starting sharded batch fact-check of '{args.input}' with {args.processes} processes "
+          f"x concurrency {args.concurrency}...")
+    summary = run_sharded_batch(args.input, args.output, max(1, args.processes), max(1, args.concurrency),
+                                ("final_results",) if args.rerun_judge else ())
+    print("\n--- Batch Summary ---")
+    print(f"Documents: {summary['documents']} (ok: {summary['ok']}, failed: {summary['failed']})")
+    print(f"Throughput: {summary['docs_per_second']:.2f} docs/sec over {summary['elapsed_seconds']:.2f}s "
+          f"with {summary['processes']} processes ({summary['worker_restarts']} worker restarts)")
+    print(f"Latency: p50 {summary['p50_latency_seconds']:.2f}s, p95 {summary['p95_latency_seconds']:.2f}s")
+    for shard, stats in summary["shards"].items():
+        print(f"Shard {shard}: {stats}")
+    print(f"\n✅ Results written in input order to {args.output}")
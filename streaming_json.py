@@ -0,0 +1,105 @@
+import json
+
+
+class IncrementalArrayParser:
+    """Consumes streamed model output and yields each element of a top-level JSON array as soon as it closes.
+
+    Only the characters of the element currently being read are buffered and each element is
+    decoded exactly once, so the full output is never re-parsed. Markdown fences and prose
+    around the JSON object are skipped.
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.key_buffer: list[str] | None = None
+        self.pending_key: str | None = None
+        self.expect_array = False
+        self.in_array = False
+        self.element: list[str] | None = None
+        self.done = False
+
+    def feed(self, chunk: str) -> list:
+        """Feeds the next chunk of text and returns the array elements completed by it."""
+        completed = []
+        for char in chunk or "":
+            if self.done:
+                break
+            if self.element is not None:
+                self.element.append(char)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.key_buffer is not None:
+                        self.pending_key = "".join(self.key_buffer)
+                        self.key_buffer = None
+                elif self.key_buffer is not None:
+                    self.key_buffer.append(char)
+                continue
+            if char.isspace():
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if self.in_array and self.depth == 2 and self.element is None:
+                    self.element = [char]
+                elif self.depth == 1 and not self.in_array:
+                    self.key_buffer = []
+                continue
+
+            if not self.in_array:
+                if self.expect_array:
+                    self.expect_array = False
+                    if char == "[":
+                        self.in_array = True
+                        self.depth += 1
+                        continue
+                if self.pending_key is not None:
+                    self.expect_array = char == ":" and self.pending_key == self.array_key
+                    self.pending_key = None
+                if char in "{[":
+                    self.depth += 1
+                elif char in "}]":
+                    self.depth -= 1
+                continue
+
+            if char in "{[":
+                if self.depth == 2 and self.element is None:
+                    self.element = [char]
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1:
+                    # The target array itself closed; flush a trailing scalar element if any.
+                    if self.element is not None:
+                        self.element.pop()
+                        completed.extend(self._flush_element())
+                    self.in_array = False
+                    self.done = True
+                elif self.depth == 2 and self.element is not None:
+                    completed.extend(self._flush_element())
+            elif char == "," and self.depth == 2:
+                if self.element is not None:
+                    self.element.pop()
+                    completed.extend(self._flush_element())
+            elif self.depth == 2 and self.element is None:
+                self.element = [char]
+        return completed
+
+    def _flush_element(self) -> list:
+        text = "".join(self.element).strip()
+        self.element = None
+        if not text:
+            return []
+        try:
+            return [json.loads(text)]
+        except json.JSONDecodeError:
+            print(f"\n(Warning: Skipping unparsable streamed element: '{text[:100]}...')")
+            return []
@@ -0,0 +1,29 @@
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+
+class SubRunner:
+    """Runs an agent on single messages in throwaway in-memory sessions, for concurrent sub-runs."""
+
+    def __init__(self, agent: BaseAgent, app_name: str):
+        self.app_name = app_name
+        self.runner = Runner(agent=agent, app_name=app_name, session_service=InMemorySessionService())
+
+    async def run(self, user_id: str, text: str, state: dict | None = None) -> str | None:
+        """Sends `text` as the user message and returns the final response text (or None).
+
+        `state` seeds the throwaway session, for agents whose callbacks read pipeline state (e.g. `claims`).
+        """
+        session_service = self.runner.session_service
+        session = await session_service.create_session(app_name=self.app_name, user_id=user_id, state=state)
+        content = types.Content(role="user", parts=[types.Part(text=text)])
+        final_text = None
+        try:
+            async for event in self.runner.run_async(user_id=user_id, session_id=session.id, new_message=content):
+                if event.is_final_response() and event.content and event.content.parts:
+                    final_text = event.content.parts[0].text
+        finally:
+            await session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session.id)
+        return final_text
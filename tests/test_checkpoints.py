@@ -0,0 +1,107 @@
+import json
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from checkpoints import STALE_STATE_KEY, StageCheckpointStore, document_hash, stage_version
+from helpers import Content, Part
+
+CLAIMS = {"verifiable_claims": [{"original_statement": "a", "contextualized_claim": "a"}], "ignored_statements": []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StageCheckpointStore(str(tmp_path / "checkpoints.db"), max_age_seconds=3600)
+
+
+def test_document_hash_ignores_cosmetic_whitespace():
+    assert document_hash("Hola  mundo\n") == document_hash("Hola mundo")
+
+
+def test_get_matches_version(store):
+    store.put("doc", "claims", CLAIMS, "v1")
+    assert store.get("doc", "claims", "v1") == CLAIMS
+    assert store.get("doc", "claims", "v2") is None
+    assert store.get("doc", "claims") == CLAIMS
+
+
+def test_expired_checkpoints_are_ignored_and_pruned(store):
+    store.put("doc", "claims", CLAIMS, "v1")
+    store.conn.execute("UPDATE stage_checkpoints SET created_at = ?", (time.time() - 7200,))
+    store.conn.commit()
+    assert store.get("doc", "claims", "v1") is None
+    assert store.prune() == 1
+    assert store.stats()["entries"] == 0
+
+
+def test_migrates_table_without_version_column(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE stage_checkpoints (doc_hash TEXT NOT NULL, stage TEXT NOT NULL, value TEXT NOT NULL,"
+                 " created_at REAL NOT NULL, PRIMARY KEY (doc_hash, stage))")
+    conn.execute("INSERT INTO stage_checkpoints VALUES ('doc', 'claims', '{}', ?)", (time.time(),))
+    conn.commit()
+    conn.close()
+    store = StageCheckpointStore(path)
+    # Rows written before versioning never match a stage's version
+    assert store.get("doc", "claims", "v1") is None
+    store.put("doc", "claims", CLAIMS, "v1")
+    assert store.get("doc", "claims", "v1") == CLAIMS
+
+
+# --- Attached to a stage ---
+def extraction_agent(model="gemini-2.5-flash", instruction="Extract claims."):
+    agents = pytest.importorskip("google.adk.agents")
+    return agents.LlmAgent(name="ClaimExtractor", model=model, instruction=instruction, output_key="claims")
+
+
+def callback_context(text="Un documento.", state=None):
+    return SimpleNamespace(user_content=Content("user", [Part(text)]), state=state if state is not None else {})
+
+
+def test_stage_version_tracks_models_and_instructions():
+    base = stage_version(extraction_agent())
+    assert stage_version(extraction_agent()) == base
+    assert stage_version(extraction_agent(model="gemini-2.5-pro")) != base
+    assert stage_version(extraction_agent(instruction="Extract every claim.")) != base
+    agents = pytest.importorskip("google.adk.agents")
+    assert stage_version(agents.SequentialAgent(name="Stage", sub_agents=[extraction_agent()])) == base
+
+
+def test_attached_stage_resumes_only_under_its_version(store):
+    writer = extraction_agent()
+    store.attach(writer)
+    context = callback_context(state={"claims": '{"verifiable_claims": [], "ignored_statements": []}'})
+    writer.after_agent_callback(context)
+
+    same = extraction_agent()
+    store.attach(same)
+    assert same.before_agent_callback(callback_context()) is not None
+
+    changed = extraction_agent(instruction="A new prompt.")
+    store.attach(changed)
+    context = callback_context()
+    assert changed.before_agent_callback(context) is None
+    assert context.state[STALE_STATE_KEY] is True
+
+
+def test_output_with_placeholders_is_neither_saved_nor_replayed(store):
+    agent = extraction_agent()
+    store.attach(agent)
+    placeholder = {"verifiable_claims": [{"contextualized_claim": "a", "placeholder": True}], "ignored_statements": []}
+    agent.after_agent_callback(callback_context(state={"claims": json.dumps(placeholder)}))
+    assert store.stats()["entries"] == 0
+
+    store.put(document_hash("Un documento."), "claims", placeholder, stage_version(agent))
+    assert agent.before_agent_callback(callback_context()) is None
+
+
+def test_attach_records_the_current_stage_version(store):
+    assert store.current_version("claims") is None
+    agent = extraction_agent()
+    store.attach(agent)
+    assert store.current_version("claims") == stage_version(agent)
+    store.attach(extraction_agent(instruction="A new prompt."))
+    assert store.current_version("claims") != stage_version(agent)
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from claim_dedup import (KNOWN_CLAIMS_STATE_KEY, ClaimDedupIndex, KnownClaimsFilterAgent, claim_numbers,
+                         normalize_claim)
+from helpers import normalize_claim_key
+from subrun import SubRunner
+
+CLAIM = "El desempleo en Costa Rica bajó al 6,9% en 2024 según el INEC"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ClaimDedupIndex(str(tmp_path / "dedup.db"), threshold=0.8, freshness_days=7)
+
+
+def test_normalize_and_numbers():
+    assert normalize_claim("  Él   Bajó ") == "el bajo"
+    assert claim_numbers("1.000 personas y 6,9%") == ["1000", "6.9"]
+
+
+def test_finds_near_duplicate_with_same_numbers(index):
+    claim_id = index.add(CLAIM, {"claim": CLAIM, "status": "Supported"})
+    match = index.find("El desempleo en Costa Rica bajó al 6,9% en 2024, según el INEC")
+    assert match is not None and match[0] == claim_id and match[2]["status"] == "Supported"
+
+
+def test_different_numbers_never_match(index):
+    index.add(CLAIM, {"status": "Supported"})
+    assert index.find(CLAIM.replace("6,9%", "6,5%")) is None
+
+
+def test_own_document_is_excluded(index):
+    index.add(CLAIM, {"status": "Supported"}, doc_hash="doc-a")
+    assert index.find(CLAIM, exclude_doc_hash="doc-a") is None
+    assert index.find(CLAIM, exclude_doc_hash="doc-b") is not None
+
+
+def test_add_upserts_on_normalized_claim(index):
+    index.add(CLAIM, {"status": "Supported"})
+    latest = index.add(CLAIM.upper(), {"status": "Contradicted"})
+    assert index.conn.execute("SELECT COUNT(*) FROM claims").fetchone()[0] == 1
+    assert index.conn.execute("SELECT COUNT(DISTINCT claim_id) FROM claim_buckets").fetchone()[0] == 1
+    assert index.find(CLAIM)[:1] == (latest,)
+    assert index.find(CLAIM)[2]["status"] == "Contradicted"
+
+
+def test_prune_drops_expired_rows_and_buckets(index):
+    index.add(CLAIM, {"status": "Supported"})
+    index.conn.execute("UPDATE claims SET created_at = ?", (time.time() - 8 * 86400,))
+    index.conn.commit()
+    assert index.prune() == 1
+    assert index.conn.execute("SELECT COUNT(*) FROM claim_buckets").fetchone()[0] == 0
+    assert index.find(CLAIM) is None
+
+
+def test_migrates_index_without_key_columns(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE claims (id INTEGER PRIMARY KEY AUTOINCREMENT, claim TEXT NOT NULL,"
+                 " numbers TEXT NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL)")
+    conn.commit()
+    conn.close()
+    index = ClaimDedupIndex(path)
+    index.add(CLAIM, {"status": "Supported"}, doc_hash="doc-a")
+    assert index.find(CLAIM) is not None
+
+
+def test_known_claims_are_dropped_before_evidence_search():
+    claims = {"verifiable_claims": [{"contextualized_claim": "El desempleo bajó al 6,9%"},
+                                    {"contextualized_claim": "La inflación cerró en 0,8%"}]}
+    state = {"claims": json.dumps(claims), KNOWN_CLAIMS_STATE_KEY: [normalize_claim_key(" el DESEMPLEO bajó al 6,9% ")]}
+    runner = SubRunner(KnownClaimsFilterAgent(name="KnownClaimsFilterAgent"), "claim_dedup_test")
+    remaining = json.loads(asyncio.run(runner.run("tester", "texto", state)))
+    assert remaining == {"verifiable_claims": [claims["verifiable_claims"][1]]}
+    # Nothing known, nothing rewritten
+    assert asyncio.run(runner.run("tester", "texto", {"claims": json.dumps(claims)})) is None
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from typing import AsyncGenerator
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+
+from judge_batching import MicroBatchedJudgeAgent, estimated_claim_tokens, match_verdicts, plan_batches
+from subrun import SubRunner
+
+CLAIMS = [{"original_statement": f"Dato {index}", "contextualized_claim": f"El dato {index} es cierto"}
+          for index in range(1, 5)]
+EVIDENCE = {claim["contextualized_claim"]: {"evidence_summary": "Resumen.", "sources": ["https://a.cr"],
+                                           "search_query": claim["original_statement"]} for claim in CLAIMS}
+
+
+def test_plan_batches_respects_budget_and_order():
+    cost = estimated_claim_tokens(CLAIMS[0], EVIDENCE[CLAIMS[0]["contextualized_claim"]])
+    assert plan_batches(CLAIMS, EVIDENCE, cost * 2) == [[0, 1], [2, 3]]
+    # A claim larger than the budget still gets a batch of its own
+    assert plan_batches(CLAIMS, EVIDENCE, 1) == [[0], [1], [2], [3]]
+    assert plan_batches([], EVIDENCE, 1000) == []
+
+
+def test_match_verdicts_by_id_text_then_position():
+    batch = [("c1", CLAIMS[0]), ("c2", CLAIMS[1])]
+    by_id = match_verdicts(batch, [{"id": "c2", "status": "Supported"}, {"id": "c1", "status": "Contradicted"}])
+    assert by_id["c1"]["status"] == "Contradicted" and by_id["c2"]["status"] == "Supported"
+    by_text = match_verdicts(batch, [{"claim": "el dato 2 es cierto", "status": "Supported"}])
+    assert list(by_text) == ["c2"]
+    positional = match_verdicts(batch, [{"status": "Supported"}, {"status": "Unsubstantiated"}])
+    assert positional["c2"]["status"] == "Unsubstantiated"
+
+
+def test_match_verdicts_drops_invalid_status():
+    assert match_verdicts([("c1", CLAIMS[0])], [{"id": "c1", "status": "Probably"}]) == {}
+
+
+class FakeJudge(BaseAgent):
+    """Judges every claim of its `claims` state except those mentioning 'dato 3', recording what it saw."""
+
+    seen_claims: list = []
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        claims = json.loads(ctx.session.state["claims"])["verifiable_claims"]
+        self.seen_claims.append([claim["id"] for claim in claims])
+        verdicts = [{"id": claim["id"], "claim": claim["contextualized_claim"], "status": "Supported",
+                     "reasoning": "Coincide.", "confidence": 0.9}
+                    for claim in claims if "dato 3" not in claim["contextualized_claim"]]
+        yield Event(author=self.name, invocation_id=ctx.invocation_id, content=types.Content(
+            role="model", parts=[types.Part(text=json.dumps({"fact_check_results": verdicts}))]))
+
+
+def test_batches_see_their_claims_and_unjudged_claims_become_placeholders():
+    judge = FakeJudge(name="FakeJudge")
+    cost = estimated_claim_tokens(CLAIMS[0], EVIDENCE[CLAIMS[0]["contextualized_claim"]])
+    agent = MicroBatchedJudgeAgent(name="Batched", judge_agent=judge, max_batch_tokens=cost * 2)
+    state = {"claims": json.dumps({"verifiable_claims": CLAIMS}), "google_search_results": json.dumps(EVIDENCE)}
+
+    output = asyncio.run(SubRunner(agent, "judge_batching_test").run("tester", "judge", state))
+    results = json.loads(output)["fact_check_results"]
+
+    # Each batch sub-run sees only its own claims; the unjudged one is then retried alone
+    assert sorted(judge.seen_claims) == [["c1", "c2"], ["c3"], ["c3", "c4"]]
+    assert [result["claim"] for result in results] == [claim["contextualized_claim"] for claim in CLAIMS]
+    assert [bool(result.get("placeholder")) for result in results] == [False, False, True, False]
+    assert results[0]["sources"] == ["https://a.cr"] and results[2]["status"] == "Unsubstantiated"
+
+
+class RecordingLlm(BaseLlm):
+    """Answers every claim as Supported and keeps the text of each request it receives."""
+
+    requests: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        text = "\n".join(part.text for content in llm_request.contents for part in content.parts or [] if part.text)
+        self.requests.append(text)
+        claims = json.loads(text.split("\n", 1)[1].split("\n\n**")[0])["verifiable_claims"]
+        verdicts = [{"id": claim["id"], "claim": claim["contextualized_claim"], "status": "Supported",
+                     "reasoning": "Coincide.", "confidence": 0.9} for claim in claims]
+        yield LlmResponse(content=types.Content(role="model", parts=[
+            types.Part(text=json.dumps({"fact_check_results": verdicts}))]))
+
+
+def test_scoped_batch_requests_keep_their_evidence():
+    from google.adk.agents import LlmAgent
+
+    from prompt_budget import PromptBudget
+
+    llm = RecordingLlm(model="recording")
+    judge = LlmAgent(name="Judge", model=llm, instruction="Judge the claims.", output_key="final_results")
+    # Scoped as build_pipeline scopes the judge
+    PromptBudget().attach(judge, {"claims": "Initial Analysis (`claims_analysis`)",
+                                  "google_search_results": "Research Findings (`google_search_results`)"})
+    agent = MicroBatchedJudgeAgent(name="Batched", judge_agent=judge, max_batch_tokens=10 ** 6)
+    state = {"claims": json.dumps({"verifiable_claims": CLAIMS}), "google_search_results": json.dumps(EVIDENCE)}
+
+    output = asyncio.run(SubRunner(agent, "judge_batching_test").run("tester", "judge", state))
+
+    assert len(llm.requests) == 1
+    assert "**Research Findings (`google_search_results`):**" in llm.requests[0]
+    for claim in CLAIMS:
+        assert json.dumps(claim["contextualized_claim"], ensure_ascii=False) in llm.requests[0].split("**Research")[1]
+    assert all(not result.get("placeholder") for result in json.loads(output)["fact_check_results"])
@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from helpers import normalize_claim_key
+from live_transcript import LiveTranscript, segment_text, sentence_fingerprint, split_complete
+
+
+@pytest.mark.parametrize("text, complete, tail", [
+    ("Hola mundo. Esto sigue", "Hola mundo.", "Esto sigue"),
+    ("Hola mundo. Adiós.", "Hola mundo. Adiós.", ""),
+    ("Sin final todavía", "", "Sin final todavía"),
+    ("Un párrafo sin punto\n\n", "Un párrafo sin punto", ""),
+    ("¿Seguro? Sí", "¿Seguro?", "Sí"),
+])
+def test_split_complete(text, complete, tail):
+    assert split_complete(text) == (complete, tail)
+
+
+def test_sentence_fingerprint_ignores_case_and_spacing():
+    assert sentence_fingerprint("El  desempleo bajó.") == sentence_fingerprint("el desempleo BAJÓ.")
+
+
+def test_segment_text_marks_context():
+    assert segment_text([], ["Nuevo."]) == "Nuevo."
+    text = segment_text(["Viejo."], ["Nuevo."])
+    assert text.index("Viejo.") < text.index("[New text to check]") < text.index("Nuevo.")
+
+
+@pytest.fixture
+def pipeline_calls(monkeypatch):
+    """Stands in for agent.stream_fact_check: one verdict per new sentence, recording each call."""
+    calls = []
+
+    async def stream_fact_check(text, user_id, session_id, rerun_stages=(), document_id=None, verbose=False,
+                                known_claims=()):
+        calls.append({"text": text, "known_claims": list(known_claims)})
+        new_text = text.split("[New text to check]\n")[-1]
+        for sentence in new_text.split(". "):
+            yield {"type": "verdict", "result": {"claim": sentence.rstrip(".")}, "revised": False}
+        yield {"type": "done", "results": {"fact_check_results": []}}
+
+    monkeypatch.setitem(sys.modules, "agent", types.SimpleNamespace(stream_fact_check=stream_fact_check))
+    return calls
+
+
+def test_resent_sentences_are_skipped_by_fingerprint(pipeline_calls):
+    async def main():
+        transcript = LiveTranscript("doc", max_concurrency=1)
+        assert transcript.update("Primera frase. Segunda") == 1
+        assert transcript.update("Primera frase. Segunda frase. Tercera") == 1
+        assert transcript.append(" frase.") == 1
+        await transcript.close()
+        return transcript
+
+    transcript = asyncio.run(main())
+    assert transcript.stats["sentences_received"] == 4 and transcript.stats["sentences_skipped"] == 1
+    assert transcript.stats["sentences_checked"] == 3 and transcript.stats["verdicts"] == 3
+
+
+def test_context_claims_are_passed_as_known(pipeline_calls):
+    async def main():
+        transcript = LiveTranscript("doc", context_sentences=1, max_concurrency=1)
+        for text in ("Primera frase.", " Segunda frase.", " Tercera frase."):
+            transcript.append(text)
+            while transcript.running:
+                await asyncio.wait(set(transcript.running))
+        await transcript.close()
+        return transcript
+
+    transcript = asyncio.run(main())
+    # Each segment sees the previous sentence as context and the claim reported for it as known
+    assert [call["known_claims"] for call in pipeline_calls] == [
+        [], [normalize_claim_key("Primera frase")], [normalize_claim_key("Segunda frase")]]
+    # Claims of segments that left the context window are forgotten
+    assert list(transcript.segment_claims) == [2, 3]
+
+
+def test_emitted_claims_are_bounded(pipeline_calls):
+    async def main():
+        transcript = LiveTranscript("doc", max_fingerprints=2)
+        transcript.append("Uno. Dos. Tres.")
+        await transcript.close()
+        return transcript
+
+    assert list(asyncio.run(main()).emitted_claims) == ["dos", "tres"]
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from local_retrieval import LocalEvidenceIndex, make_search_tool, snippet, split_passages, tokenize
+
+REPORT = ("El INEC informó que el desempleo bajó al 6,9% en 2024. La encuesta cubrió 11.000 hogares. "
+          "La inflación interanual cerró en 0,8%.")
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalEvidenceIndex(str(tmp_path / "evidence.db"))
+
+
+def test_tokenize_normalizes_accents_numbers_and_stopwords():
+    assert tokenize("La Inflación subió al 6,9% y 6.9%") == ["inflacion", "subio", "6.9", "6.9"]
+
+
+def test_split_passages_groups_sentences_under_limit():
+    passages = split_passages("Uno dos. Tres cuatro. Cinco seis.", max_chars=22)
+    assert passages == ["Uno dos. Tres cuatro.", "Cinco seis."]
+
+
+def test_snippet_centres_on_matching_sentence():
+    text = snippet(REPORT, set(tokenize("inflación interanual")), max_chars=60)
+    assert text.startswith("… ") and "0,8%" in text
+
+
+def test_search_ranks_matching_document_first(index):
+    index.add_document("inec", REPORT, "https://inec.cr/empleo", "Encuesta de empleo")
+    index.add_document("bccr", "El Banco Central mantuvo la tasa de política monetaria.", "https://bccr.fi.cr")
+    results = index.search("desempleo 6.9% 2024", top_k=2)
+    assert results[0]["source"] == "https://inec.cr/empleo" and results[0]["title"] == "Encuesta de empleo"
+    assert len(results) == 1
+    assert index.search("") == [] and index.search("inexistente") == []
+
+
+def test_incremental_update_and_removal(index):
+    assert index.add_document("doc", REPORT, "a") is True
+    assert index.add_document("doc", REPORT, "a") is False
+    assert index.add_document("doc", "Las exportaciones crecieron 5% en 2024.", "a") is True
+    assert index.search("desempleo") == []
+    assert index.search("exportaciones")[0]["source"] == "a"
+    assert index.remove_document("doc") is True and index.remove_document("doc") is False
+    assert index.stats() == {"documents": 0, "passages": 0, "terms": 0}
+    assert index.total_length == 0
+
+
+def test_reopened_index_rebuilds_postings(tmp_path):
+    path = str(tmp_path / "evidence.db")
+    LocalEvidenceIndex(path).add_document("inec", REPORT, "https://inec.cr")
+    reopened = LocalEvidenceIndex(path)
+    assert reopened.search("inflación")[0]["source"] == "https://inec.cr"
+
+
+def test_add_path_indexes_tables_and_records(index, tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "empleo.csv").write_text("año,tasa\n2023,7.3\n2024,6.9\n", encoding="utf-8")
+    (corpus / "notas.jsonl").write_text(
+        json.dumps({"id": "n1", "text": REPORT, "source": "https://inec.cr"}) + "\n\n" + json.dumps({"id": "n2"}) + "\n",
+        encoding="utf-8")
+    (corpus / "ignorado.pdf").write_bytes(b"%PDF")
+    assert index.add_path(str(corpus)) == (2, 0)
+    assert index.add_path(str(corpus)) == (0, 2)
+    assert index.search("tasa 2024")[0]["snippet"] == "año: 2024; tasa: 6.9"
+
+
+def test_search_tool_wraps_results(index):
+    index.add_document("inec", REPORT, "https://inec.cr")
+    tool = make_search_tool(index, top_k=1)
+    assert tool("desempleo")["results"][0]["source"] == "https://inec.cr"
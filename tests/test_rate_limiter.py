@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+
+from rate_limiter import ProviderLimiter, failure_outcome, parse_rate_limits, prometheus_text, provider_of
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_parse_rate_limits_and_provider_of():
+    assert parse_rate_limits("gemini=2/4/8, openai=0.5/1/2,bad=1/2") == {"gemini": (2.0, 4, 8), "openai": (0.5, 1, 2)}
+    assert parse_rate_limits("") == {}
+    assert provider_of("gemini-2.5-pro") == "gemini"
+    assert provider_of("openai/magistral:24b") == "openai"
+
+
+@pytest.mark.parametrize("error, outcome", [
+    (RateLimitError(), "throttled"),
+    (StatusError(429), "throttled"),
+    (StatusError(503), "throttled"),
+    (asyncio.TimeoutError(), "throttled"),
+    (ConnectionRefusedError(), "unreachable"),
+    (APIConnectionError(), "unreachable"),
+    (StatusError(400), "error"),
+    (ValueError(), "error"),
+])
+def test_failure_outcome(error, outcome):
+    assert failure_outcome(error) == outcome
+
+
+def test_aimd_window():
+    limiter = ProviderLimiter("p", 0, 1, 8)
+
+    async def call(outcome):
+        await limiter.acquire()
+        limiter.release(outcome)
+
+    asyncio.run(call("throttled"))
+    assert limiter.concurrency_limit == 4
+    asyncio.run(call("unreachable"))
+    asyncio.run(call("error"))
+    assert limiter.concurrency_limit == 4
+    assert limiter.stats["connection_errors"] == 1 and limiter.stats["errors"] == 1
+    asyncio.run(call("ok"))
+    assert limiter.concurrency_limit == 4.25
+    for _ in range(5):
+        asyncio.run(call("throttled"))
+    assert limiter.concurrency_limit == 1
+
+
+def test_concurrency_cap():
+    limiter = ProviderLimiter("p", 0, 1, 2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        await limiter.acquire()
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0.01)
+        limiter.release("cancelled")
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(8)))
+
+    asyncio.run(main())
+    assert peak == 2 and limiter.in_flight == 0 and limiter.stats["requests"] == 8
+
+
+def test_token_bucket_rate():
+    limiter = ProviderLimiter("p", 20, 2, 10)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+            limiter.release("ok")
+        return time.monotonic() - start
+
+    # Two tokens of burst, then four more at 20 per second
+    assert asyncio.run(main()) >= 0.18
+
+
+def test_prometheus_text():
+    assert prometheus_text({}) == ""
+    text = prometheus_text({"openai": ProviderLimiter("openai", 1, 1, 1)})
+    assert 'factcheck_provider_connection_errors_total{provider="openai"} 0' in text
+
+
+def test_unreachable_endpoint_is_retried_without_shrinking_the_window(monkeypatch):
+    pytest.importorskip("google.adk")
+    from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+    import rate_limited_llm
+    from rate_limited_llm import RateLimitedLlm
+
+    class FlakyLlm(BaseLlm):
+        failures: list = []
+
+        async def generate_content_async(self, llm_request, stream=False):
+            if self.failures:
+                raise self.failures.pop(0)
+            yield LlmResponse()
+
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(rate_limited_llm.asyncio, "sleep", no_sleep)
+    limiter = ProviderLimiter("openai", 0, 1, 8)
+    llm = RateLimitedLlm(model="openai/x", limiter=limiter, max_retries=4,
+                         inner=FlakyLlm(model="x", failures=[ConnectionRefusedError(), APIConnectionError()]))
+
+    async def main():
+        return [response async for response in llm.generate_content_async(LlmRequest())]
+
+    assert len(asyncio.run(main())) == 1
+    assert limiter.stats["connection_errors"] == 2 and limiter.stats["throttle_events"] == 0
+    assert limiter.stats["retries"] == 2 and limiter.concurrency_limit == 8
+
+
+def test_models_are_retried_without_configured_rate_limits(monkeypatch):
+    pytest.importorskip("google.adk")
+    from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+    import agent
+    import rate_limited_llm
+    from rate_limited_llm import RateLimitedLlm
+
+    class ThrottledLlm(BaseLlm):
+        failures: list = []
+
+        async def generate_content_async(self, llm_request, stream=False):
+            if self.failures:
+                raise self.failures.pop(0)
+            yield LlmResponse()
+
+    async def no_sleep(_):
+        return None
+
+    monkeypatch.setattr(rate_limited_llm.asyncio, "sleep", no_sleep)
+    # What build_pipeline builds from the default (empty) RATE_LIMITS
+    provider_limiters = {}
+    model = agent.build_model("gemini-2.5-flash", provider_limiters)
+    assert isinstance(model, RateLimitedLlm) and set(provider_limiters) == {"gemini"}
+    model.inner = ThrottledLlm(model="gemini-2.5-flash", failures=[StatusError(429), asyncio.TimeoutError()])
+
+    async def main():
+        return [response async for response in model.generate_content_async(LlmRequest())]
+
+    assert len(asyncio.run(main())) == 1
+    limiter = provider_limiters["gemini"]
+    assert limiter.stats["retries"] == 2 and limiter.stats["throttle_events"] == 2
+    # Unlimited providers are never throttled down
+    assert limiter.concurrency_limit == limiter.max_concurrency
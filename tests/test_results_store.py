@@ -0,0 +1,69 @@
+import io
+import json
+
+import pytest
+
+from results_store import ResultsStore, claim_hash
+
+RESULTS = [
+    {"claim": "El desempleo bajó al 6,9%", "status": "Supported", "sources": ["https://inec.cr"]},
+    {"claim": "La inflación subió", "status": "Contradicted", "type": "ignored"},
+    "not a verdict",
+    {"status": "Supported"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results"))
+    yield store
+    store.close()
+
+
+def test_claim_hash_ignores_case_and_whitespace():
+    assert claim_hash("  La Inflación   subió ") == claim_hash("la inflación subió")
+
+
+def test_append_indexes_only_claim_verdicts(store):
+    assert store.append("doc-1", "hash-1", "Texto original.", RESULTS, extra={"session_id": "s1"}, recorded_at=100) == 2
+    records = list(store.query(doc_id="doc-1"))
+    assert [record["claim"] for record in records] == [RESULTS[0]["claim"], RESULTS[1]["claim"]]
+    # Store fields win over verdict fields of the same name
+    assert records[1]["type"] == "claim" and records[1]["recorded_at"] == 100
+    document = store.document("doc-1")
+    assert document["original_text"] == "Texto original." and document["session_id"] == "s1"
+    assert store.stats()["by_status"] == {"Supported": 1, "Contradicted": 1}
+
+
+def test_query_filters_and_claim_history(store):
+    store.append("doc-1", "h1", "a", RESULTS[:1], recorded_at=100)
+    store.append("doc-2", "h2", "b", [{**RESULTS[0], "status": "Contradicted"}], recorded_at=200)
+    assert [record["doc_id"] for record in store.claim_history(" el DESEMPLEO bajó al 6,9% ")] == ["doc-1", "doc-2"]
+    assert [record["doc_id"] for record in store.query(status="Contradicted", since=150)] == ["doc-2"]
+    assert list(store.query(until=100)) == []
+    assert len(list(store.query(limit=1))) == 1
+
+
+def test_reads_see_records_appended_after_the_first_read(store):
+    store.append("doc-1", "h1", "a", RESULTS[:1])
+    assert store.document("doc-1")["doc_hash"] == "h1"
+    store.append("doc-1", "h2", "a2", RESULTS[:1])
+    assert store.document("doc-1")["doc_hash"] == "h2"
+    assert len(store.claim_history(RESULTS[0]["claim"])) == 2
+
+
+def test_rebuild_index_skips_unreadable_lines(store):
+    store.append("doc-1", "h1", "a", RESULTS)
+    with open(store.log_path, "ab") as f:
+        f.write(b"{truncated\n")
+    store.append("doc-2", "h2", "b", RESULTS[:1])
+    assert store.rebuild_index() == 3
+    assert [record["doc_id"] for record in store.claim_history(RESULTS[0]["claim"])] == ["doc-1", "doc-2"]
+
+
+def test_export_with_and_without_filters(store):
+    store.append("doc-1", "h1", "a", RESULTS)
+    everything, supported = io.StringIO(), io.StringIO()
+    assert store.export(everything) == 2
+    assert store.export(supported, status="Supported") == 1
+    assert json.loads(supported.getvalue())["claim"] == RESULTS[0]["claim"]
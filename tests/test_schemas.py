@@ -0,0 +1,93 @@
+import pytest
+
+from helpers import has_placeholder
+from schemas import (claim_evidence, parse_stage_output, valid_evidence_package, validate_claims, validate_evidence,
+                     validate_verdicts)
+
+CLAIMS = [
+    {"original_statement": "Bajó el desempleo", "contextualized_claim": "El desempleo bajó en 2024",
+     "verification_guide": ""},
+    {"original_statement": "Subió la inflación", "contextualized_claim": "La inflación subió en 2024",
+     "verification_guide": ""},
+]
+
+
+def evidence(summary="El INEC reporta 6,9%.", **extra):
+    return {"evidence_summary": summary, "sources": ["https://inec.cr"], "search_query": "desempleo", **extra}
+
+
+def test_parse_stage_output_salvages_truncated_array():
+    text = '{"fact_check_results": [{"claim": "a", "status": "Supported"}, {"claim": "b", "sta'
+    value, salvaged = parse_stage_output(text, "final_results")
+    assert salvaged and value == {"fact_check_results": [{"claim": "a", "status": "Supported"}]}
+
+
+def test_parse_stage_output_leaves_unparsable_non_array_stages():
+    assert parse_stage_output("not json", "google_search_results") == (None, False)
+
+
+def test_validate_claims_normalizes_and_drops():
+    value = {"verifiable_claims": [{"contextualized_claim": "Texto"}, {"original_statement": " "}, "basura"],
+             "ignored_statements": ["x", {"statement": "y"}]}
+    claims, fixed = validate_claims(value)
+    assert claims["verifiable_claims"] == [
+        {"contextualized_claim": "Texto", "original_statement": "Texto", "verification_guide": ""}]
+    assert claims["ignored_statements"] == [{"statement": "y"}]
+    assert fixed == 3
+    assert validate_claims({"verifiable_claims": "none"}) == (None, 0)
+
+
+def test_claim_evidence_falls_back_to_normalized_key():
+    assert claim_evidence(CLAIMS[0], {"  el DESEMPLEO bajó en 2024 ": evidence()}) == evidence()
+    assert claim_evidence(CLAIMS[0], {}) == {}
+
+
+def test_placeholder_evidence_counts_as_missing():
+    placeholder = evidence("Evidence search failed for this claim.", placeholder=True)
+    assert not valid_evidence_package(placeholder)
+    merged, missing, _ = validate_evidence(
+        {CLAIMS[0]["contextualized_claim"]: evidence(), CLAIMS[1]["contextualized_claim"]: placeholder}, CLAIMS)
+    assert list(merged) == [CLAIMS[0]["contextualized_claim"]]
+    assert missing == [CLAIMS[1]]
+
+
+def test_empty_evidence_is_a_placeholder():
+    pytest.importorskip("google.adk")
+    from evidence_fanout import empty_evidence
+
+    package = empty_evidence("Evidence search returned an invalid entry.")
+    assert has_placeholder(package) and not valid_evidence_package(package)
+
+
+def test_validate_evidence_normalizes_sources():
+    merged, missing, fixed = validate_evidence(
+        {CLAIMS[0]["contextualized_claim"]: {"evidence_summary": "ok", "sources": ["a", 3]}}, CLAIMS[:1])
+    assert merged[CLAIMS[0]["contextualized_claim"]] == {"evidence_summary": "ok", "sources": ["a"], "search_query": ""}
+    assert (missing, fixed) == ([], 1)
+
+
+def test_validate_verdicts_reports_unjudged_claims():
+    value = {"fact_check_results": [
+        {"claim": "el desempleo bajó en 2024", "status": "Supported", "confidence": 1.7},
+        {"claim": "La inflación subió en 2024", "status": "Maybe"},
+    ]}
+    results, missing, fixed = validate_verdicts(value, CLAIMS)
+    assert [result["confidence"] for result in results] == [1.0]
+    assert results[0]["sources"] == [] and results[0]["reasoning"] == ""
+    assert missing == [CLAIMS[1]]
+    assert fixed == 2
+
+
+def test_has_placeholder_finds_nested_flags():
+    assert has_placeholder({"fact_check_results": [{"claim": "a"}, {"claim": "b", "placeholder": True}]})
+    assert not has_placeholder({"fact_check_results": [{"claim": "a", "placeholder": False}]})
+
+
+def test_full_verdict_inherits_placeholder_evidence():
+    pytest.importorskip("google.adk")
+    from judge_batching import full_verdict
+
+    verdict = {"status": "Unsubstantiated", "confidence": 0.2, "reasoning": "Sin evidencia."}
+    assert "placeholder" not in full_verdict(CLAIMS[0], evidence(), verdict)
+    assert full_verdict(CLAIMS[0], evidence(placeholder=True), verdict)["placeholder"] is True
+    assert full_verdict(CLAIMS[0], evidence(), {**verdict, "placeholder": True})["placeholder"] is True
@@ -0,0 +1,69 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from session_store import database_session_service, prune_database_sessions
+
+HOUR_DAYS = 1 / 24
+
+
+def test_prunes_real_database_session_service(tmp_path):
+    """Runs against the tables and timestamps ADK's DatabaseSessionService actually writes."""
+    from google.adk.events import Event
+    from google.genai import types
+
+    db_path = tmp_path / "sessions.db"
+
+    async def create_sessions():
+        service = database_session_service(str(db_path))
+        for session_id in ("old", "recent"):
+            session = await service.create_session(app_name="app", user_id="u", session_id=session_id)
+            await service.append_event(session, Event(
+                author="user", invocation_id=f"inv-{session_id}",
+                content=types.Content(role="user", parts=[types.Part(text="hola")])))
+
+    asyncio.run(create_sessions())
+    # Both sessions were just updated: kept when the cutoff is an hour ago, so the stored time isn't
+    # read as if it were hours in the past (e.g. local time instead of UTC)
+    assert prune_database_sessions(str(db_path), HOUR_DAYS) == 0
+
+    conn = sqlite3.connect(db_path)
+    # Age the "old" session by rewriting its timestamp in the format ADK stored it in
+    stored = conn.execute("SELECT update_time FROM sessions WHERE id = 'recent'").fetchone()[0]
+    conn.execute("UPDATE sessions SET update_time = replace(?, substr(?, 1, 4), '2000') WHERE id = 'old'",
+                 (stored, stored))
+    conn.commit()
+
+    assert prune_database_sessions(str(db_path), HOUR_DAYS) == 1
+    assert [row[0] for row in conn.execute("SELECT id FROM sessions")] == ["recent"]
+    assert {row[0] for row in conn.execute("SELECT session_id FROM events")} == {"recent"}
+    # ...and a cutoff an hour ahead prunes the recent one, so the stored time isn't read as hours ahead either
+    assert prune_database_sessions(str(db_path), -HOUR_DAYS) == 1
+    conn.close()
+
+
+@pytest.mark.parametrize("old, recent", [
+    ("2000-01-01 00:00:00.000000", time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())),
+    ("2000-01-01T00:00:00+00:00", time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())),
+    (946684800.0, time.time()),
+])
+def test_timestamp_formats(tmp_path, old, recent):
+    db_path = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE sessions (app_name TEXT, user_id TEXT, id TEXT, update_time)")
+    conn.execute("CREATE TABLE events (app_name TEXT, user_id TEXT, session_id TEXT)")
+    conn.executemany("INSERT INTO sessions VALUES ('app', 'u', ?, ?)", [("old", old), ("recent", recent)])
+    conn.executemany("INSERT INTO events VALUES ('app', 'u', ?)", [("old",), ("recent",)])
+    conn.commit()
+    assert prune_database_sessions(db_path, 1) == 1
+    assert [row[0] for row in conn.execute("SELECT id FROM sessions")] == ["recent"]
+    assert [row[0] for row in conn.execute("SELECT session_id FROM events")] == ["recent"]
+    conn.close()
+
+
+def test_missing_tables(tmp_path):
+    assert prune_database_sessions(str(tmp_path / "empty.db"), 1) == 0
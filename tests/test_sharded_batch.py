@@ -0,0 +1,37 @@
+import sqlite3
+
+from helpers import tune_sqlite
+from sharded_batch import shard_of, shard_path, split_rate_limits
+
+
+def test_shard_of_is_stable_for_identical_documents():
+    assert shard_of("Hola  mundo", 4) == shard_of("Hola mundo", 4)
+    assert {shard_of(f"doc {i}", 4) for i in range(64)} == {0, 1, 2, 3}
+
+
+def test_shard_path():
+    assert shard_path("./sessions.db", 2) == "sessions.shard2.db"
+    assert shard_path("/data/metrics.prom", 0) == "/data/metrics.shard0.prom"
+
+
+def test_split_rate_limits_divides_between_workers():
+    assert split_rate_limits("gemini=2/4/8,openai=1/1/1", 2) == "gemini=1/2/4,openai=0.5/1/1"
+    assert split_rate_limits("", 4) == ""
+
+
+def test_shared_sqlite_files_are_writable_from_two_connections(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = sqlite3.connect(path), sqlite3.connect(path)
+    for conn in (first, second):
+        tune_sqlite(conn)
+    first.execute("CREATE TABLE t (v INTEGER)")
+    first.commit()
+    first.execute("INSERT INTO t VALUES (1)")
+    # A reader doesn't block on the open write transaction under WAL
+    assert second.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    first.commit()
+    second.execute("INSERT INTO t VALUES (2)")
+    second.commit()
+    assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert first.execute("PRAGMA busy_timeout").fetchone()[0] == 10000
+    assert first.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 2
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from streaming_json import IncrementalArrayParser
+
+DOCUMENT = {
+    "verifiable_claims": [
+        {"original_statement": "Dijo \"hola\" {no es JSON}", "contextualized_claim": "A [1]"},
+        {"original_statement": "b\\\\", "contextualized_claim": "B", "nested": {"list": [1, {"x": "]"}]}},
+        {"original_statement": "c", "contextualized_claim": "C"},
+    ],
+    "ignored_statements": [{"statement": "ignored"}],
+}
+
+
+def feed_in_chunks(parser: IncrementalArrayParser, text: str, size: int) -> list:
+    elements = []
+    for start in range(0, len(text), size):
+        elements += parser.feed(text[start:start + size])
+    return elements
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_elements_match_json_loads_for_any_chunking(size):
+    text = json.dumps(DOCUMENT, ensure_ascii=False, indent=2)
+    assert feed_in_chunks(IncrementalArrayParser("verifiable_claims"), text, size) == DOCUMENT["verifiable_claims"]
+
+
+def test_each_element_is_yielded_when_it_closes():
+    parser = IncrementalArrayParser("fact_check_results")
+    assert parser.feed('{"fact_check_results": [{"claim": "a"}, {"claim"') == [{"claim": "a"}]
+    assert parser.feed(': "b"}') == [{"claim": "b"}]
+    assert parser.feed("]}") == []
+    assert parser.done
+
+
+def test_markdown_fences_and_prose_are_skipped():
+    text = 'Here you go:\n```json\n{"verifiable_claims": [{"id": 1}, {"id": 2}]}\n```'
+    assert IncrementalArrayParser("verifiable_claims").feed(text) == [{"id": 1}, {"id": 2}]
+
+
+def test_same_key_nested_deeper_is_ignored():
+    text = '{"meta": {"verifiable_claims": [{"id": "nested"}]}, "verifiable_claims": [{"id": "top"}]}'
+    assert IncrementalArrayParser("verifiable_claims").feed(text) == [{"id": "top"}]
+
+
+def test_scalar_elements():
+    assert IncrementalArrayParser("ids").feed('{"ids": [1, "two", true, null]}') == [1, "two", True, None]
+
+
+def test_truncated_output_keeps_completed_elements():
+    text = '{"verifiable_claims": [{"id": 1}, {"id": 2}, {"id": 3, "contextualized_claim": "cut of'
+    assert IncrementalArrayParser("verifiable_claims").feed(text) == [{"id": 1}, {"id": 2}]
+
+
+def test_text_after_the_array_is_ignored():
+    parser = IncrementalArrayParser("ids")
+    assert parser.feed('{"ids": [1], "other": [2]} trailing [3]') == [1]
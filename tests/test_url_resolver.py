@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from url_resolver import UrlResolver
+
+
+class RedirectStub(BaseHTTPRequestHandler):
+    """/r/<name> redirects to /final/<name> after a short delay; counts requests and peak concurrency."""
+
+    requests = 0
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_HEAD(self):
+        cls = type(self)
+        if self.path.startswith("/r/"):
+            with cls.lock:
+                cls.requests += 1
+                cls.active += 1
+                cls.peak = max(cls.peak, cls.active)
+            time.sleep(0.1)
+            with cls.lock:
+                cls.active -= 1
+            self.send_response(302)
+            self.send_header("Location", "/final/" + self.path[len("/r/"):])
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"):
+        monkeypatch.delenv(name, raising=False)
+    handler = type("Handler", (RedirectStub,), {"requests": 0, "active": 0, "peak": 0, "lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_resolver(**kwargs) -> UrlResolver:
+    return UrlResolver(cache_path=None, resolve_hosts=("127.0.0.1",), **kwargs)
+
+
+async def resolve_all(resolver: UrlResolver, urls: list[str]) -> list[str]:
+    try:
+        return await resolver.resolve_many(urls)
+    finally:
+        await resolver.aclose()
+
+
+def test_concurrent_lookups_are_coalesced(stub):
+    handler, base = stub
+    resolver = make_resolver()
+    results = asyncio.run(resolve_all(resolver, [f"{base}/r/a"] * 5))
+    assert results == [f"{base}/final/a"] * 5
+    assert handler.requests == 1
+    assert resolver.stats["coalesced"] == 4
+
+
+def test_per_host_limit(stub):
+    handler, base = stub
+    resolver = make_resolver(per_host_limit=2)
+    results = asyncio.run(resolve_all(resolver, [f"{base}/r/{i}" for i in range(6)]))
+    assert results == [f"{base}/final/{i}" for i in range(6)]
+    assert handler.requests == 6
+    assert handler.peak <= 2
+
+
+def test_ttl_expiry(stub, tmp_path):
+    handler, base = stub
+    resolver = UrlResolver(cache_path=str(tmp_path / "urls.db"), ttl_seconds=0.3, resolve_hosts=("127.0.0.1",))
+    asyncio.run(resolve_all(resolver, [f"{base}/r/a"]))
+    asyncio.run(resolve_all(resolver, [f"{base}/r/a"]))
+    assert handler.requests == 1 and resolver.stats["cache_hits"] == 1
+    time.sleep(0.4)
+    asyncio.run(resolve_all(resolver, [f"{base}/r/a"]))
+    assert handler.requests == 2
+
+
+def test_failure_falls_back_to_original_url():
+    resolver = make_resolver(timeout=2.0)
+    # Port 9 (discard) is not listening locally, so the request fails to connect
+    url = "http://127.0.0.1:9/r/a"
+    assert asyncio.run(resolve_all(resolver, [url])) == [url]
+    assert resolver.stats["failures"] == 1
+    assert not resolver.memory_cache
+
+
+def test_memory_cache_is_bounded(stub):
+    _, base = stub
+    resolver = make_resolver(max_memory_entries=2)
+
+    async def resolve_in_order():
+        for i in range(4):
+            await resolver.resolve(f"{base}/r/{i}")
+        await resolver.aclose()
+
+    asyncio.run(resolve_in_order())
+    assert list(resolver.memory_cache) == [f"{base}/r/2", f"{base}/r/3"]
+
+
+def test_other_hosts_are_not_resolved():
+    resolver = make_resolver()
+    assert asyncio.run(resolve_all(resolver, ["https://example.org/a", None])) == ["https://example.org/a", None]
+    assert resolver.stats["lookups"] == 0
@@ -0,0 +1,134 @@
+import asyncio
+import sqlite3
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import httpx
+
+from helpers import tune_sqlite
+
+DEFAULT_RESOLVE_HOSTS = ("vertexaisearch.cloud.google.com",)
+
+
+class UrlResolver:
+    """Long-lived redirect resolver with a pooled client, per-host caps, request coalescing and a TTL cache.
+
+    The in-memory layer of the cache is an LRU of at most `max_memory_entries` URLs in front of the
+    SQLite table, so a long-lived server process doesn't grow with every URL it has ever seen.
+    """
+
+    def __init__(self, cache_path: str | None = "./url_cache.db", ttl_seconds: float = 7 * 86400,
+                 per_host_limit: int = 4, timeout: float = 10.0, resolve_hosts: tuple[str, ...] = DEFAULT_RESOLVE_HOSTS,
+                 max_memory_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.resolve_hosts = tuple(resolve_hosts)
+        self.max_memory_entries = max_memory_entries
+        self.memory_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.stats = {"lookups": 0, "cache_hits": 0, "coalesced": 0, "network_requests": 0, "failures": 0}
+        self.conn = None
+        if cache_path:
+            self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+            tune_sqlite(self.conn)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS url_redirects (url TEXT PRIMARY KEY, resolved TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.conn.commit()
+        self._loop = None
+        self._client: httpx.AsyncClient | None = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    def needs_resolution(self, url: str) -> bool:
+        return any(host in url for host in self.resolve_hosts)
+
+    def _bind_to_running_loop(self) -> None:
+        """(Re)creates loop-bound state (client, semaphores, in-flight tasks) for the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._client is not None:
+            return
+        self._loop = loop
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.per_host_limit * 8, max_keepalive_connections=self.per_host_limit * 4),
+        )
+        self._host_semaphores = {}
+        self._in_flight = {}
+
+    def _cached(self, url: str) -> str | None:
+        now = time.time()
+        entry = self.memory_cache.get(url)
+        if entry and entry[1] > now:
+            self.memory_cache.move_to_end(url)
+            return entry[0]
+        if entry:
+            del self.memory_cache[url]
+        if self.conn is None:
+            return None
+        row = self.conn.execute("SELECT resolved, expires_at FROM url_redirects WHERE url = ? AND expires_at > ?",
+                                (url, now)).fetchone()
+        if row is None:
+            return None
+        self._remember(url, row[0], row[1])
+        return row[0]
+
+    def _remember(self, url: str, resolved: str, expires_at: float) -> None:
+        self.memory_cache[url] = (resolved, expires_at)
+        self.memory_cache.move_to_end(url)
+        while len(self.memory_cache) > self.max_memory_entries:
+            self.memory_cache.popitem(last=False)
+
+    def _store(self, url: str, resolved: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(url, resolved, expires_at)
+        if self.conn is not None:
+            self.conn.execute("INSERT OR REPLACE INTO url_redirects (url, resolved, expires_at) VALUES (?, ?, ?)",
+                              (url, resolved, expires_at))
+            self.conn.commit()
+
+    async def _fetch(self, url: str) -> str:
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        async with semaphore:
+            self.stats["network_requests"] += 1
+            try:
+                resp = await self._client.head(url, follow_redirects=True)
+            except httpx.RequestError as e:
+                self.stats["failures"] += 1
+                print(f"\n(Warning: Could not resolve URL {url}: {e})")
+                return url
+        resolved = str(resp.url)
+        self._store(url, resolved)
+        return resolved
+
+    async def resolve(self, url: str) -> str:
+        """Resolves a redirect URL, answering from cache or an identical in-flight request when possible."""
+        if not isinstance(url, str) or not self.needs_resolution(url):
+            return url
+        self.stats["lookups"] += 1
+        cached = self._cached(url)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        self._bind_to_running_loop()
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch(url))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def resolve_many(self, urls: list) -> list:
+        """Resolves a list of source URLs concurrently, keeping their order."""
+        return list(await asyncio.gather(*(self.resolve(url) for url in urls)))
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP client; the resolver can be reused afterwards."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None